@@ -0,0 +1,134 @@
+"""split location points into partitioned table
+
+Revision ID: 5b7e2c9d1a34
+Revises: 0c910b963c61
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2c9d1a34'
+down_revision: Union[str, None] = '0c910b963c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in sync with LOCATION_RETENTION_DAYS / LOCATION_PARTITION_PREMAKE_DAYS
+RETENTION_DAYS = 30
+PREMAKE_DAYS = 7
+
+# Each plan's destination: its earliest row with a name (create.py / update.py
+# always name it, and update.py replaced every row of the plan when it changed
+# the destination), or its earliest row when none has a name. Ids follow
+# insertion order. Everything else attached to a plan is a shared GPS point.
+DESTINATIONS_SQL = """
+    SELECT l.id
+    FROM locations l
+    WHERE l.plan_id IS NOT NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM locations e
+          WHERE e.plan_id = l.plan_id
+            AND e.id < l.id
+            AND (e.name IS NOT NULL OR l.name IS NULL)
+      )
+      AND (
+          l.name IS NOT NULL
+          OR NOT EXISTS (SELECT 1 FROM locations n WHERE n.plan_id = l.plan_id AND n.name IS NOT NULL)
+      )
+"""
+
+
+def _create_partition(day: date) -> None:
+    end = day + timedelta(days=1)
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS location_points_p{day:%Y%m%d} "
+        f"PARTITION OF location_points "
+        f"FOR VALUES FROM ('{day.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        'location_points',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('plan_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=False),
+        sa.Column('longitude', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['plan_id'], ['plans.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+    op.create_index('ix_location_points_plan_id_created_at', 'location_points', ['plan_id', 'created_at'])
+
+    op.create_table(
+        'location_track_summaries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('plan_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('ended_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('path', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['plan_id'], ['plans.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_location_track_summaries_id'), 'location_track_summaries', ['id'], unique=False)
+    op.create_index(op.f('ix_location_track_summaries_plan_id'), 'location_track_summaries', ['plan_id'], unique=False)
+
+    op.execute(f"CREATE TEMP TABLE _plan_destinations ON COMMIT DROP AS {DESTINATIONS_SQL}")
+
+    # Partitions for every day that has points to move, plus the live window
+    conn = op.get_bind()
+    days = {
+        row[0] for row in conn.execute(sa.text("""
+            SELECT DISTINCT (coalesce(created_at, now()) AT TIME ZONE 'UTC')::date
+            FROM locations
+            WHERE plan_id IS NOT NULL AND id NOT IN (SELECT id FROM _plan_destinations)
+        """))
+    }
+    today = datetime.now(timezone.utc).date()
+    days.update(today + timedelta(days=offset) for offset in range(-RETENTION_DAYS, PREMAKE_DAYS + 1))
+    for day in sorted(days):
+        _create_partition(day)
+
+    op.execute("""
+        INSERT INTO location_points (created_at, plan_id, user_id, latitude, longitude)
+        SELECT coalesce(created_at, now()), plan_id, user_id, latitude, longitude
+        FROM locations
+        WHERE plan_id IS NOT NULL
+          AND user_id IS NOT NULL
+          AND latitude IS NOT NULL
+          AND longitude IS NOT NULL
+          AND id NOT IN (SELECT id FROM _plan_destinations)
+    """)
+    op.execute("""
+        DELETE FROM locations
+        WHERE plan_id IS NOT NULL
+          AND id NOT IN (SELECT id FROM _plan_destinations)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        INSERT INTO locations (plan_id, user_id, latitude, longitude, created_at)
+        SELECT plan_id, user_id, latitude, longitude, created_at
+        FROM location_points
+    """)
+
+    op.drop_index(op.f('ix_location_track_summaries_plan_id'), table_name='location_track_summaries')
+    op.drop_index(op.f('ix_location_track_summaries_id'), table_name='location_track_summaries')
+    op.drop_table('location_track_summaries')
+
+    # Dropping the partitioned parent drops every partition with it
+    op.drop_index('ix_location_points_plan_id_created_at', table_name='location_points')
+    op.drop_table('location_points')
@@ -0,0 +1,26 @@
+"""add version to plans
+
+Revision ID: 7c3d9e1f2a45
+Revises: 5b7e2c9d1a34
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d9e1f2a45'
+down_revision: Union[str, None] = '5b7e2c9d1a34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('plans', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('plans', 'version')
@@ -0,0 +1,156 @@
+"""add change log
+
+Revision ID: 8d4e0f2a3b56
+Revises: 7c3d9e1f2a45
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4e0f2a3b56'
+down_revision: Union[str, None] = '7c3d9e1f2a45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Anything that is part of a plan payload (the plan row, participants and
+# their status, destination, penalties, invites) is logged as a 'plan'
+# upsert for every participant. A participant that is removed gets a 'plan'
+# delete. Invites are also logged for the invitee, notifications for their
+# owner. Statement-level triggers with transition tables keep multi-row
+# writes to one fan-out per plan.
+FUNCTIONS = [
+    """
+    CREATE OR REPLACE FUNCTION change_log_touch_plans(plan_ids integer[]) RETURNS void AS $$
+        INSERT INTO change_log (user_id, entity, entity_id, op)
+        SELECT DISTINCT pp.user_id, 'plan', pp.plan_id, 'upsert'
+        FROM plan_participants pp
+        WHERE pp.plan_id = ANY(plan_ids);
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_log_plans() RETURNS trigger AS $$
+    BEGIN
+        PERFORM change_log_touch_plans(ARRAY(SELECT id FROM new_rows));
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_log_plan_participants() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO change_log (user_id, entity, entity_id, op)
+            SELECT DISTINCT o.user_id, 'plan', o.plan_id, 'delete' FROM old_rows o;
+            PERFORM change_log_touch_plans(ARRAY(SELECT DISTINCT plan_id FROM old_rows));
+        ELSE
+            PERFORM change_log_touch_plans(ARRAY(SELECT DISTINCT plan_id FROM new_rows));
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_log_plan_children() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM change_log_touch_plans(ARRAY[OLD.plan_id]);
+        ELSE
+            PERFORM change_log_touch_plans(ARRAY[NEW.plan_id]);
+            IF TG_OP = 'UPDATE' AND OLD.plan_id IS DISTINCT FROM NEW.plan_id THEN
+                PERFORM change_log_touch_plans(ARRAY[OLD.plan_id]);
+            END IF;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_log_plan_invites() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO change_log (user_id, entity, entity_id, op)
+            VALUES (OLD.user_id, 'plan_invite', OLD.id, 'delete');
+            PERFORM change_log_touch_plans(ARRAY[OLD.plan_id]);
+        ELSE
+            INSERT INTO change_log (user_id, entity, entity_id, op)
+            VALUES (NEW.user_id, 'plan_invite', NEW.id, 'upsert');
+            PERFORM change_log_touch_plans(ARRAY[NEW.plan_id]);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION change_log_notifications() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            IF OLD.user_id IS NOT NULL THEN
+                INSERT INTO change_log (user_id, entity, entity_id, op)
+                VALUES (OLD.user_id, 'notification', OLD.id, 'delete');
+            END IF;
+        ELSIF NEW.user_id IS NOT NULL THEN
+            INSERT INTO change_log (user_id, entity, entity_id, op)
+            VALUES (NEW.user_id, 'notification', NEW.id, 'upsert');
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+TRIGGERS = [
+    ("change_log_plans_upd", "plans", "AFTER UPDATE", "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT", "change_log_plans"),
+    ("change_log_plan_participants_ins", "plan_participants", "AFTER INSERT", "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT", "change_log_plan_participants"),
+    ("change_log_plan_participants_upd", "plan_participants", "AFTER UPDATE", "REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT", "change_log_plan_participants"),
+    ("change_log_plan_participants_del", "plan_participants", "AFTER DELETE", "REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT", "change_log_plan_participants"),
+    ("change_log_locations", "locations", "AFTER INSERT OR UPDATE OR DELETE", "FOR EACH ROW", "change_log_plan_children"),
+    ("change_log_penalties", "penalties", "AFTER INSERT OR UPDATE OR DELETE", "FOR EACH ROW", "change_log_plan_children"),
+    ("change_log_plan_invites", "plan_invites", "AFTER INSERT OR UPDATE OR DELETE", "FOR EACH ROW", "change_log_plan_invites"),
+    ("change_log_notifications", "notifications", "AFTER INSERT OR UPDATE OR DELETE", "FOR EACH ROW", "change_log_notifications"),
+]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(), nullable=False),
+        sa.Column('txid', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_change_log_user_id_txid_id', 'change_log', ['user_id', 'txid', 'id'], unique=False)
+    op.create_index(op.f('ix_change_log_created_at'), 'change_log', ['created_at'], unique=False)
+
+    for function in FUNCTIONS:
+        op.execute(function)
+    for name, table, when, granularity, function in TRIGGERS:
+        op.execute(f"CREATE TRIGGER {name} {when} ON {table} {granularity} EXECUTE FUNCTION {function}()")
+
+
+def downgrade() -> None:
+    for name, table, _, _, _ in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+    for function in (
+        "change_log_notifications()",
+        "change_log_plan_invites()",
+        "change_log_plan_children()",
+        "change_log_plan_participants()",
+        "change_log_plans()",
+        "change_log_touch_plans(integer[])",
+    ):
+        op.execute(f"DROP FUNCTION IF EXISTS {function}")
+
+    op.drop_index(op.f('ix_change_log_created_at'), table_name='change_log')
+    op.drop_index('ix_change_log_user_id_txid_id', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,27 @@
+"""add name to location points
+
+Revision ID: a3c5e7f9b1d2
+Revises: 8d4e0f2a3b56
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b1d2'
+down_revision: Union[str, None] = '8d4e0f2a3b56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default: a catalog-only change, partitions included
+    op.add_column('location_points', sa.Column('name', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('location_points', 'name')
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, Set
 from fastapi import APIRouter, Depends, Form, HTTPException, status
@@ -43,7 +44,7 @@ async def signup(
         )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)  # bcrypt is CPU-bound
     db_user = UserModel(
         email=user.email,
         display_name=user.display_name,
@@ -81,7 +82,7 @@ async def login(
         select(UserModel).where(UserModel.username == form_data.username)
     )
     user = result.scalar_one_or_none()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await asyncio.to_thread(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -109,7 +110,7 @@ async def login(
         select(UserModel).where(UserModel.email == email)
     )
     user = result.scalar_one_or_none()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await asyncio.to_thread(verify_password, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
 from app.core.auth import get_current_username
+from app.core.etag import etag_matches, not_modified, weak_etag
 from app.db.db_users import get_current_user
+from app.db.routing import get_read_db
 from app.db.session import get_db
-from app.models import User, FriendInvite as FriendInviteModel
+from app.models import User, FriendInvite as FriendInviteModel, user_friends
 from app.schemas import FriendInvite, FriendInviteCreate, UserResponse
 from app.services.push_notification import send_friend_invite_notification
 
@@ -15,24 +18,46 @@ router = APIRouter()
 
 @router.get("/list", response_model=list[UserResponse])
 async def read_friends(
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # Get current user with friends relationship loaded
     result = await db.execute(
-        select(User)
-        .options(selectinload(User.friends))
-        .where(User.username == current_user)
+        select(User.id).where(User.username == current_user)
     )
-    user = result.scalar_one_or_none()
-    
-    if not user:
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    return user.friends
+
+    # Ordered ids and latest profile change of the friends: moves when a
+    # friend is added or removed or edits their profile
+    friends_of_user = (
+        select(User.id, User.created_at, User.updated_at)
+        .join(user_friends, user_friends.c.friend_id == User.id)
+        .where(user_friends.c.user_id == user_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(
+            func.json_agg(aggregate_order_by(friends_of_user.c.id, friends_of_user.c.id)),
+            func.max(func.coalesce(friends_of_user.c.updated_at, friends_of_user.c.created_at)),
+        )
+    )
+    etag = weak_etag(*result.one())
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    result = await db.execute(
+        select(User)
+        .join(user_friends, user_friends.c.friend_id == User.id)
+        .where(user_friends.c.user_id == user_id)
+    )
+    response.headers["ETag"] = etag
+    return result.scalars().all()
 
 @router.post("/friend-invites", response_model=FriendInvite)
 async def create_friend_invite(
@@ -88,7 +113,7 @@ async def create_friend_invite(
 @router.get("/friend-invites/received", response_model=List[FriendInvite])
 async def read_received_invites(
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     # Get current user with friends relationship loaded
     result = await db.execute(
@@ -118,7 +143,7 @@ async def read_received_invites(
 @router.get("/friend-invites/sent", response_model=List[FriendInvite])
 async def read_sent_invites(
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Get current user with friends relationship loaded
     result = await db.execute(
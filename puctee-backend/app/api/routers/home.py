@@ -0,0 +1,169 @@
+"""
+Home screen endpoint
+
+Everything the app loads on launch (plans, plan invites, unread
+notification count, trust stats and received friend invites) in one
+request, one auth decode and one DB session. Every section carries its own
+ETag; sections whose ETag the client already has (passed back in `known`)
+are left out of the payload.
+
+Section ETags come from cheap validators (plan versions, child-row ids and
+latest writes, invite ids and update times) read before any section is
+built, so a launch with nothing new costs three small queries and a section
+is only loaded when its ETag moved.
+
+The remaining section loads run one after another on the request's session
+rather than concurrently on sessions of their own: each is a single round
+trip, and worker pools are sized to their share of pgbouncer's (see
+app/db/pool.py), so fanning one request out over three connections would
+trade a few milliseconds for checkout waits under the launch bursts this
+endpoint exists for. It would also split the request across the replica
+routing decision get_read_db made for it.
+"""
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import JSON, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_username
+from app.core.etag import content_etag, weak_etag
+from app.db.routing import get_read_db
+from app.models import FriendInvite, Notification, User, UserTrustStats
+from app.schemas import HomeResponse
+from app.services.plan_read_model import (
+    list_pending_invites_for_user,
+    list_plans_for_user,
+    pending_invites_validator_query,
+    plans_for_user_validator_query,
+)
+
+router = APIRouter()
+
+SECTIONS = ("plans", "plan_invites", "unread_notification_count", "trust_stats", "friend_invites")
+DEFAULT_PLAN_STATUSES = ["upcoming", "ongoing", "completed", "cancelled"]
+
+
+def _parse_known(known: List[str]) -> Dict[str, str]:
+    """known=plans:"abc"&known=trust_stats:"def" -> {section: etag}"""
+    validators = {}
+    for item in known:
+        section, sep, etag = item.partition(":")
+        if sep and section in SECTIONS:
+            validators[section] = etag
+    return validators
+
+
+async def _pending_friend_invites(db: AsyncSession, user_id: int) -> List[dict]:
+    """Only pending received friend invites"""
+    result = await db.execute(
+        select(
+            FriendInvite.id,
+            FriendInvite.sender_id,
+            FriendInvite.receiver_id,
+            FriendInvite.status,
+            FriendInvite.created_at,
+            FriendInvite.updated_at,
+        )
+        .where(
+            FriendInvite.receiver_id == user_id,
+            FriendInvite.status == "pending"
+        )
+        .order_by(FriendInvite.id.desc())
+    )
+    return [dict(invite._mapping) for invite in result.all()]
+
+
+@router.get("", response_model=HomeResponse)
+async def read_home(
+    plan_status: List[str] = Query(DEFAULT_PLAN_STATUSES),
+    skip: int = 0,
+    limit: int = 20,
+    known: List[str] = Query([]),
+    current_user: str = Depends(get_current_username),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # User, unread count, trust stats and the friend invites validator in one query
+    unread_count = (
+        select(func.count(Notification.id))
+        .where(Notification.user_id == User.id, Notification.is_read == False)
+        .correlate(User)
+        .scalar_subquery()
+    )
+    pending_friend_invites = (
+        select(func.json_agg(
+            aggregate_order_by(func.json_build_array(FriendInvite.id, FriendInvite.updated_at), FriendInvite.id),
+            type_=JSON,
+        ))
+        .where(FriendInvite.receiver_id == User.id, FriendInvite.status == "pending")
+        .correlate(User)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            User.id,
+            unread_count.label("unread_count"),
+            pending_friend_invites.label("friend_invites"),
+            UserTrustStats.id.label("trust_stats_id"),
+            UserTrustStats.total_plans,
+            UserTrustStats.late_plans,
+            UserTrustStats.on_time_streak,
+            UserTrustStats.best_on_time_streak,
+            UserTrustStats.last_arrival_status,
+            UserTrustStats.trust_level,
+        )
+        .outerjoin(UserTrustStats, UserTrustStats.user_id == User.id)
+        .where(User.username == current_user)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    trust_stats = None
+    if row.trust_stats_id is not None:
+        trust_stats = {
+            "id": row.trust_stats_id,
+            "userId": row.id,
+            "total_plans": row.total_plans,
+            "late_plans": row.late_plans,
+            "on_time_streak": row.on_time_streak,
+            "best_on_time_streak": row.best_on_time_streak,
+            "last_arrival_status": row.last_arrival_status,
+            "trust_level": row.trust_level,
+        }
+
+    # Version and child aggregates of the plan page and of the invited plans
+    plan_rows = (await db.execute(plans_for_user_validator_query(row.id, plan_status, skip, limit))).all()
+    invite_rows = (await db.execute(pending_invites_validator_query(row.id))).all()
+
+    validators = {
+        "plans": weak_etag(plan_status, skip, limit, [tuple(plan) for plan in plan_rows]),
+        "plan_invites": weak_etag([tuple(invite) for invite in invite_rows]),
+        "unread_notification_count": content_etag(row.unread_count),
+        "trust_stats": content_etag(trust_stats),
+        "friend_invites": weak_etag(row.friend_invites),
+    }
+    known_validators = _parse_known(known)
+    unchanged = [name for name in SECTIONS if known_validators.get(name) == validators[name]]
+
+    sections = {
+        "plans": None,
+        "plan_invites": None,
+        "unread_notification_count": row.unread_count,
+        "trust_stats": trust_stats,
+        "friend_invites": None,
+    }
+    if "plans" not in unchanged:
+        sections["plans"] = await list_plans_for_user(db, row.id, plan_status, skip, limit)
+    if "plan_invites" not in unchanged:
+        sections["plan_invites"] = await list_pending_invites_for_user(db, row.id)
+    if "friend_invites" not in unchanged:
+        sections["friend_invites"] = await _pending_friend_invites(db, row.id) if row.friend_invites else []
+    for name in unchanged:
+        sections[name] = None
+
+    return {**sections, "validators": validators, "unchanged": unchanged}
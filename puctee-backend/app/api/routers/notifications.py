@@ -4,6 +4,7 @@ from sqlalchemy import select
 from typing import List
 
 from app.core.auth import get_current_username
+from app.db.routing import get_read_db
 from app.db.session import get_db
 from app.models import User, Notification
 from app.schemas import NotificationResponse
@@ -17,7 +18,7 @@ async def read_notifications(
     skip: int = 0,
     limit: int = 100,
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Get current user
     result = await db.execute(
@@ -174,7 +175,7 @@ async def delete_notification(
 @router.get("/notifications/unread-count")
 async def get_unread_notifications_count(
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Get current user
     result = await db.execute(
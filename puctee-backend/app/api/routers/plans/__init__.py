@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from app.core.logs import bind_plan_log_context
 from .main import router as plans_router
 from .location_validation import router as location_validation_router
 
-router = APIRouter()
+# Log records of /plans/{plan_id}/... requests carry the plan_id
+router = APIRouter(dependencies=[Depends(bind_plan_log_context)])
 router.include_router(plans_router, tags=["plans"])
 router.include_router(location_validation_router, prefix="/location", tags=["location-validation"])
@@ -1,16 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.orm import selectinload
 import logging
-from datetime import datetime, timezone
-import json
+import time
+from datetime import timezone
 
 from app.core.auth import get_current_username
 from app.db.session import get_db
 from app.models import User, Plan, Location, Penalty, PlanInvite
 from app.schemas import Plan as PlanSchema, PlanCreate
-from app.services.push_notification import send_plan_invite_notification
+from app.services.push_notification import send_plan_invite_notifications
 from app.services.scheduler.eventbridge_scheduler import schedule_silent_for_plan
 
 logger = logging.getLogger(__name__)
@@ -18,15 +18,8 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 def log_operation(operation: str, data: dict, user_id: int = None, plan_id: int = None):
-    """Helper function to log operations to CloudWatch"""
-    log_data = {
-        'timestamp': datetime.utcnow().isoformat(),
-        'operation': operation,
-        'user_id': user_id,
-        'plan_id': plan_id,
-        'data': data
-    }
-    logger.info(json.dumps(log_data, default=str))
+    """Log one structured operation record (serialized off the request path)"""
+    logger.info(operation, extra={"fields": {"operation": operation, "user_id": user_id, "plan_id": plan_id, **data}})
 
 @router.post("/create", response_model=PlanSchema)
 async def create_plan(
@@ -34,6 +27,7 @@ async def create_plan(
     current_user: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db),
 ):
+    started = time.monotonic()
     try:
         # 1) Get creator
         result = await db.execute(select(User).where(User.username == current_user))
@@ -48,24 +42,22 @@ async def create_plan(
         db_plan.participants.append(user)
         db.add(db_plan)
         await db.flush()
-        
-        log_operation("plan_created", {"title": plan.title, "start_time": plan.start_time}, user.id, db_plan.id)
 
-        # 3) Invite other participants
-        if plan.participants:
-            other_participant_ids = set(pid for pid in plan.participants if pid != user.id)
-            log_operation("processing_participants", {"count": len(other_participant_ids)}, user.id, db_plan.id)
-            
-            for uid in other_participant_ids:
-                try:
-                    other = await db.get(User, uid)
-                    if other:
-                        invite = PlanInvite(plan_id=db_plan.id, user_id=other.id)
-                        db.add(invite)
-                        log_operation("invite_created", {"invited_user_id": other.id}, user.id, db_plan.id)
-                except Exception as e:
-                    logger.error(f"Error inviting user {uid}: {str(e)}", exc_info=True)
-                    continue
+        # 3) Invite other participants: one IN query, one multi-row INSERT
+        requested_ids = set(plan.participants or []) - {user.id}
+        invitees = []
+        if requested_ids:
+            result = await db.execute(
+                select(User.id, User.push_token).where(User.id.in_(requested_ids))
+            )
+            invitees = result.all()
+            if invitees:
+                await db.execute(
+                    insert(PlanInvite).values([
+                        {"plan_id": db_plan.id, "user_id": invitee.id} for invitee in invitees
+                    ])
+                )
+        missing_ids = requested_ids - {invitee.id for invitee in invitees}
 
         # 4) Add Location and Penalty
         try:
@@ -77,7 +69,6 @@ async def create_plan(
                 latitude=loc.latitude,
                 longitude=loc.longitude,
             ))
-            log_operation("location_added", {"name": loc.name}, user.id, db_plan.id)
 
             if plan.penalty:
                 pen = plan.penalty
@@ -86,11 +77,9 @@ async def create_plan(
                     user_id=user.id,
                     content=pen.content,
                 ))
-                log_operation("penalty_added", {"content": pen.content}, user.id, db_plan.id)
 
             # 5) Commit
             await db.commit()
-            log_operation("db_commit_success", {}, user.id, db_plan.id)
 
             # 6) Load relations together
             result = await db.execute(
@@ -105,38 +94,38 @@ async def create_plan(
             )
             full_plan: Plan = result.scalar_one()
             
-            # 7) Send plan invitation notifications
-            notification_count = 0
-            for invite in full_plan.invites:
-                try:
-                    other = await db.get(User, invite.user_id)
-                    if other and other.push_token:
-                        await send_plan_invite_notification(
-                            device_token=other.push_token,
-                            title="New Plan Invitation",
-                            body=f"{user.display_name} invited you to a new plan: {full_plan.title}"
-                        )
-                        notification_count += 1
-                        log_operation("notification_sent", {"to_user_id": other.id}, user.id, db_plan.id)
-                except Exception as e:
-                    logger.error(f"Error sending notification to user {invite.user_id}: {str(e)}", exc_info=True)
-                    continue
-
-            log_operation("create_plan_complete", {"notifications_sent": notification_count}, user.id, db_plan.id)
+            # 7) Send plan invitation notifications as one batch
+            notification_count = await send_plan_invite_notifications(
+                recipients=[(invitee.id, invitee.push_token) for invitee in invitees if invitee.push_token],
+                title="New Plan Invitation",
+                body=f"{user.display_name} invited you to a new plan: {full_plan.title}",
+                plan_id=full_plan.id
+            )
             
             # start_time はtz付きUTCで扱う（無ければUTC化）
             start_utc = plan.start_time.astimezone(timezone.utc)
-            logger.info(f"Plan {db_plan.id} start_time: {plan.start_time}, UTC: {start_utc}")
             
             # Schedule silent notification
+            scheduled = False
             try:
-                success = await schedule_silent_for_plan(db_plan.id, start_utc)
-                if success:
-                    logger.info(f"Silent notification scheduled for plan {db_plan.id}")
-                else:
+                scheduled = await schedule_silent_for_plan(db_plan.id, start_utc)
+                if not scheduled:
                     logger.error(f"Failed to schedule silent notification for plan {db_plan.id}")
             except Exception as e:
                 logger.error(f"Error scheduling silent notification for plan {db_plan.id}: {str(e)}", exc_info=True)
+
+            log_operation("create_plan", {
+                "title": plan.title,
+                "start_time": plan.start_time,
+                "start_utc": start_utc,
+                "invited_user_ids": [invitee.id for invitee in invitees],
+                "missing_user_ids": sorted(missing_ids),
+                "location": loc.name,
+                "penalty": plan.penalty.content if plan.penalty else None,
+                "notifications_sent": notification_count,
+                "scheduled": scheduled,
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            }, user.id, db_plan.id)
             
             return full_plan
 
@@ -156,4 +145,4 @@ async def create_plan(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred"
-        )
\ No newline at end of file
+        )
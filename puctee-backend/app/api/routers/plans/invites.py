@@ -3,11 +3,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 from app.db.session import get_db
+from app.services.plan_cache import plan_cache
 from app.core.auth import get_current_username
 from app.models import Plan
 from app.models import User
 from app.models import PlanInvite as PlanInviteModel
 from app.schemas import PlanInviteCreate, PlanInvite, PlanInviteResponse
+from app.services.plan_read_model import list_pending_invites_for_user
 from typing import List
 
 router = APIRouter()
@@ -49,6 +51,7 @@ async def create_plan_invite(
     db.add(new_invite)
     await db.commit()
     await db.refresh(new_invite)
+    await plan_cache.invalidate(new_invite.plan_id)
     
     return new_invite
 
@@ -59,30 +62,14 @@ async def get_plan_invites(
 ):
     # Get current user
     result = await db.execute(
-        select(User).where(User.username == current_user)
+        select(User.id).where(User.username == current_user)
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Get all pending invites for current user with eager loading
-    result = await db.execute(
-        select(PlanInviteModel)
-        .options(
-            selectinload(PlanInviteModel.plan).selectinload(Plan.participants),
-            selectinload(PlanInviteModel.plan).selectinload(Plan.locations),
-            selectinload(PlanInviteModel.plan).selectinload(Plan.penalties),
-            selectinload(PlanInviteModel.plan).selectinload(Plan.invites)
-        )
-        .where(
-            PlanInviteModel.user_id == user.id,
-            PlanInviteModel.status == "pending"
-        )
-        .order_by(PlanInviteModel.id.desc())
-    )
-    invites = result.scalars().all()
-    
-    return invites
+    # Get all pending invites for current user, plans aggregated in one query
+    return await list_pending_invites_for_user(db, user_id)
 
 @router.put("/invites/{invite_id}", response_model=PlanInviteResponse)
 async def update_plan_invite(
@@ -126,5 +113,6 @@ async def update_plan_invite(
         if user not in invite.plan.participants:
             invite.plan.participants.append(user)
             await db.commit()
+    await plan_cache.invalidate(invite.plan_id)
     
     return invite 
\ No newline at end of file
@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from app.core.auth import get_current_username
+from app.core.singleflight import single_flight
 from app.db.session import get_db
-from app.models import Plan, User
+from app.models import Plan, User, plan_participants
 from app.schemas import LocationShareValidationRequest, LocationShareValidationResponse, UserInfo
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -69,6 +70,24 @@ async def validate_location_share_access(
             error=f"Validation error: {str(e)}"
         )
 
+@single_flight("plans.location.participants", key=lambda db, plan_id: plan_id)
+async def _load_participants(db: AsyncSession, plan_id: int):
+    """
+    プランの参加者 (プランが存在しない場合は None)
+    同時に来た同じプランへのリクエストは1回のクエリを共有する
+    """
+    result = await db.execute(
+        select(Plan.id.label("plan_id"), User.id.label("user_id"), User.username, User.display_name, User.profile_image_url)
+        .outerjoin(plan_participants, plan_participants.c.plan_id == Plan.id)
+        .outerjoin(User, User.id == plan_participants.c.user_id)
+        .where(Plan.id == plan_id)
+        .order_by(User.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    return [row for row in rows if row.user_id is not None]
+
 @router.get("/plan/{plan_id}/participants")
 async def get_plan_participants(
     plan_id: int,
@@ -80,34 +99,27 @@ async def get_plan_participants(
     """
     try:
         # プランの存在確認と参加者の取得
-        result = await db.execute(
-            select(Plan)
-            .where(Plan.id == plan_id)
-            .options(selectinload(Plan.participants))
-        )
-        plan = result.scalar_one_or_none()
+        participants = await _load_participants(db, plan_id)
         
-        if not plan:
+        if participants is None:
             raise HTTPException(status_code=404, detail="Plan not found")
 
         # 現在のユーザーが参加者かどうか確認
-        user_is_participant = any(p.username == current_username for p in plan.participants)
+        user_is_participant = any(p.username == current_username for p in participants)
         if not user_is_participant:
             raise HTTPException(status_code=403, detail="Not a participant of this plan")
 
         # 参加者情報を返す
-        participants = [
-            {
-                "user_id": participant.id,
-                "display_name": participant.display_name,
-                "profile_image_url": participant.profile_image_url
-            }
-            for participant in plan.participants
-        ]
-
         return {
             "plan_id": plan_id,
-            "participants": participants
+            "participants": [
+                {
+                    "user_id": participant.user_id,
+                    "display_name": participant.display_name,
+                    "profile_image_url": participant.profile_image_url
+                }
+                for participant in participants
+            ]
         }
 
     except HTTPException:
@@ -1,95 +1,277 @@
 # Location endpoints
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select, tuple_
 from app.core.auth import get_current_username
+from app.core.singleflight import SingleFlight, single_flight_group
+from app.db.routing import get_read_db, read_target
 from app.db.session import get_db
-from app.models import User, Plan, Location
-from app.schemas import Location as LocationSchema, LocationCreate
-from typing import List
+from app.models import User, LocationPoint, plan_participants
+from app.schemas import (
+    LocationCreate,
+    LocationPoint as LocationPointSchema,
+    LocationUpdateRequest,
+    LocationIngestResponse,
+    LocationBatchRequest,
+    LocationBatchResponse,
+    LocationBatchResult,
+    LocationTrack,
+    LocationTracksResponse,
+    SharedLocation
+)
+from app.services.location_ingestion import location_ingestor
+from app.services.track_encoding import (
+    decode_cursor,
+    delta_encode,
+    encode_cursor,
+    encode_polyline,
+    simplify_indices
+)
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 
 router = APIRouter()
 
-@router.post("/{plan_id}/locations", response_model=LocationSchema)
+# Upper bound on points accepted by one batch upload
+MAX_BATCH_POINTS = 1000
+# Upper bound on points returned by one history read
+MAX_READ_POINTS = 20000
+
+async def _get_participant_id(db: AsyncSession, plan_id: int, username: str) -> int:
+    """Resolve the user and check plan membership in one query. Raises 404 otherwise."""
+    result = await db.execute(
+        select(User.id)
+        .join(plan_participants, plan_participants.c.user_id == User.id)
+        .where(
+            User.username == username,
+            plan_participants.c.plan_id == plan_id
+        )
+    )
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Plan not found"
+        )
+    return user_id
+
+@router.post("/{plan_id}/locations", response_model=SharedLocation)
 async def create_location(
     plan_id: int,
     location: LocationCreate,
     current_user: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    """
+    Store one shared point right away and return it (original contract).
+    Clients that can handle a point being dropped should use
+    POST /{plan_id}/locations/ingest instead.
+    """
+    user_id = await _get_participant_id(db, plan_id, current_user)
 
-    # Get plan
     result = await db.execute(
-        select(Plan).where(
-            Plan.id == plan_id,
-            Plan.participants.contains(user)
+        insert(LocationPoint)
+        .values(
+            plan_id=plan_id,
+            user_id=user_id,
+            latitude=location.latitude,
+            longitude=location.longitude,
+            name=location.name
         )
-    )
-    plan = result.scalar_one_or_none()
-    if not plan:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Plan not found"
+        .returning(
+            LocationPoint.id,
+            LocationPoint.plan_id,
+            LocationPoint.user_id,
+            LocationPoint.name,
+            LocationPoint.latitude,
+            LocationPoint.longitude,
+            LocationPoint.created_at
         )
-
-    # Create location
-    db_location = Location(
-        **location.model_dump(),
-        plan_id=plan_id,
-        user_id=user.id
     )
-    db.add(db_location)
+    stored = result.one()
     await db.commit()
-    await db.refresh(db_location)
-    return db_location
+    return SharedLocation.model_validate(stored)
 
-@router.get("/{plan_id}/locations", response_model=List[LocationSchema])
-async def read_locations(
+@router.post("/{plan_id}/locations/ingest", response_model=LocationIngestResponse)
+async def ingest_location(
     plan_id: int,
-    since: datetime = None,
+    location: LocationUpdateRequest,
     current_user: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db)
 ):
-    # Get current user
-    result = await db.execute(
-        select(User).where(User.username == current_user)
+    """
+    Share one point through the ingestion stage. Points too close to or too
+    soon after the last accepted one are dropped; accepted points are queued
+    and written in batches.
+    """
+    user_id = await _get_participant_id(db, plan_id, current_user)
+
+    # Filter against the last accepted point; accepted points are written in batches
+    decision = await location_ingestor.submit(
+        plan_id=plan_id,
+        user_id=user_id,
+        latitude=location.latitude,
+        longitude=location.longitude,
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    return LocationIngestResponse(
+        accepted=decision.accepted,
+        reason=decision.reason,
+        distance=decision.distance_m
+    )
+
+@router.post("/{plan_id}/locations/batch", response_model=LocationBatchResponse)
+async def create_locations_batch(
+    plan_id: int,
+    batch: LocationBatchRequest,
+    current_user: str = Depends(get_current_username),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload GPS fixes buffered on the device in one request.
+    Points are filtered in order like single uploads and the accepted ones are
+    written with one multi-row INSERT and a single commit.
+    """
+    if len(batch.points) > MAX_BATCH_POINTS:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many points in one batch (max {MAX_BATCH_POINTS})"
         )
 
-    # Get plan
-    result = await db.execute(
-        select(Plan).where(
-            Plan.id == plan_id,
-            Plan.participants.contains(user)
-        )
+    user_id = await _get_participant_id(db, plan_id, current_user)
+
+    decisions, rows = location_ingestor.evaluate_batch(
+        plan_id=plan_id,
+        user_id=user_id,
+        points=[point.model_dump() for point in batch.points]
     )
-    plan = result.scalar_one_or_none()
-    if not plan:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Plan not found"
+    if rows:
+        await db.execute(insert(LocationPoint).values(rows))
+        await db.commit()
+        # Only once stored, so a retried upload isn't throttled against itself
+        location_ingestor.record_batch(plan_id, user_id, rows)
+
+    return LocationBatchResponse(
+        received=len(decisions),
+        accepted=len(rows),
+        results=[
+            LocationBatchResult(index=i, accepted=d.accepted, reason=d.reason)
+            for i, d in enumerate(decisions)
+        ]
+    )
+
+@router.get(
+    "/{plan_id}/locations",
+    response_model=Union[List[LocationPointSchema], LocationTracksResponse]
+)
+async def read_locations(
+    response: Response,
+    plan_id: int,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    tolerance: Optional[float] = Query(None, ge=0, description="Douglas-Peucker tolerance in meters"),
+    format: Literal["points", "tracks", "polyline"] = "points",
+    limit: int = Query(5000, ge=1, le=MAX_READ_POINTS),
+    current_user: str = Depends(get_current_username),
+    db: AsyncSession = Depends(get_read_db),
+    flight: SingleFlight = Depends(single_flight_group("plans.locations"))
+):
+    """
+    Shared track points of a plan, oldest first.
+
+    - format=points: flat list of points (original shape)
+    - format=tracks: grouped per user as [latitude, longitude, epoch_seconds]
+    - format=polyline: grouped per user as an encoded polyline plus delta-encoded timestamps
+
+    Pass the returned cursor (body next_cursor or X-Next-Cursor header) back as
+    `cursor` to fetch only newer points. `since` is an exclusive timestamp for
+    the first request. `tolerance` simplifies each user's track.
+    """
+    await _get_participant_id(db, plan_id, current_user)
+
+    # Keyset pagination on (created_at, id)
+    query = select(
+        LocationPoint.id,
+        LocationPoint.user_id,
+        LocationPoint.latitude,
+        LocationPoint.longitude,
+        LocationPoint.created_at,
+        LocationPoint.name
+    ).where(LocationPoint.plan_id == plan_id)
+    if cursor:
+        position = decode_cursor(cursor)
+        if position is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(
+            tuple_(LocationPoint.created_at, LocationPoint.id) > tuple_(*position)
+        )
+    elif since:
+        query = query.where(LocationPoint.created_at > since)
+    query = query.order_by(LocationPoint.created_at, LocationPoint.id).limit(limit)
+
+    # Participants polling the same page at the same moment share one query
+    async def fetch_rows():
+        return (await db.execute(query)).all()
+
+    rows = await flight.do((plan_id, cursor, None if cursor else since, limit, read_target(db)), fetch_rows)
+
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if rows else cursor
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    # Group per user, keeping time order
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row.user_id, []).append(row)
+    if tolerance:
+        for user_id, user_rows in by_user.items():
+            keep = simplify_indices([(r.latitude, r.longitude) for r in user_rows], tolerance)
+            by_user[user_id] = [user_rows[i] for i in keep]
+
+    if format == "points":
+        points = sorted(
+            (r for user_rows in by_user.values() for r in user_rows),
+            key=lambda r: (r.created_at, r.id)
         )
+        return [
+            LocationPointSchema(
+                id=r.id,
+                plan_id=plan_id,
+                user_id=r.user_id,
+                latitude=r.latitude,
+                longitude=r.longitude,
+                created_at=r.created_at,
+                name=r.name
+            )
+            for r in points
+        ]
+
+    point_counts = {}
+    for row in rows:
+        point_counts[row.user_id] = point_counts.get(row.user_id, 0) + 1
 
-    # Get locations
-    query = select(Location).where(Location.plan_id == plan_id)
-    if since:
-        query = query.where(Location.created_at >= since)
-    result = await db.execute(query)
-    locations = result.scalars().all()
-    return locations
\ No newline at end of file
+    tracks = []
+    for user_id, user_rows in by_user.items():
+        epochs = [int(r.created_at.timestamp()) for r in user_rows]
+        if format == "tracks":
+            tracks.append(LocationTrack(
+                user_id=user_id,
+                point_count=point_counts[user_id],
+                points=[[r.latitude, r.longitude, t] for r, t in zip(user_rows, epochs)]
+            ))
+        else:
+            tracks.append(LocationTrack(
+                user_id=user_id,
+                point_count=point_counts[user_id],
+                polyline=encode_polyline([(r.latitude, r.longitude) for r in user_rows]),
+                timestamps=delta_encode(epochs)
+            ))
+
+    return LocationTracksResponse(
+        plan_id=plan_id,
+        format=format,
+        tracks=tracks,
+        next_cursor=next_cursor
+    )
@@ -1,6 +1,7 @@
 # Plan participation endpoints
 from app.core.auth import get_current_username
 from app.db.session import get_db
+from app.services.plan_cache import plan_cache
 from app.models import User, Plan
 from app.schemas import Plan as PlanSchema
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -41,6 +42,7 @@ async def join_plan(
     if user not in plan.participants:
         plan.participants.append(user)
         await db.commit()
+        await plan_cache.invalidate(plan_id)
 
     return {"message": "Successfully joined plan"}
 
@@ -76,5 +78,6 @@ async def leave_plan(
     if user in plan.participants:
         plan.participants.remove(user)
         await db.commit()
+        await plan_cache.invalidate(plan_id)
 
     return {"message": "Successfully left plan"}
\ No newline at end of file
@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.core.auth import get_current_username
 from app.db.session import get_db
+from app.services.plan_cache import plan_cache
 from app.models import User, Plan, Penalty
 from app.schemas import (
     Penalty as PenaltySchema, 
@@ -92,6 +93,7 @@ async def create_penalty(
     db.add(db_penalty)
     await db.commit()
     await db.refresh(db_penalty)
+    await plan_cache.invalidate(plan_id)
     return db_penalty
 
 @router.post("/{plan_id}/penalties/{penalty_id}/proof")
@@ -6,16 +6,20 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy import select, update
 from app.core.auth import get_current_username
 from app.db.session import get_db
+from app.services.plan_cache import plan_cache
 from app.models import User, Plan, plan_participants, PenaltyApprovalRequest, Penalty
 from app.schemas import (
     PenaltyApprovalRequestCreate,
     PenaltyApprovalRequestResponse,
     PenaltyApprovalStatus
 )
-from app.services.push_notification import send_penalty_approval_request_notification
+from app.services.push_notification import send_penalty_approval_request_notifications
 from app.core.s3 import upload_proof_image_to_s3
 from datetime import datetime, timezone
 import base64
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -108,6 +112,7 @@ async def send_penalty_approval_request(
     db.add(approval_request)
     await db.commit()
     await db.refresh(approval_request)
+    await plan_cache.invalidate(plan_id)
     
     # Handle proof image data upload to S3 if provided
     if request_data.proof_image_data:
@@ -131,34 +136,25 @@ async def send_penalty_approval_request(
             await db.refresh(approval_request)
             
         except Exception as e:
-            print(f"Failed to upload proof image: {str(e)}")
+            logger.error(f"Failed to upload proof image: {str(e)}")
             # Continue without failing the entire request
     
     # Get all participants except the requesting user
     other_participants = [p for p in plan.participants if p.id != requesting_user.id]
     
     # Send push notifications to all other participants
-    notification_count = 0
-    
-    for participant in other_participants:
-        if participant.push_token:
-            try:
-                success = await send_penalty_approval_request_notification(
-                    device_token=participant.push_token,
-                    requesting_user_name=requesting_user.display_name,
-                    request_id=approval_request.id,
-                    plan_title=plan.title
-                )
-                if success:
-                    notification_count += 1
-                    print(f"Penalty approval notification sent to {participant.username}")
-                else:
-                    print(f"Failed to send notification to {participant.username}")
-            except Exception as e:
-                print(f"Failed to send notification to {participant.username}: {str(e)}")
+    notification_count = await send_penalty_approval_request_notifications(
+        device_tokens=[p.push_token for p in other_participants if p.push_token],
+        requesting_user_name=requesting_user.display_name,
+        request_id=approval_request.id,
+        plan_title=plan.title
+    )
     
     # Log the approval request
-    print(f"Penalty approval requested by {requesting_user.username} for plan {plan.id}")
+    logger.info(
+        f"Penalty approval requested by {requesting_user.username} for plan {plan.id}, "
+        f"{notification_count} participants notified"
+    )
     return approval_request
 
 @router.post("/{plan_id}/penalty-approval-request-solo", response_model=PenaltyApprovalRequestResponse)
@@ -250,13 +246,13 @@ async def send_penalty_approval_request_solo(
         penalty_status = 'completed'
         penalty_completed_at = datetime.now(timezone.utc)
         
-        print(f"Auto-approving penalty for single participant {requesting_user.username} in plan {plan.id}")
+        logger.info(f"Auto-approving penalty for single participant {requesting_user.username} in plan {plan.id}")
     else:
         # Multiple participants - keep as pending and update to pendingApproval
         penalty_status = 'pendingApproval'
         penalty_completed_at = None
         
-        print(f"Penalty approval requested by {requesting_user.username} for plan {plan.id} with {participant_count} participants")
+        logger.info(f"Penalty approval requested by {requesting_user.username} for plan {plan.id} with {participant_count} participants")
     
     # Update penalty status
     stmt = (
@@ -275,6 +271,7 @@ async def send_penalty_approval_request_solo(
     db.add(approval_request)
     await db.commit()
     await db.refresh(approval_request)
+    await plan_cache.invalidate(plan_id)
     
     # Handle proof image data upload to S3 if provided
     if request_data.proof_image_data:
@@ -298,7 +295,7 @@ async def send_penalty_approval_request_solo(
             await db.refresh(approval_request)
             
         except Exception as e:
-            print(f"Failed to upload proof image: {str(e)}")
+            logger.error(f"Failed to upload proof image: {str(e)}")
             # Continue without failing the entire request
     
     # Send notifications only if multiple participants and not auto-approved
@@ -307,24 +304,13 @@ async def send_penalty_approval_request_solo(
         other_participants = [p for p in plan.participants if p.id != requesting_user.id]
         
         # Send push notifications to all other participants
-        notification_count = 0
-        
-        for participant in other_participants:
-            if participant.push_token:
-                try:
-                    success = await send_penalty_approval_request_notification(
-                        device_token=participant.push_token,
-                        requesting_user_name=requesting_user.display_name,
-                        request_id=approval_request.id,
-                        plan_title=plan.title
-                    )
-                    if success:
-                        notification_count += 1
-                        print(f"Penalty approval notification sent to {participant.username}")
-                    else:
-                        print(f"Failed to send notification to {participant.username}")
-                except Exception as e:
-                    print(f"Failed to send notification to {participant.username}: {str(e)}")
+        notification_count = await send_penalty_approval_request_notifications(
+            device_tokens=[p.push_token for p in other_participants if p.push_token],
+            requesting_user_name=requesting_user.display_name,
+            request_id=approval_request.id,
+            plan_title=plan.title
+        )
+        logger.debug(f"Penalty approval request {approval_request.id}: {notification_count} participants notified")
     
     return approval_request
 
@@ -452,6 +438,7 @@ async def approve_penalty(
     await db.execute(stmt)
     
     await db.commit()
+    await plan_cache.invalidate(plan_id)
     await db.refresh(approval_request)
     
     # Get penalty user for logging
@@ -461,7 +448,7 @@ async def approve_penalty(
     penalty_user = result.scalar_one_or_none()
     
     # Log penalty approval
-    print(f"Penalty approved for user {penalty_user.username if penalty_user else approval_request.penalty_user_id} in plan {plan.id} by {approver.username}")
+    logger.info(f"Penalty approved for user {penalty_user.username if penalty_user else approval_request.penalty_user_id} in plan {plan.id} by {approver.username}")
     
     return approval_request
 
@@ -560,6 +547,7 @@ async def decline_penalty(
     await db.execute(stmt)
     
     await db.commit()
+    await plan_cache.invalidate(plan_id)
     
     # Get penalty user for logging
     result = await db.execute(
@@ -568,7 +556,7 @@ async def decline_penalty(
     penalty_user = result.scalar_one_or_none()
     
     # Log penalty decline
-    print(f"Penalty declined for user {penalty_user.username if penalty_user else approval_request.penalty_user_id} in plan {plan.id} by {decliner.username}")
+    logger.info(f"Penalty declined for user {penalty_user.username if penalty_user else approval_request.penalty_user_id} in plan {plan.id} by {decliner.username}")
     
     return {
         "message": "Penalty approval request declined successfully",
@@ -4,12 +4,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
 from app.core.auth import get_current_username
 from app.db.session import get_db
+from app.services.plan_cache import plan_cache
 from app.models import User, Plan, plan_participants
 from app.schemas import (
     PenaltyStatusUpdate, 
     PenaltyStatusResponse
 )
 from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -140,6 +144,7 @@ async def update_penalty_status_endpoint(
     
     await db.execute(stmt)
     await db.commit()
+    await plan_cache.invalidate(penalty_update.plan_id)
     
     # Get updated participant data
     result = await db.execute(
@@ -151,7 +156,7 @@ async def update_penalty_status_endpoint(
     updated_participant = result.first()
     
     # Log penalty status update
-    print(f"Penalty status updated for user {user.username} in plan {plan.id}: {penalty_update.penalty_status}")
+    logger.info(f"Penalty status updated for user {user.username} in plan {plan.id}: {penalty_update.penalty_status}")
     
     return PenaltyStatusResponse(
         plan_id=penalty_update.plan_id,
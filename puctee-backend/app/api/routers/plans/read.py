@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import desc, select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 from datetime import datetime, UTC
 from app.core.auth import get_current_username
-from app.db.session import get_db
+from app.core.etag import etag_matches, not_modified, versioned_weak_etag
+from app.core.singleflight import single_flight
+from app.db.routing import get_read_db, read_target
 from app.models import User, Plan
 from app.schemas import Plan as PlanSchema, PlanListRequest
+from app.services.plan_cache import plan_cache
+from app.services.plan_read_model import list_plans_by_ids, list_plans_for_user, plan_validator_query
 from fastapi import status as http_status
 
 router = APIRouter()
@@ -16,67 +20,82 @@ router = APIRouter()
 async def read_plans(
     params: PlanListRequest,
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Get current user
     result = await db.execute(
-        select(User).where(User.username == current_user)
+        select(User.id).where(User.username == current_user)
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
         raise HTTPException(
             status_code=http_status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # Get plans with eager loading and order by start_time
-    result = await db.execute(
-        select(Plan)
-        .options(
-            selectinload(Plan.participants),
-            selectinload(Plan.locations),
-            selectinload(Plan.penalties),
-            selectinload(Plan.invites)
-        )
-        .where(
-            Plan.participants.contains(user),
-            Plan.status.in_(params.plan_status)
-        )
-        .order_by(Plan.start_time.desc())  # Sort by start_time in descending order
-        .offset(params.skip)
-        .limit(params.limit)
+    # Plans (with participants, locations, penalties and invites aggregated
+    # in the same query) ordered by start_time in descending order
+    return await list_plans_for_user(
+        db, user_id, params.plan_status, params.skip, params.limit
     )
-    plans = result.scalars().all()
-    return plans
+
+# Replica and primary readers never share a load (read-your-writes)
+@single_flight("plans.read", key=lambda db, plan_id: (plan_id, read_target(db)))
+async def _load_plan(db: AsyncSession, plan_id: int) -> Optional[dict]:
+    """Plan payload, shared by concurrent readers that were already authorized"""
+    plans = await list_plans_by_ids(db, [plan_id])
+    return plans[0] if plans else None
 
 @router.get("/{plan_id}", response_model=PlanSchema)
 async def read_plan(
     plan_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     # Get current user
     result = await db.execute(
-        select(User).where(User.username == current_user)
+        select(User.id).where(User.username == current_user)
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
         raise HTTPException(
             status_code=http_status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # Get plan
-    result = await db.execute(
-        select(Plan).where(
-            Plan.id == plan_id,
-            Plan.participants.contains(user)
+    if plan_cache.enabled:
+        # Shared payload from Redis; the participation check uses the cached ids
+        entry = await plan_cache.get_plan(plan_id)
+        if entry is None or user_id not in entry["participant_ids"]:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Plan not found"
+            )
+        if etag_matches(if_none_match, entry["etag"]):
+            return not_modified(entry["etag"])
+        response.headers["ETag"] = entry["etag"]
+        return entry["plan"]
+
+    # Version and child aggregates first: polls of an unchanged plan stop here
+    result = await db.execute(plan_validator_query(plan_id, user_id))
+    validator = result.first()
+    if not validator:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Plan not found"
         )
-    )
-    plan = result.scalar_one_or_none()
-    if not plan:
+    # Weak: updates take the strong "v{version}" in If-Match, built from the version field
+    etag = versioned_weak_etag(validator.version, *validator[1:])
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    plan = await _load_plan(db, plan_id)
+    if plan is None:
         raise HTTPException(
             status_code=http_status.HTTP_404_NOT_FOUND,
             detail="Plan not found"
         )
-    return plan
\ No newline at end of file
+    response.headers["ETag"] = etag
+    return plan
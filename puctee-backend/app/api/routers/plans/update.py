@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Optional
+from datetime import datetime, timezone
 from app.core.auth import get_current_username
+from app.core.etag import parse_if_match, version_conflict, version_etag
+from app.services.plan_cache import plan_cache
 from app.db.session import get_db
-from app.models import Plan, User, Location, Penalty
+from app.models import Plan, User, Location, Penalty, plan_participants
 from app.schemas import PlanUpdate, Plan as PlanSchema
 from app.services.scheduler.eventbridge_scheduler import schedule_silent_for_plan
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -14,9 +22,19 @@ router = APIRouter()
 async def update_plan(
     plan_id: int,
     plan_update: PlanUpdate,
+    response: Response,
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    if_match: Optional[str] = Header(None, alias="If-Match")
 ):
+    """
+    Update a plan. Send "v{version}" (the plan's version field, or the ETag
+    of a previous update) in If-Match to make the update conditional; a
+    stale version (or a concurrent write) gets a 409 with the current
+    version. Weak ETags from GET get a 412.
+    """
+    expected_version = parse_if_match(if_match)
+
     # Get current user
     result = await db.execute(
         select(User).where(User.username == current_user)
@@ -45,55 +63,143 @@ async def update_plan(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Plan not found"
         )
+    if expected_version is not None and expected_version != plan.version:
+        raise version_conflict(plan.version)
 
     # Update plan fields
     update_data = plan_update.model_dump(exclude_unset=True)
+    changed = False
+    start_time_changed = False
     
-    # Handle relationships separately
+    # Handle relationships separately: write only what differs so each
+    # participant keeps its arrival and penalty state
     if 'participants' in update_data and update_data['participants'] is not None:
         # Update participants (sent as List[int])
-        plan.participants = []
-        result = await db.execute(
-            select(User).where(User.id.in_(update_data['participants']))
-        )
-        users = result.scalars().all()
-        plan.participants.extend(users)
+        current_ids = {participant.id for participant in plan.participants}
+        requested_ids = set(update_data['participants'])
+        removed_ids = current_ids - requested_ids
+        added_ids = requested_ids - current_ids
+        if added_ids:
+            # Ignore ids that don't belong to any user
+            result = await db.execute(
+                select(User.id).where(User.id.in_(added_ids))
+            )
+            added_ids = set(result.scalars().all())
+        if removed_ids:
+            await db.execute(
+                delete(plan_participants).where(
+                    plan_participants.c.plan_id == plan.id,
+                    plan_participants.c.user_id.in_(removed_ids)
+                )
+            )
+        if added_ids:
+            await db.execute(
+                insert(plan_participants).values([
+                    {"plan_id": plan.id, "user_id": user_id} for user_id in sorted(added_ids)
+                ])
+            )
+        changed = changed or bool(removed_ids or added_ids)
 
     if 'location' in update_data:
-        # Update location (sent as LocationCreate)
-        plan.locations = []
+        # Update location (sent as LocationCreate) in place
         location_data = update_data['location']
-        location = Location(
-            plan_id=plan.id,
-            user_id=user.id,
-            name=location_data['name'],
-            latitude=location_data['latitude'],
-            longitude=location_data['longitude']
-        )
-        plan.locations.append(location)
+        locations = sorted(plan.locations, key=lambda location: location.id)
+        if locations:
+            location = locations[0]
+            for field in ('name', 'latitude', 'longitude'):
+                if getattr(location, field) != location_data[field]:
+                    setattr(location, field, location_data[field])
+                    changed = True
+            # Plans only have one destination
+            for extra in locations[1:]:
+                await db.delete(extra)
+                changed = True
+        else:
+            db.add(Location(
+                plan_id=plan.id,
+                user_id=user.id,
+                name=location_data['name'],
+                latitude=location_data['latitude'],
+                longitude=location_data['longitude']
+            ))
+            changed = True
 
     if 'penalty' in update_data and update_data['penalty'] is not None:
-        # Update penalty (sent as Optional[PenaltyCreate])
-        plan.penalties = []
+        # Update penalty (sent as Optional[PenaltyCreate]) in place so
+        # approval requests keep pointing at it
         penalty_data = update_data['penalty']
-        penalty = Penalty(
-            plan_id=plan.id,
-            user_id=user.id,
-            content=penalty_data['content'],
-            status=penalty_data.get('status', 'pending')
-        )
-        plan.penalties.append(penalty)
+        penalties = sorted(plan.penalties, key=lambda penalty: penalty.id)
+        if penalties:
+            if penalties[0].content != penalty_data['content']:
+                penalties[0].content = penalty_data['content']
+                changed = True
+        else:
+            db.add(Penalty(
+                plan_id=plan.id,
+                user_id=user.id,
+                content=penalty_data['content']
+            ))
+            changed = True
 
     # Update other fields
     for field, value in update_data.items():
-        if field not in ['participants', 'location', 'penalty']:
-            setattr(plan, field, value)
+        if field in ['participants', 'location', 'penalty']:
+            continue
+        current = getattr(plan, field)
+        if field == 'start_time' and current is not None and value is not None:
+            if current.astimezone(timezone.utc) == value.astimezone(timezone.utc):
+                continue
+            start_time_changed = True
+        elif current == value:
+            continue
+        setattr(plan, field, value)
+        changed = True
 
-    # Commit changes
-    await db.commit()
-    await db.refresh(plan)
+    if not changed:
+        # Nothing to write: no version bump, no rescheduling
+        response.headers["ETag"] = version_etag(plan.version)
+        return plan
+
+    # Touch the row so relationship-only edits bump the version too
+    plan.updated_at = datetime.now(timezone.utc)
+
+    # Commit changes; the version check happens in the UPDATE itself
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        result = await db.execute(select(Plan.version).where(Plan.id == plan_id))
+        current_version = result.scalar_one_or_none()
+        if current_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Plan not found"
+            )
+        raise version_conflict(current_version)
+    await plan_cache.invalidate(plan_id)
+
+    # Reload relations (participants were written with core statements)
+    result = await db.execute(
+        select(Plan)
+        .options(
+            selectinload(Plan.participants),
+            selectinload(Plan.locations),
+            selectinload(Plan.penalties),
+            selectinload(Plan.invites)
+        )
+        .where(Plan.id == plan_id)
+        .execution_options(populate_existing=True)
+    )
+    plan = result.scalar_one()
+    response.headers["ETag"] = version_etag(plan.version)
 
-    start_utc = plan.start_time.astimezone(timezone.utc)
-    await schedule_silent_for_plan(plan.id, start_utc, db)
+    # Only touch the EventBridge schedule when the start time moved
+    if start_time_changed:
+        start_utc = plan.start_time.astimezone(timezone.utc)
+        try:
+            if not await schedule_silent_for_plan(plan.id, start_utc):
+                logger.error(f"Failed to reschedule silent notification for plan {plan.id}")
+        except Exception as e:
+            logger.error(f"Error rescheduling silent notification for plan {plan.id}: {str(e)}")
     
-    return plan
\ No newline at end of file
+    return plan
@@ -13,7 +13,8 @@ from sqlalchemy.orm import selectinload
 from app.core.config import settings
 from app.db.session import get_db
 from app.models import Plan
-from app.services.push_notification import send_silent_wakeup_arrival_notification
+from app.services.arrival_evaluator import evaluate_plan_arrivals
+from app.services.push_notification import send_silent_wakeup_arrival_notifications
 
 logger = logging.getLogger(__name__)
 
@@ -39,12 +40,12 @@ async def trigger_silent_notification(
     """
     # Log raw request body for debugging
     raw_body = await raw_request.body()
-    logger.info(f"[SCHEDULER] Raw request body: {raw_body.decode('utf-8')}")
+    logger.debug(f"[SCHEDULER] Raw request body: {raw_body.decode('utf-8')}")
     
     # Parse request - handle EventBridge event structure
     try:
         body_dict = json.loads(raw_body)
-        logger.info(f"[SCHEDULER] Parsed body: {body_dict}")
+        logger.debug(f"[SCHEDULER] Parsed body: {body_dict}")
         
         # Check if this is an EventBridge event (has 'detail' field)
         if 'detail' in body_dict and isinstance(body_dict['detail'], dict):
@@ -91,25 +92,27 @@ async def trigger_silent_notification(
         
         logger.info(f"[SCHEDULER] Found plan '{plan.title}' with {len(plan.participants)} participants")
         
-        # Send silent notifications to all participants
-        notification_count = 0
+        # Evaluate everyone with a recent position server-side in one pass
+        evaluation = await evaluate_plan_arrivals(request.plan_id, db)
+        if evaluation is not None:
+            pending_ids = set(evaluation.pending)
+            logger.info(
+                f"[SCHEDULER] Batch evaluated {len(evaluation.evaluated)} participants, "
+                f"{len(pending_ids)} pending"
+            )
+        else:
+            pending_ids = {user.id for user in plan.participants}
+        
+        # Wake only the participants that still need to check in themselves
+        device_tokens = []
         for user in plan.participants:
+            if user.id not in pending_ids:
+                continue
             if user.push_token:
-                try:
-                    logger.info(f"[SCHEDULER] Sending silent notification to user {user.username}")
-                    success = await send_silent_wakeup_arrival_notification(
-                        device_token=user.push_token,
-                        plan_id=request.plan_id
-                    )
-                    if success:
-                        notification_count += 1
-                        logger.info(f"[SCHEDULER] ✅ Sent to {user.username}")
-                    else:
-                        logger.warning(f"[SCHEDULER] ❌ Failed to send to {user.username}")
-                except Exception as e:
-                    logger.error(f"[SCHEDULER] Error sending to {user.username}: {e}")
+                device_tokens.append(user.push_token)
             else:
                 logger.info(f"[SCHEDULER] User {user.username} has no push token")
+        notification_count = await send_silent_wakeup_arrival_notifications(device_tokens, request.plan_id)
         
         logger.info(f"[SCHEDULER] Completed for plan {request.plan_id}. Sent {notification_count} notifications")
         
@@ -117,6 +120,7 @@ async def trigger_silent_notification(
             "success": True,
             "plan_id": request.plan_id,
             "notifications_sent": notification_count,
+            "evaluated": len(evaluation.evaluated) if evaluation else 0,
             "total_participants": len(plan.participants)
         }
     
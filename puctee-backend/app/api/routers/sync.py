@@ -0,0 +1,56 @@
+"""
+Delta sync endpoint
+
+Clients call GET /api/sync without a cursor once (reset=true: do a full
+fetch, then keep the returned cursor) and afterwards pass back next_cursor
+to receive only plans, plan invites and notifications that changed since,
+plus the ids of the ones that went away. 410 means the cursor is older than
+the change log retention and the client has to start over without one.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_username
+from app.core.config import settings
+from app.db.session import get_db
+from app.models import User
+from app.schemas import SyncResponse
+from app.services.change_feed import CursorExpired, SyncCursor, build_sync_payload
+
+router = APIRouter()
+
+
+@router.get("", response_model=SyncResponse)
+async def read_changes(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=settings.SYNC_MAX_PAGE_SIZE),
+    current_user: str = Depends(get_current_username),
+    db: AsyncSession = Depends(get_db)
+):
+    result = await db.execute(select(User.id).where(User.username == current_user))
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    sync_cursor = None
+    if cursor is not None:
+        sync_cursor = SyncCursor.decode(cursor)
+        if sync_cursor is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    try:
+        return await build_sync_payload(db, user_id, sync_cursor, limit)
+    except CursorExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Cursor expired, sync again without a cursor"
+        )
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, UploadFile, File, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, and_
 from datetime import timedelta
-from botocore.exceptions import ClientError
 import logging
-from typing import List
+from typing import List, Optional
 from sqlalchemy.orm import selectinload
 
 logger = logging.getLogger(__name__)
@@ -17,11 +17,14 @@ from app.core.auth import (
     get_current_username
 )
 from app.core.config import settings
+from app.core.etag import etag_matches, not_modified, weak_etag
+from app.db.routing import get_read_db
 from app.db.session import get_db
 from app.models import User, UserTrustStats
 from app.schemas import ProfileImageResponse, User as UserSchema, UserCreate, Token, UserUpdate, UserResponse, UserTrustStatsResponse
 from app.core.s3 import upload_to_s3
-from app.services.push_notification.notificationClient import notificationClient
+from app.services.plan_cache import participant_plan_ids, plan_cache
+from app.services.push_notification import get_push_notification_client
 
 router = APIRouter()
 
@@ -36,7 +39,7 @@ async def login_for_access_token(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await asyncio.to_thread(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -86,25 +89,46 @@ async def create_user(
 
     return db_user
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
-):
+async def _read_profile(db: AsyncSession, condition, if_none_match: Optional[str], response: Response):
     """
-    Get current user information
+    Public profile columns of one user with a weak ETag from id and
+    updated_at; 304 when the client's copy is current
     """
     result = await db.execute(
-        select(User)
-        .where(User.username == current_user)
+        select(
+            User.id,
+            User.email,
+            User.display_name,
+            User.username,
+            User.profile_image_url,
+            User.is_active,
+            User.created_at,
+            User.updated_at,
+        ).where(condition)
     )
-    user = result.scalar_one_or_none()
-    if not user:
+    row = result.first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    return user
+    etag = weak_etag(row.id, row.updated_at or row.created_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return dict(row._mapping)
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user(
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    current_user: str = Depends(get_current_username),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get current user information
+    """
+    return await _read_profile(db, User.username == current_user, if_none_match, response)
 
 @router.put("/me", response_model=UserSchema)
 async def update_user_me(
@@ -128,13 +152,15 @@ async def update_user_me(
 
     await db.commit()
     await db.refresh(user)
+    # Cached plan payloads show the participant's name and avatar
+    await plan_cache.invalidate(*await participant_plan_ids(db, user.id))
     return user
 
 @router.get("/filter", response_model=List[UserResponse])
 async def search_users(
     query: str = Query(..., description="Search query for display_name or username"),
     current_user: str = Depends(get_current_username),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     try:
         # Get current user with friends relationship loaded
@@ -196,7 +222,7 @@ async def search_users(
 
     except Exception as e:
         # Log error details
-        print(f"Error in search_users: {str(e)}")
+        logger.error(f"Error in search_users: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred while searching users: {str(e)}"
@@ -205,19 +231,12 @@ async def search_users(
 @router.get("/{user_id}", response_model=UserSchema)
 async def read_user(
     user_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
     current_user: str = Depends(get_current_username),
     db: AsyncSession = Depends(get_db)
 ):
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    return user
+    return await _read_profile(db, User.id == user_id, if_none_match, response)
 
 @router.put("/me/push-token")
 async def update_push_token(
@@ -285,7 +304,8 @@ async def upload_profile_image(
     """
     Upload profile image
     """
-    
+    from botocore.exceptions import ClientError  # botocore loads on first upload, not at app import
+
     if not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
@@ -307,6 +327,7 @@ async def upload_profile_image(
         user.profile_image_url = image_url
         await db.commit()
         await db.refresh(user)
+        await plan_cache.invalidate(*await participant_plan_ids(db, user.id))
         
         return ProfileImageResponse(
             message="profile image uploaded successfully",
@@ -356,7 +377,7 @@ async def test_push_notification(
         )
 
     # Send test notification
-    success = await notificationClient.send_notification(
+    success = await get_push_notification_client().send_notification(
         device_token=current_user_obj.push_token,
         title=title,
         body=body,
@@ -391,9 +412,11 @@ async def delete_account(
         )
     
     try:
+        plan_ids = await participant_plan_ids(db, user.id)
         # Delete user (cascade will handle related data)
         await db.delete(user)
         await db.commit()
+        await plan_cache.invalidate(*plan_ids)
         
         return {"message": "Account deleted successfully"}
     except Exception as e:
@@ -5,8 +5,10 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, WebSocket
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
+from app.core.logs import bind_log_context
 from app.models import User
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.routing import note_request_user
 from app.db.session import get_db, AsyncSessionLocal
 from sqlalchemy import select
 
@@ -49,6 +51,8 @@ async def get_current_username(token: str = Depends(oauth2_scheme)):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+    bind_log_context(user=username)
+    note_request_user(username)  # Read-your-writes routing
     # Return only username
     return username 
 
@@ -3,6 +3,18 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     # Database (Neon/Supabase PostgreSQL)
     DATABASE_URL: str
+    # Optional streaming replica for read-only endpoints (see app/db/routing.py)
+    DATABASE_REPLICA_URL: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 2.0  # Reads fall back to the primary beyond this replay lag
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 1.0
+    # Connection pool (see app/db/pool.py)
+    DB_POOL_SIZING: str = "fixed"  # "auto" sizes each worker's pool from the pgbouncer limits below
+    DB_POOL_WORKERS: int = 0  # Processes sharing pgbouncer; 0 reads WEB_CONCURRENCY (default 1)
+    PGBOUNCER_POOL_SIZE: int = 15  # default_pool_size: server connections per database/user
+    PGBOUNCER_MAX_CLIENT_CONN: int = 200
+    PGBOUNCER_RESERVED_CONNECTIONS: int = 5  # Left for migrations, scripts and other clients
+    DB_POOL_LIVENESS: str = ""  # pre_ping | idle_ping | none; empty: pre_ping in production, none locally
+    DB_POOL_PING_IDLE_SECONDS: float = 30.0  # idle_ping: ping connections idle longer than this
     
     # Security
     SECRET_KEY: str
@@ -29,6 +41,11 @@ class Settings(BaseSettings):
     APNS_TEAM_ID: str
     APNS_BUNDLE_ID: str
     APNS_USE_SANDBOX: bool
+    # Send pushes to this host instead of Apple, e.g. the local stand-in
+    # (python -m benchmarks.apns_fake): "http://127.0.0.1:2197"; https:// for TLS
+    APNS_ENDPOINT: str = ""
+    # Read the .p8 signing key from this file instead of Secrets Manager
+    APNS_KEY_FILE: str = ""
 
     # Railway App URL for EventBridge Scheduler
     # Railway automatically provides RAILWAY_PUBLIC_DOMAIN (e.g., "your-app.up.railway.app")
@@ -42,6 +59,66 @@ class Settings(BaseSettings):
             return f"https://{self.RAILWAY_PUBLIC_DOMAIN}"
         return ""
 
+    # Location ingestion
+    # Points closer than LOCATION_MIN_DISTANCE_METERS or sooner than
+    # LOCATION_MIN_INTERVAL_SECONDS after the user's last accepted point are dropped
+    LOCATION_MIN_DISTANCE_METERS: float = 25.0
+    LOCATION_MIN_INTERVAL_SECONDS: float = 15.0
+    LOCATION_BATCH_SIZE: int = 100  # Flush buffered points once this many are queued
+    LOCATION_FLUSH_INTERVAL_SECONDS: float = 2.0  # Background flush period
+
+    # Location history (daily partitions of location_points)
+    LOCATION_RETENTION_DAYS: int = 30  # Older partitions are compacted and dropped
+    LOCATION_PARTITION_PREMAKE_DAYS: int = 7  # Partitions created ahead of time
+    LOCATION_SUMMARY_BUCKET_SECONDS: int = 60  # Downsampling resolution of summaries
+    LOCATION_MAINTENANCE_INTERVAL_SECONDS: int = 3600
+
+    # Batch arrival evaluation at plan start
+    # Participants without a position newer than this are woken with a silent push instead
+    ARRIVAL_POSITION_MAX_AGE_SECONDS: int = 120
+
+    # Arrival check admission control (per worker process)
+    ARRIVAL_BATCH_SIZE: int = 50  # Submissions applied per transaction
+    ARRIVAL_BATCH_WINDOW_SECONDS: float = 0.05  # How long a plan's burst may gather
+    ARRIVAL_MAX_QUEUE_DEPTH: int = 1000  # Beyond this, submissions get a 503
+    ARRIVAL_MAX_CONCURRENT_BATCHES: int = 2  # Keep below the connection pool size
+
+    # Delta sync (change_log)
+    SYNC_PAGE_SIZE: int = 200  # Change entries per /sync page by default
+    SYNC_MAX_PAGE_SIZE: int = 1000
+    CHANGE_LOG_RETENTION_DAYS: int = 30  # Older cursors get a 410 and must resync
+    CHANGE_LOG_PRUNE_INTERVAL_SECONDS: int = 3600
+
+    # Plan detail cache (Redis, only when REDIS_URL is set)
+    PLAN_CACHE_TTL_SECONDS: int = 300  # Upper bound on staleness if an invalidation is lost
+    PLAN_CACHE_LOCK_TIMEOUT_SECONDS: float = 5.0  # Fill lock held by one worker per plan
+    PLAN_CACHE_LOCK_WAIT_SECONDS: float = 1.0  # Other workers wait this long for the fill
+
+    # External clients (APNs, S3, EventBridge) are created on first use.
+    # When enabled, startup warms them concurrently in the background so the
+    # first request doesn't pay for it.
+    WARM_EXTERNAL_CLIENTS: bool = False
+
+    # Prometheus /metrics (per worker process)
+    METRICS_API_KEY: str = ""  # Optional: required as X-API-Key when set
+
+    # Event loop blocking detector (debug mode, see app/core/loop_monitor.py)
+    LOOP_MONITOR_ENABLED: bool = False
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.1  # Callbacks running longer are logged with their stack
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.5  # Loop lag sampling period
+
+    # Request profiler (see app/core/profiler.py); off unless a key or a rate is set
+    PROFILER_API_KEY: str = ""  # Requests sending it as X-Profile-Key are profiled
+    PROFILER_SAMPLE_RATE: float = 0.0  # Fraction of all requests profiled
+    PROFILER_INTERVAL_MS: float = 5.0  # Stack sampling period
+    PROFILER_OUTPUT_DIR: str = "/tmp/puctee-profiles"
+    PROFILER_MAX_FILES: int = 200  # Oldest profiles are deleted beyond this
+
+    # Logging (see app/core/logs.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # "text" for local development
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1  # Fraction of DEBUG records kept when LOG_LEVEL=DEBUG
+
     # Environment
     ENVIRONMENT: str = "development"
 
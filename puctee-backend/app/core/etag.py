@@ -0,0 +1,87 @@
+"""
+ETag helpers: version ETags for optimistic concurrency on versioned
+resources, content ETags for cache validation, weak ETags for conditional
+GETs
+"""
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Response, status
+
+
+def version_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def parse_if_match(value: Optional[str]) -> Optional[int]:
+    """
+    Version named by an If-Match header, or None when the header is absent
+    or "*". Only the strong version ETag ("v{version}") is accepted: If-Match
+    uses strong comparison, so a weak ETag (such as the one a conditional GET
+    returns) fails the precondition with 412. Raises 400 for anything else.
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match needs the strong ETag \"v{version}\""
+        )
+    if len(value) > 3 and value.startswith('"v') and value.endswith('"') and value[2:-1].isdigit():
+        return int(value[2:-1])
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid If-Match header"
+    )
+
+
+def version_conflict(current_version: int) -> HTTPException:
+    """Compact 409 carrying the current version so clients can retry cheaply"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={"code": "version_conflict", "version": current_version},
+        headers={"ETag": version_etag(current_version)}
+    )
+
+
+def content_etag(data) -> str:
+    """Strong ETag for a JSON-serializable payload"""
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha1(raw.encode()).hexdigest()[:16]}"'
+
+
+def _fingerprint(parts) -> str:
+    raw = "|".join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def weak_etag(*parts) -> str:
+    """Weak ETag over validator values (ids, counts, updated_at aggregates)"""
+    return f'W/"{_fingerprint(parts)}"'
+
+
+def versioned_weak_etag(version: int, *parts) -> str:
+    """Weak ETag that also names the version it was computed for"""
+    return f'W/"v{version}.{_fingerprint(parts)}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ETag against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
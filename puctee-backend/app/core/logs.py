@@ -0,0 +1,206 @@
+"""
+Structured, non-blocking logging
+
+configure_logging() routes every logger (uvicorn's included) through a
+queue: on the request path a log call only builds its message, copies the
+request context and enqueues the record. A listener thread does the JSON
+serialization, the redaction and the write to stderr.
+
+- Context: request_id (from X-Request-ID, generated if absent), user and
+  plan_id are bound per request by RequestContextMiddleware,
+  get_current_username and the plans router, and attached to every record
+  logged while the request runs
+- Structured fields: logger.info("Penalty approved", extra={"fields": {...}})
+- Sampling: with LOG_LEVEL=DEBUG, DEBUG records (per-device push logs and
+  the like) pass with probability LOG_DEBUG_SAMPLE_RATE
+- Redaction: APNs device tokens, JWTs, bearer credentials and fields named
+  like tokens, passwords or secrets are masked before anything is written
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+_context: ContextVar[Optional[dict]] = ContextVar("log_context", default=None)
+
+_REDACTIONS = [
+    (re.compile(r"\b[0-9a-fA-F]{64}\b"), "<device-token>"),
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+"), "<jwt>"),
+    (re.compile(r"(?i)\b(bearer\s+)\S+"), r"\1<redacted>"),
+]
+_SECRET_FIELD = re.compile(r"(?i)token|password|secret|authorization|api_key")
+_REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+
+
+def bind_log_context(**fields) -> None:
+    """Attach fields to every record logged for the rest of the current request (or task)"""
+    # A new dict each time: tasks spawned earlier keep the context they started with
+    _context.set({**(_context.get() or {}), **fields})
+
+
+def reset_log_context(**fields) -> None:
+    """Replace the inherited context, for worker tasks spawned by a request but serving many"""
+    _context.set(dict(fields) if fields else None)
+
+
+def get_log_context() -> dict:
+    return dict(_context.get() or {})
+
+
+async def bind_plan_log_context(request: Request) -> None:
+    """Router dependency binding the plan_id path parameter"""
+    plan_id = request.path_params.get("plan_id")
+    if plan_id is not None:
+        bind_log_context(plan_id=plan_id)
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _redact_fields(fields: dict) -> dict:
+    return {
+        key: "<redacted>" if _SECRET_FIELD.search(key) else redact(value) if isinstance(value, str) else value
+        for key, value in fields.items()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redact(record.getMessage()),
+        }
+        for extra in (getattr(record, "context", None), getattr(record, "fields", None)):
+            if extra:
+                entry.update(_redact_fields(extra))
+        if record.exc_text:
+            entry["exc"] = redact(record.exc_text)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extras = {**(getattr(record, "context", None) or {}), **(getattr(record, "fields", None) or {})}
+        if extras:
+            text += " [" + " ".join(f"{k}={v}" for k, v in _redact_fields(extras).items()) + "]"
+        return redact(text)
+
+
+class DebugSampler(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what has to happen on the calling thread: render the message,
+        # capture the traceback and snapshot the request context
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        context = _context.get()
+        record.context = dict(context) if context else None
+        return record
+
+
+class RequestContextMiddleware:
+    """Binds a request id (X-Request-ID or a new one) and echoes it on the response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode())]
+            await send(message)
+
+        token = _context.set({"request_id": request_id})
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _context.reset(token)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    debug_sample_rate: float = settings.LOG_DEBUG_SAMPLE_RATE,
+) -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level.upper())
+    # uvicorn installs its own handlers before importing the app
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,241 @@
+"""
+Event loop blocking detector (debug mode)
+
+CallbackTimer times every callback the event loop runs (asyncio's
+Handle._run). A watchdog thread looks at the callback in progress and, once
+it has run past the threshold, captures the loop thread's stack while it is
+still blocked, so the report points at the offending line (a sync boto3
+call, bcrypt, Pillow) rather than at whatever runs next.
+
+LoopBlockMonitor wraps it for the app: when LOOP_MONITOR_ENABLED is set,
+blocked callbacks are logged with their stack and recorded as
+puctee_event_loop_blocked_seconds, and loop lag (how late a periodic sleep
+wakes up) as puctee_event_loop_lag_seconds. It costs two clock reads per
+callback, so it is meant for debugging and load tests, not always-on use.
+
+Only asyncio's own event loop runs callbacks through Handle._run. uvicorn
+picks uvloop when it is installed (uvicorn[standard]), so run with
+--loop asyncio while the detector is on; under another loop the monitor
+logs an error and only measures lag.
+
+tests/loop_blocking.py uses the same timer to fail tests that block the loop.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = Histogram(
+    "puctee_event_loop_lag_seconds",
+    "Delay of the event loop in waking up a periodic timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+LOOP_BLOCKED = Histogram(
+    "puctee_event_loop_blocked_seconds",
+    "Event loop callbacks that ran longer than the blocking threshold",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+_EVENTS_FILE = os.path.join("asyncio", "events.py")
+
+
+@dataclass
+class BlockedCallback:
+    duration_s: float
+    callback: str
+    task: Optional[str]  # Task that was running, when the watchdog caught it
+    stack: Optional[str]  # None if the callback finished before the watchdog looked
+    at: datetime
+
+    def describe(self) -> str:
+        where = self.task or self.callback
+        text = f"Event loop blocked for {self.duration_s * 1000:.0f} ms by {where}"
+        return f"{text}\n{self.stack}" if self.stack else text
+
+
+def format_loop_stack(frame) -> str:
+    """Stack of a loop thread frame, without the event loop's own frames"""
+    entries = traceback.extract_stack(frame)
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index].filename.endswith(_EVENTS_FILE):
+            entries = entries[index + 1:]
+            break
+    return "".join(traceback.format_list(entries)).rstrip()
+
+
+def _describe_task(task: Optional[asyncio.Task]) -> Optional[str]:
+    if task is None:
+        return None
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', repr(coro))})"
+
+
+class CallbackTimer:
+    """Reports event loop callbacks running longer than threshold_s to on_block"""
+
+    def __init__(self, threshold_s: float, on_block: Callable[[BlockedCallback], None]):
+        self.threshold_s = threshold_s
+        self.on_block = on_block
+        # thread id -> [started, handle, task, stack] of the callback running there
+        self._running: Dict[int, list] = {}
+        self._original_run = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def install(self) -> None:
+        if self._original_run is not None:
+            return
+        original_run = self._original_run = asyncio.events.Handle._run
+        running = self._running
+        timer = self
+
+        def _run(handle):
+            thread_id = threading.get_ident()
+            slot = [time.perf_counter(), handle, None, None]
+            running[thread_id] = slot
+            try:
+                original_run(handle)
+            finally:
+                duration = time.perf_counter() - slot[0]
+                running.pop(thread_id, None)
+                if duration > timer.threshold_s:
+                    timer._report(duration, slot)
+
+        asyncio.events.Handle._run = _run
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def uninstall(self) -> None:
+        if self._original_run is None:
+            return
+        asyncio.events.Handle._run = self._original_run
+        self._original_run = None
+        self._stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+
+    def __enter__(self) -> "CallbackTimer":
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.uninstall()
+
+    def _watch(self) -> None:
+        poll_s = max(self.threshold_s / 4, 0.005)
+        while not self._stop.wait(poll_s):
+            now = time.perf_counter()
+            frames = None
+            for thread_id, slot in list(self._running.items()):
+                if slot[3] is not None or now - slot[0] <= self.threshold_s:
+                    continue
+                frames = frames or sys._current_frames()
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    slot[2] = _describe_task(asyncio.current_task(slot[1]._loop))
+                    slot[3] = format_loop_stack(frame)
+
+    def _report(self, duration: float, slot: list) -> None:
+        _, handle, task, stack = slot
+        try:
+            self.on_block(BlockedCallback(
+                duration_s=duration,
+                callback=repr(handle),
+                task=task,
+                stack=stack,
+                at=datetime.now(timezone.utc),
+            ))
+        except Exception as e:
+            logger.error(f"Loop block handler failed: {str(e)}", exc_info=True)
+
+
+class LoopBlockMonitor:
+    def __init__(self, threshold_s: float, lag_interval_s: float, keep: int = 20):
+        self.threshold_s = threshold_s
+        self.lag_interval_s = lag_interval_s
+        self._timer = CallbackTimer(threshold_s, self._on_block)
+        self._task: Optional[asyncio.Task] = None
+        self.detecting = False  # Blocked callbacks are only seen on asyncio's own loop
+
+        # Metrics (per worker process)
+        self.blocked = 0
+        self.max_blocked_s = 0.0
+        self.recent: deque = deque(maxlen=keep)
+
+    def _on_block(self, blocked: BlockedCallback) -> None:
+        self.blocked += 1
+        self.max_blocked_s = max(self.max_blocked_s, blocked.duration_s)
+        self.recent.append(blocked)
+        LOOP_BLOCKED.observe(blocked.duration_s)
+        logger.warning(blocked.describe())
+
+    async def _measure_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval_s
+            await asyncio.sleep(self.lag_interval_s)
+            LOOP_LAG.observe(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            if isinstance(loop, asyncio.BaseEventLoop):
+                self._timer.install()
+                self.detecting = True
+                logger.info(f"Event loop blocking detector on (threshold {self.threshold_s * 1000:.0f} ms)")
+            else:
+                logger.error(
+                    f"Event loop blocking detector needs asyncio's event loop, not {type(loop).__module__}."
+                    f"{type(loop).__name__}; start uvicorn with --loop asyncio. Only measuring loop lag"
+                )
+            self._task = asyncio.create_task(self._measure_lag())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._timer.uninstall()
+            self.detecting = False
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "detecting_blocks": self.detecting,
+            "threshold_ms": self.threshold_s * 1000,
+            "blocked": self.blocked,
+            "max_blocked_ms": round(self.max_blocked_s * 1000, 1),
+            "recent": [
+                {"at": b.at.isoformat(), "duration_ms": round(b.duration_s * 1000, 1), "task": b.task, "stack": b.stack}
+                for b in self.recent
+            ],
+        }
+
+
+loop_monitor = LoopBlockMonitor(
+    threshold_s=settings.LOOP_BLOCK_THRESHOLD_SECONDS,
+    lag_interval_s=settings.LOOP_LAG_INTERVAL_SECONDS,
+)
+
+
+def blocked_callbacks(threshold_s: float) -> Tuple[CallbackTimer, List[BlockedCallback]]:
+    """Timer collecting blocked callbacks into a list (used by the pytest plugin)"""
+    blocked: List[BlockedCallback] = []
+    return CallbackTimer(threshold_s, blocked.append), blocked
@@ -0,0 +1,263 @@
+"""
+Prometheus metrics (per worker process)
+
+A minimal in-process registry rendered in the Prometheus text format at
+GET /metrics. Observations are a bisect and two additions on plain lists,
+so instrumenting hot paths costs next to nothing; there is no background
+work and nothing is exported unless /metrics is scraped.
+
+- puctee_http_request_duration_seconds{method,route,status}: per route
+  template (not raw path), recorded by MetricsMiddleware
+- puctee_dependency_duration_seconds{dependency,operation,outcome}: Postgres
+  (primary and replica) statements, APNs, S3, EventBridge and Secrets
+  Manager calls, recorded with track_dependency()
+- puctee_db_pool_checkout_wait_seconds{pool}: time to get a pooled
+  connection from the primary or replica pool; pool usage, ping latency and
+  pool events alongside it (see app/db/pool.py)
+- puctee_location_*, puctee_arrival_queue_*, puctee_plan_cache_* and
+  puctee_singleflight_*: counters and gauges of the location ingestor,
+  arrival coalescer, plan cache and single-flight groups, read from the
+  components at scrape time
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; dense below 100ms where most requests and queries land
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        registry.register(self)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def snapshot(self, *labelvalues: str) -> dict:
+        """Count, sum and non-cumulative bucket counts of one series"""
+        counts, total, count = self._series.get(labelvalues, [[0] * (len(self.buckets) + 1), 0.0, 0])
+        return {"count": count, "sum": total, "buckets": list(counts)}
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames, labelvalues, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        registry.register(self)
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class GaugeFunc:
+    """
+    Gauge whose value is read from a callback at scrape time. With labelnames,
+    the callback returns {label values tuple: value}.
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], float],
+        labelnames: Sequence[str] = (),
+        registry: MetricsRegistry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        try:
+            values = self.callback() if self.labelnames else {(): self.callback()}
+            for labelvalues, value in sorted(values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        except Exception:
+            pass
+        return lines
+
+
+class CounterFunc(GaugeFunc):
+    """Counter kept by a component (a running total of its own), read at scrape time"""
+
+    type = "counter"
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "puctee_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+
+DEPENDENCY_DURATION = Histogram(
+    "puctee_dependency_duration_seconds",
+    "Latency of calls to external dependencies",
+    ("dependency", "operation", "outcome"),
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "puctee_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ("pool",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+DB_POOL_PING = Histogram(
+    "puctee_db_pool_ping_seconds",
+    "Liveness pings of pooled connections at checkout",
+    ("pool", "outcome"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0),
+)
+
+DB_POOL_EVENTS = Counter(
+    "puctee_db_pool_events_total",
+    "Connection pool events: connect, overflow, timeout, invalidate, ping_failed",
+    ("pool", "event"),
+)
+
+
+@contextmanager
+def track_dependency(dependency: str, operation: str):
+    """Record the latency of one external call, labelled ok or error"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        DEPENDENCY_DURATION.observe(time.perf_counter() - started, dependency, operation, outcome)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording HTTP_REQUEST_DURATION per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Set by the router once a route matched; raw paths would explode label cardinality
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, scope["method"], template, str(status_code)
+            )
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
@@ -0,0 +1,219 @@
+"""
+On-demand sampling profiler for live requests
+
+A request is profiled when it carries `X-Profile-Key: <PROFILER_API_KEY>` or
+is picked by PROFILER_SAMPLE_RATE. While it runs, a background thread
+samples its wall-clock stack every PROFILER_INTERVAL_MS:
+
+- if the request's task is running, the loop thread's real stack
+- if it is suspended, its await chain (coroutine -> awaited coroutine ->
+  ...), so time spent waiting on asyncpg, Redis or APNs shows up under the
+  call that awaited it
+
+Samples are written as collapsed stacks (`frame;frame;frame count`, one
+sample = one interval), readable by flamegraph.pl, speedscope or inferno,
+to PROFILER_OUTPUT_DIR, which keeps at most PROFILER_MAX_FILES profiles.
+Header-triggered responses carry X-Profile-Id, the prefix of the file name.
+
+The middleware is only installed when a key or a sample rate is configured,
+and the sampler thread only runs while a profiled request is in flight, so
+there is no overhead when profiling is off.
+"""
+import asyncio
+import hmac
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as SampleCounter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-key"
+
+PROFILED_REQUESTS = Counter(
+    "puctee_profiled_requests_total",
+    "Requests profiled by the sampling profiler",
+    ("trigger",),
+)
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}".replace(";", ",")
+
+
+def _running_stack(frame) -> List[tuple]:
+    """(code, label) of a thread's frames, outermost first"""
+    stack = []
+    while frame is not None:
+        stack.append((frame.f_code, _label(frame)))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _awaiting_stack(awaitable) -> List[tuple]:
+    """(code, label) along a suspended coroutine's await chain, outermost first"""
+    stack = []
+    while awaitable is not None:
+        if isinstance(awaitable, asyncio.Task):
+            awaitable = awaitable.get_coro()
+            continue
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            break  # A future: the last frame is the call waiting on I/O
+        stack.append((frame.f_code, _label(frame)))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return stack
+
+
+class RequestProfile:
+    def __init__(self, task: asyncio.Task, root_code):
+        self.id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.root_code = root_code  # Frames above it (server, middleware) are dropped
+        self.samples: SampleCounter = SampleCounter()
+
+    def sample(self, frames: Dict[int, object]) -> None:
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _running_stack(frames.get(self.thread_id))
+        else:
+            stack = _awaiting_stack(self.task.get_coro())
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index][0] is self.root_code:
+                stack = stack[index + 1:]
+                break
+        if stack:
+            self.samples[";".join(label for _, label in stack)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class StackSampler:
+    """Samples every registered profile; the thread exits when none is left"""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._profiles: Dict[str, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.pop(profile.id, None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_s)
+            with self._lock:
+                profiles = list(self._profiles.values())
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                try:
+                    profile.sample(frames)
+                except Exception:
+                    # The task may finish while its await chain is being walked
+                    pass
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+
+def write_profile(output_dir: Path, name: str, collapsed: str, max_files: int) -> Path:
+    """Write one profile and drop the oldest ones beyond max_files"""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / name
+    path.write_text(collapsed)
+    profiles = sorted(output_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[:max(0, len(profiles) - max_files)]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return path
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app,
+        api_key: str = settings.PROFILER_API_KEY,
+        sample_rate: float = settings.PROFILER_SAMPLE_RATE,
+        output_dir: str = settings.PROFILER_OUTPUT_DIR,
+        max_files: int = settings.PROFILER_MAX_FILES,
+        interval_ms: float = settings.PROFILER_INTERVAL_MS,
+    ):
+        self.app = app
+        self.api_key = api_key.encode()
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.max_files = max_files
+        self.sampler = StackSampler(interval_ms / 1000)
+
+    def _trigger(self, scope) -> Optional[str]:
+        if self.api_key:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER:
+                    return "header" if hmac.compare_digest(value, self.api_key) else None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(asyncio.current_task(), ProfilingMiddleware.__call__.__code__)
+
+        async def send_wrapper(message):
+            if trigger == "header" and message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        started = time.perf_counter()
+        self.sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.remove(profile)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        PROFILED_REQUESTS.inc(trigger)
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        name = f"{profile.id}-{scope['method']}-{_slug(route)}-{elapsed_ms:.0f}ms.folded"
+        try:
+            path = await asyncio.to_thread(write_profile, self.output_dir, name, profile.collapsed(), self.max_files)
+            logger.info(f"Profiled {scope['method']} {route} ({elapsed_ms:.0f} ms): {path}")
+        except OSError as e:
+            logger.error(f"Failed to write profile {name}: {str(e)}")
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.PROFILER_API_KEY) or settings.PROFILER_SAMPLE_RATE > 0
@@ -1,10 +1,9 @@
-import boto3
-from botocore.exceptions import ClientError
-from PIL import Image
 import io
 from fastapi import HTTPException, UploadFile
 from app.core.config import settings
+from app.core.metrics import track_dependency
 from anyio import to_thread
+from functools import lru_cache
 import mimetypes
 import logging
 import os
@@ -15,15 +14,19 @@ _IS_LAMBDA = "AWS_LAMBDA_FUNCTION_NAME" in os.environ
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-if _IS_LAMBDA:
-    # Use Lambda execution role permissions (don't pass keys)
-    s3_client = boto3.client(
-        "s3",
-        region_name=settings.AWS_REGION,
-    )
-else:
+@lru_cache()
+def get_s3_client():
+    """S3 client, created on first use (blocking: call it from a worker thread)"""
+    import boto3
+
+    if _IS_LAMBDA:
+        # Use Lambda execution role permissions (don't pass keys)
+        return boto3.client(
+            "s3",
+            region_name=settings.AWS_REGION,
+        )
     # For local development, pass explicitly via settings
-    s3_client = boto3.client(
+    return boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
@@ -37,6 +40,8 @@ async def compress_image(file: UploadFile, max_size=(800,800)) -> bytes:
     
     # Execute heavy Pillow processing in thread pool
     def _sync_compress(data: bytes) -> bytes:
+        from PIL import Image
+
         img = Image.open(io.BytesIO(data))
         img.thumbnail(max_size, Image.Resampling.LANCZOS)
         buf = io.BytesIO()
@@ -48,6 +53,8 @@ async def compress_image(file: UploadFile, max_size=(800,800)) -> bytes:
 
 async def upload_to_s3(file: UploadFile, user_id: int) -> str:
     """Upload image to S3"""
+    from botocore.exceptions import ClientError  # botocore loads on first upload, not at app import
+
     try:
         # Compress image
         compressed_image = await compress_image(file)
@@ -60,42 +67,42 @@ async def upload_to_s3(file: UploadFile, user_id: int) -> str:
         content_type = file.content_type or mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
         
         # Upload to S3
-        await to_thread.run_sync(lambda: s3_client.put_object(
-            Bucket=settings.AWS_S3_BUCKET,
-            Key=s3_key,
-            Body=compressed_image,
-            ContentType=content_type,
-        ))
+        with track_dependency("s3", "put_object"):
+            await to_thread.run_sync(lambda: get_s3_client().put_object(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=s3_key,
+                Body=compressed_image,
+                ContentType=content_type,
+            ))
         return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
     except ClientError as e:
         logger.exception("S3 upload failed")
-        print(e.response['Error']['Message'])
         # return a detailed FastAPI error:
         raise HTTPException(status_code=502, detail=f"S3 error: {e.response['Error']['Message']}")
     except Exception:
         logger.exception("Unexpected processing error")
-        print("Unexpected processing error")
         raise HTTPException(status_code=500, detail="Image processing or internal error")
 
 async def upload_proof_image_to_s3(image_data: bytes, user_id: int, request_id: int) -> str:
     """Upload proof image data to S3 for penalty approval requests"""
+    from botocore.exceptions import ClientError
+
     try:
         # Create S3 key for proof images
         s3_key = f"penalty_proof_images/{user_id}_{request_id}.jpg"
         
         # Upload to S3
-        await to_thread.run_sync(lambda: s3_client.put_object(
-            Bucket=settings.AWS_S3_BUCKET,
-            Key=s3_key,
-            Body=image_data,
-            ContentType="image/jpeg",
-        ))
+        with track_dependency("s3", "put_object"):
+            await to_thread.run_sync(lambda: get_s3_client().put_object(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=s3_key,
+                Body=image_data,
+                ContentType="image/jpeg",
+            ))
         return f"https://{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/{s3_key}"
     except ClientError as e:
         logger.exception("S3 proof image upload failed")
-        print(e.response['Error']['Message'])
         raise HTTPException(status_code=502, detail=f"S3 error: {e.response['Error']['Message']}")
     except Exception:
         logger.exception("Unexpected proof image processing error")
-        print("Unexpected proof image processing error")
         raise HTTPException(status_code=500, detail="Proof image processing or internal error")
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+In-process single-flight for identical concurrent reads
+
+When many clients ask for the same thing at the same moment (every
+participant opening a plan at its start time), the first caller for a key
+runs the query and every caller that arrives while it is in flight awaits
+the same result instead of issuing its own.
+
+Keys must only contain what the result depends on, and callers must have
+been authorized before joining a flight: the shared result is handed to
+every waiter as is, so coalesced functions should return plain values
+(rows, dicts), not ORM objects bound to the leader's session.
+
+Usable as a decorator:
+
+    @single_flight("plans.participants", key=lambda db, plan_id: plan_id)
+    async def load_participants(db, plan_id): ...
+
+or as a FastAPI dependency:
+
+    flight: SingleFlight = Depends(single_flight_group("plans.locations"))
+    rows = await flight.do((plan_id, cursor), lambda: run_query())
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import CounterFunc, GaugeFunc
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+        # Metrics (per worker process)
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                return await self._lead(key, fn)
+            self.coalesced += 1
+            try:
+                # Shielded: a waiter that goes away must not cancel the shared result
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leader was cancelled (client disconnected): run it again,
+                # possibly as the new leader
+                self.coalesced -= 1
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        # Waiters may all be gone by the time the result is set
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.errors += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+            "errors": self.errors,
+        }
+
+
+_groups: Dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Group shared by every caller using the same name (one per endpoint)"""
+    group = _groups.get(name)
+    if group is None:
+        group = _groups[name] = SingleFlight(name)
+    return group
+
+
+def single_flight_group(name: str) -> Callable[[], SingleFlight]:
+    """FastAPI dependency providing the named group"""
+    group = get_single_flight(name)
+
+    def dependency() -> SingleFlight:
+        return group
+
+    return dependency
+
+
+def single_flight(name: str, key: Callable[..., Hashable]):
+    """Coalesce concurrent calls of an async function whose key(*args, **kwargs) is equal"""
+    group = get_single_flight(name)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await group.do(key(*args, **kwargs), lambda: fn(*args, **kwargs))
+        return wrapper
+
+    return decorator
+
+
+def _per_group(read: Callable[[SingleFlight], float]) -> Callable[[], Dict[tuple, float]]:
+    return lambda: {(name, ): read(group) for name, group in _groups.items()}
+
+
+CounterFunc("puctee_singleflight_calls_total", "Calls per single-flight group", _per_group(lambda g: g.calls), ("group",))
+CounterFunc(
+    "puctee_singleflight_executions_total", "Calls that ran the function", _per_group(lambda g: g.executions), ("group",)
+)
+CounterFunc(
+    "puctee_singleflight_coalesced_total", "Calls that awaited a running execution instead",
+    _per_group(lambda g: g.coalesced), ("group",),
+)
+CounterFunc("puctee_singleflight_errors_total", "Executions that raised", _per_group(lambda g: g.errors), ("group",))
+GaugeFunc(
+    "puctee_singleflight_in_flight", "Keys with an execution running", _per_group(lambda g: len(g._inflight)), ("group",)
+)
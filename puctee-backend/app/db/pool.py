@@ -0,0 +1,189 @@
+"""
+Connection pool sizing, liveness and telemetry
+
+Sizing (DB_POOL_SIZING):
+- fixed: the hand-tuned numbers (3 + 5 overflow in production, 2 + 3 locally)
+- auto: derived from the worker processes sharing pgbouncer and its limits.
+  In transaction mode pgbouncer runs at most PGBOUNCER_POOL_SIZE queries at a
+  time, so the workers' steady pools together match it; overflow lets bursts
+  queue in pgbouncer rather than in the app, without the workers together
+  exceeding PGBOUNCER_MAX_CLIENT_CONN minus PGBOUNCER_RESERVED_CONNECTIONS
+
+Liveness (DB_POOL_LIVENESS; default pre_ping in production, none locally):
+- pre_ping: a round trip on every checkout (SQLAlchemy pool_pre_ping)
+- idle_ping: only connections idle in the pool longer than
+  DB_POOL_PING_IDLE_SECONDS are pinged; a failed ping discards the connection
+  and the checkout retries with a fresh one. Connections to pgbouncer stay
+  up while it recycles server connections behind them, so busy connections
+  rarely need checking
+- none: no ping; pool_recycle and SQLAlchemy's disconnect handling (the
+  failing statement errors, the pool is invalidated) only
+
+Telemetry per pool (primary, replica): checkout wait, connections in use,
+idle and in overflow, ping latency, and connect / overflow / timeout /
+invalidate / ping_failed events.
+"""
+import logging
+import os
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_EVENTS, DB_POOL_PING, GaugeFunc
+
+logger = logging.getLogger(__name__)
+
+LIVENESS_MODES = ("pre_ping", "idle_ping", "none")
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Records checkout waits (queueing for a free slot, connecting, pinging), overflow and timeouts"""
+
+    pool_name = "primary"  # Metrics label, set per engine by instrument_pool
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        return pool
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_EVENTS.inc(self.pool_name, "timeout")
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, self.pool_name)
+
+    def _do_get(self):
+        # _overflow counts up from -pool_size; above 0 the new connection is an overflow one
+        overflow = self._overflow
+        connection = super()._do_get()
+        if self._overflow > max(overflow, 0):
+            DB_POOL_EVENTS.inc(self.pool_name, "overflow")
+        return connection
+
+
+def worker_count() -> int:
+    return settings.DB_POOL_WORKERS or int(os.getenv("WEB_CONCURRENCY", "1") or 1)
+
+
+def pool_dimensions(workers: int, pgbouncer_pool_size: int, max_client_conn: int, reserved: int) -> Tuple[int, int]:
+    """(pool_size, max_overflow) per worker for DB_POOL_SIZING=auto"""
+    workers = max(1, workers)
+    pool_size = max(1, pgbouncer_pool_size // workers)
+    connection_cap = max(1, (max_client_conn - reserved) // workers)
+    pool_size = min(pool_size, connection_cap)
+    max_overflow = max(0, min(pool_size, connection_cap - pool_size))
+    return pool_size, max_overflow
+
+
+def pool_settings(is_production: bool) -> Dict[str, object]:
+    """pool_size, max_overflow and pre-ping arguments for create_async_engine"""
+    if settings.DB_POOL_SIZING == "auto":
+        pool_size, max_overflow = pool_dimensions(
+            worker_count(),
+            settings.PGBOUNCER_POOL_SIZE,
+            settings.PGBOUNCER_MAX_CLIENT_CONN,
+            settings.PGBOUNCER_RESERVED_CONNECTIONS,
+        )
+    elif is_production:
+        pool_size, max_overflow = 3, 5  # Small pool - pgbouncer does the real pooling
+    else:
+        pool_size, max_overflow = 2, 3
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_pre_ping": liveness_mode(is_production) == "pre_ping",
+    }
+
+
+def liveness_mode(is_production: bool) -> str:
+    mode = settings.DB_POOL_LIVENESS or ("pre_ping" if is_production else "none")
+    if mode not in LIVENESS_MODES:
+        raise ValueError(f"DB_POOL_LIVENESS must be one of {', '.join(LIVENESS_MODES)}, got {mode!r}")
+    return mode
+
+
+def idle_ping_checkout(ping: Callable, idle_s: float) -> Callable:
+    """Pool checkout listener pinging connections that sat idle longer than idle_s"""
+
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at <= idle_s:
+            return  # New or recently used
+        try:
+            alive = ping(dbapi_connection)
+        except Exception as e:
+            raise exc.DisconnectionError(f"Idle connection failed its ping: {e}") from e
+        if alive is False:
+            raise exc.DisconnectionError("Idle connection failed its ping")
+
+    return checkout
+
+
+def instrument_pool(engine, pool_name: str, is_production: bool) -> None:
+    """Label the engine's pool, time its pings and count its events"""
+    sync_engine = engine.sync_engine
+    sync_engine.pool.pool_name = pool_name
+    mode = liveness_mode(is_production)
+
+    # Both pre_ping and idle_ping go through the dialect's ping
+    dialect = sync_engine.dialect
+    do_ping = dialect.do_ping
+
+    def timed_ping(dbapi_connection):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            alive = do_ping(dbapi_connection)
+            outcome = "ok" if alive else "error"
+            return alive
+        finally:
+            DB_POOL_PING.observe(time.perf_counter() - started, pool_name, outcome)
+            if outcome == "error":
+                DB_POOL_EVENTS.inc(pool_name, "ping_failed")
+
+    dialect.do_ping = timed_ping
+
+    @event.listens_for(sync_engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        DB_POOL_EVENTS.inc(pool_name, "connect")
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        DB_POOL_EVENTS.inc(pool_name, "invalidate")
+
+    if mode == "idle_ping":
+        @event.listens_for(sync_engine, "checkin")
+        def _checkin(dbapi_connection, connection_record):
+            connection_record.info["checked_in_at"] = time.monotonic()
+
+        event.listen(sync_engine, "checkout", idle_ping_checkout(timed_ping, settings.DB_POOL_PING_IDLE_SECONDS))
+
+    pool = sync_engine.pool
+    logger.info(
+        f"Database pool {pool_name}: {pool.size()} connections + {pool._max_overflow} overflow, liveness {mode}"
+    )
+
+
+def register_pool_gauges(engines: Callable[[], Dict[str, object]]) -> None:
+    """Gauges over {pool name: engine}, read at scrape time"""
+
+    def gauge(read: Callable) -> Callable:
+        return lambda: {(name, ): read(engine.sync_engine.pool) for name, engine in engines().items()}
+
+    GaugeFunc("puctee_db_pool_size", "Configured size of the connection pool", gauge(lambda p: p.size()), ("pool",))
+    GaugeFunc(
+        "puctee_db_pool_checked_out", "Connections currently checked out of the pool",
+        gauge(lambda p: p.checkedout()), ("pool",),
+    )
+    GaugeFunc("puctee_db_pool_idle", "Connections idle in the pool", gauge(lambda p: p.checkedin()), ("pool",))
+    GaugeFunc(
+        "puctee_db_pool_overflow", "Overflow connections currently open beyond pool_size",
+        gauge(lambda p: max(0, p.overflow())), ("pool",),
+    )
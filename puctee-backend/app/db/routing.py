@@ -0,0 +1,253 @@
+"""
+Read-replica routing with read-your-writes
+
+Endpoints that only read take their session from get_read_db instead of
+get_db; that dependency is the route's read-only marker (declare it after
+get_current_username). The session goes to the replica (DATABASE_REPLICA_URL)
+unless:
+
+- the user wrote recently: after a request of theirs that used an unsafe
+  method on a route not marked read-only, or that ran a write statement on
+  the primary, their reads stay on the primary for
+  REPLICA_MAX_LAG_SECONDS + 2 * REPLICA_LAG_CHECK_INTERVAL_SECONDS. The pin
+  is recorded before the response is sent, so the user's next request can't
+  outrun it, and is shared through Redis when REDIS_URL is set
+- the replica is behind: its replay lag, measured every
+  REPLICA_LAG_CHECK_INTERVAL_SECONDS, is above REPLICA_MAX_LAG_SECONDS, or
+  the last measurement failed or is more than two intervals old
+
+The replica is only used while its lag is within the bound and pins outlast
+the bound, so users never read from before their own writes; other users'
+writes can show up to REPLICA_MAX_LAG_SECONDS late. Anything that shares
+results between requests must not mix the two: plan_cache always loads from
+the primary, and single-flight keys include read_target(db).
+
+Without DATABASE_REPLICA_URL, get_read_db is get_db and the middleware does
+nothing.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import Counter, GaugeFunc
+from app.db.redis import get_redis_client
+from app.db.session import AsyncSessionLocal, ReplicaSessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+_READ_VERBS = {"SELECT", "SHOW", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE"}
+
+# Seconds the replica is behind; NULL (unhealthy) when it isn't streaming
+REPLICA_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN (SELECT status FROM pg_stat_wal_receiver) IS DISTINCT FROM 'streaming' THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+READ_ROUTING = Counter(
+    "puctee_db_read_routing_total",
+    "Sessions handed out to read-only endpoints, by target and reason",
+    ("target", "reason"),
+)
+
+# Per request: who is calling, whether they wrote, whether the route is read-only
+_request: ContextVar[Optional[dict]] = ContextVar("db_routing_request", default=None)
+
+
+def _pin_key(username: str) -> str:
+    return f"db:pin:{username}"
+
+
+def note_request_user(username: str) -> None:
+    """Called by get_current_username"""
+    state = _request.get()
+    if state is not None:
+        state["user"] = username
+
+
+def _is_write(statement: str) -> bool:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb not in _READ_VERBS
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _note_write(conn, cursor, statement, parameters, context, executemany):
+    state = _request.get()
+    if state is not None and not state["wrote"] and _is_write(statement):
+        state["wrote"] = True
+
+
+class ReplicaRouter:
+    def __init__(self, replica_sessions, max_lag_s: float, check_interval_s: float, shared: bool):
+        self.replica_sessions = replica_sessions
+        self.max_lag_s = max_lag_s
+        self.check_interval_s = check_interval_s
+        # Outlasts the worst lag the replica can have while it is still used
+        self.pin_s = max_lag_s + 2 * check_interval_s
+        self.shared = shared  # Pins in Redis, seen by every worker
+        self._pins: Dict[str, float] = {}  # username -> monotonic expiry (this process)
+        self._task: Optional[asyncio.Task] = None
+
+        # Last lag measurement
+        self.lag_s: Optional[float] = None
+        self.checked_at: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica_sessions is not None
+
+    def replica_fresh(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return (
+            self.lag_s is not None
+            and self.lag_s <= self.max_lag_s
+            and self.checked_at is not None
+            and now - self.checked_at <= 2 * self.check_interval_s
+        )
+
+    async def pin(self, username: str) -> None:
+        now = time.monotonic()
+        self._pins[username] = now + self.pin_s
+        if len(self._pins) > 10000:
+            self._pins = {user: expiry for user, expiry in self._pins.items() if expiry > now}
+        if self.shared:
+            try:
+                redis = await get_redis_client().connect()
+                await redis.set(_pin_key(username), 1, px=int(self.pin_s * 1000))
+            except Exception as e:
+                # Still pinned in this process; other workers may serve a stale read
+                logger.error(f"Failed to share read-your-writes pin for {username}: {str(e)}")
+
+    async def is_pinned(self, username: str) -> bool:
+        expiry = self._pins.get(username)
+        if expiry is not None:
+            if expiry > time.monotonic():
+                return True
+            del self._pins[username]
+        if not self.shared:
+            return False
+        try:
+            redis = await get_redis_client().connect()
+            return bool(await redis.exists(_pin_key(username)))
+        except Exception as e:
+            logger.warning(f"Read-your-writes pin lookup failed for {username}: {str(e)}")
+            return True  # Unknown: stay correct
+
+    async def choose(self, username: Optional[str]) -> Tuple[str, str]:
+        """("replica" | "primary", reason) for a read-only session"""
+        if not self.enabled:
+            return "primary", "no_replica"
+        if username is None:
+            return "primary", "unknown_user"
+        if not self.replica_fresh():
+            return "primary", "replica_lag"
+        if await self.is_pinned(username):
+            return "primary", "recent_write"
+        return "replica", "ok"
+
+    async def check_lag(self) -> None:
+        try:
+            async with self.replica_sessions() as session:
+                lag = (await asyncio.wait_for(session.execute(REPLICA_LAG_QUERY), self.check_interval_s)).scalar()
+        except Exception as e:
+            self.lag_s = None
+            logger.warning(f"Replica lag check failed: {str(e)}")
+            return
+        previous = self.lag_s
+        self.lag_s = float(lag) if lag is not None else None
+        self.checked_at = time.monotonic()
+        if not self.replica_fresh() and (previous is not None and previous <= self.max_lag_s):
+            logger.warning(f"Replica lag {self.lag_s}s over {self.max_lag_s}s, reads go to the primary")
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(self.check_interval_s)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Read replica routing on (max lag {self.max_lag_s}s)")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+replica_router = ReplicaRouter(
+    ReplicaSessionLocal,
+    max_lag_s=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval_s=settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    shared=bool(settings.REDIS_URL),
+)
+
+GaugeFunc("puctee_db_replica_lag_seconds", "Last measured replay lag of the read replica", lambda: replica_router.lag_s)
+
+
+async def get_read_db():
+    """Session for a read-only endpoint: the replica when it is safe, else the primary"""
+    state = _request.get()
+    if state is not None:
+        state["read_only"] = True
+    target, reason = await replica_router.choose(state["user"] if state is not None else None)
+    READ_ROUTING.inc(target, reason)
+    sessions = replica_router.replica_sessions if target == "replica" else AsyncSessionLocal
+    async with sessions() as session:
+        session.info["read_target"] = target
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+def read_target(db: AsyncSession) -> str:
+    return db.info.get("read_target", "primary")
+
+
+class ReadYourWritesMiddleware:
+    """Pins the caller to the primary after a write, before the response goes out"""
+
+    def __init__(self, app, router: ReplicaRouter = replica_router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"user": None, "wrote": False, "read_only": False, "pinned": False}
+        unsafe = scope["method"] in UNSAFE_METHODS
+
+        async def pin_if_written():
+            if state["user"] and not state["pinned"] and (state["wrote"] or (unsafe and not state["read_only"])):
+                state["pinned"] = True
+                await self.router.pin(state["user"])
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                await pin_if_written()
+            await send(message)
+
+        token = _request.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Errors answered further out, and writes made by background tasks
+            await pin_if_written()
+            _request.reset(token)
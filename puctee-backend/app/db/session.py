@@ -1,37 +1,40 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.metrics import DEPENDENCY_DURATION
+from app.db.pool import InstrumentedQueuePool, instrument_pool, pool_settings, register_pool_gauges
 import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-# Ensure we use asyncpg driver for async operations
-url = settings.DATABASE_URL
-if url.startswith("postgresql://"):
-    url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
-    logger.info(f"Converted DATABASE_URL to use asyncpg driver")
-elif url.startswith("postgresql+asyncpg://"):
-    logger.info(f"DATABASE_URL already uses asyncpg driver")
-else:
-    logger.warning(f"DATABASE_URL has unexpected format: {url[:20]}...")
+def _asyncpg_url(url: str) -> str:
+    # Ensure we use asyncpg driver for async operations
+    if url.startswith("postgresql://"):
+        logger.info(f"Converted DATABASE_URL to use asyncpg driver")
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgresql+asyncpg://"):
+        logger.info(f"DATABASE_URL already uses asyncpg driver")
+    else:
+        logger.warning(f"DATABASE_URL has unexpected format: {url[:20]}...")
+    return url
 
-# Railway environment detection
-is_production = os.getenv("ENVIRONMENT") == "production"
 
-if "localhost" in url:
-    # Disable SSL for local development
-    connect_args = {
-        "prepared_statement_cache_size": 0,
-        "statement_cache_size": 0
-    }
-else:
+def _connect_args(url: str) -> dict:
+    if "localhost" in url:
+        # Disable SSL for local development
+        return {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0
+        }
     # Railway/Supabase connection pooling (pgbouncer) in Transaction Mode
     # CRITICAL: pgbouncer in transaction mode does NOT support:
     # - Prepared statements (must disable both caches)
     # - Server-side cursors
     # - Advisory locks
-    connect_args = {
+    return {
         "ssl": "require",
         "prepared_statement_cache_size": 0,
         "statement_cache_size": 0,  # Disable statement cache completely
@@ -40,39 +43,78 @@ else:
         }
     }
 
-# Optimize for Railway with pgbouncer Transaction Mode
-# Transaction Mode: Each transaction gets a new connection from the pool
-# Best practices:
-# - Keep pool_size small (pgbouncer handles the real pooling)
-# - Use pool_pre_ping to detect stale connections
-# - Recycle connections frequently to avoid state issues
-# - Use pool_reset_on_return to ensure clean state
-if is_production:
-    engine = create_async_engine(
-        url,
-        echo=False,
-        future=True,
-        connect_args=connect_args,
-        pool_pre_ping=True,  # CRITICAL: Detect stale connections before use
-        pool_size=3,  # Small pool - pgbouncer does the real pooling
-        max_overflow=5,  # Limited overflow for burst traffic
-        pool_timeout=30,
-        pool_recycle=300,  # Recycle every 5 minutes (aggressive for transaction mode)
-        pool_reset_on_return="rollback"  # Ensure clean state between requests
-    )
-else:
-    # Local development with similar settings
+
+# Railway environment detection
+is_production = os.getenv("ENVIRONMENT") == "production"
+
+
+# Statement latency per verb (label values stay bounded, unlike raw SQL)
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def _sql_operation(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in _SQL_OPERATIONS else "OTHER"
+
+
+def _instrument(engine, dependency: str) -> None:
+    """Statement latency as DEPENDENCY_DURATION(dependency, verb, outcome)"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DEPENDENCY_DURATION.observe(time.perf_counter() - started, dependency, _sql_operation(statement), "ok")
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        started = conn.info.get("query_started") if conn is not None else None
+        if started and exception_context.statement is not None:
+            DEPENDENCY_DURATION.observe(
+                time.perf_counter() - started.pop(), dependency, _sql_operation(exception_context.statement), "error"
+            )
+
+
+def _create_engine(database_url: str, pool_name: str, dependency: str):
+    url = _asyncpg_url(database_url)
+    # Optimize for Railway with pgbouncer Transaction Mode
+    # Transaction Mode: Each transaction gets a new connection from the pool
+    # Best practices:
+    # - Keep pool_size small (pgbouncer handles the real pooling; DB_POOL_SIZING=auto
+    #   derives it from the worker count and pgbouncer's limits)
+    # - Detect stale connections (DB_POOL_LIVENESS: pre_ping, idle_ping or none)
+    # - Recycle connections frequently to avoid state issues
+    # - Use pool_reset_on_return to ensure clean state
     engine = create_async_engine(
         url,
         echo=False,
         future=True,
-        connect_args=connect_args,
-        pool_size=2,
-        max_overflow=3,
+        connect_args=_connect_args(url),
+        poolclass=InstrumentedQueuePool,
         pool_timeout=30,
-        pool_recycle=3600,
-        pool_reset_on_return="rollback"
+        # Recycle every 5 minutes in production (aggressive for transaction mode)
+        pool_recycle=300 if is_production else 3600,
+        pool_reset_on_return="rollback",  # Ensure clean state between requests
+        **pool_settings(is_production),
     )
+    instrument_pool(engine, pool_name, is_production)
+    _instrument(engine, dependency)
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary", "postgres")
+
+# Optional streaming replica for read-only endpoints, see app/db/routing.py
+replica_engine = (
+    _create_engine(settings.DATABASE_REPLICA_URL, "replica", "postgres_replica")
+    if settings.DATABASE_REPLICA_URL else None
+)
+
+register_pool_gauges(lambda: {"primary": engine, "replica": replica_engine} if replica_engine else {"primary": engine})
 
 AsyncSessionLocal = sessionmaker(
     engine,
@@ -82,6 +124,14 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
+ReplicaSessionLocal = sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if replica_engine is not None else None
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -1,12 +1,45 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from typing import Optional
 from contextlib import asynccontextmanager
-from app.api.routers import auth, users, friends, notifications, invite, scheduler
+import asyncio
+from app.api.routers import auth, users, friends, notifications, invite, scheduler, home, sync
 from app.api.routers.plans import router as plans_router
+from app.services.location_ingestion import location_ingestor
+from app.services.location_history import location_history_maintainer
+from app.services.arrival_queue import arrival_coalescer
+from app.services.change_feed import change_log_pruner
+from app.db.redis import get_redis_client
+from app.core.config import settings
+from app.services.external_clients import warm_external_clients
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.loop_monitor import loop_monitor
+from app.core.profiler import ProfilingMiddleware, profiling_enabled
+from app.core.logs import RequestContextMiddleware, configure_logging
+from app.db.routing import ReadYourWritesMiddleware, replica_router
+
+configure_logging()  # Queue-based JSON logging for every logger, uvicorn's included
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()  # Log callbacks that block the event loop
+    location_ingestor.start()  # Periodically flush buffered location points
+    location_history_maintainer.start()  # Partition upkeep, compaction and retention
+    change_log_pruner.start()  # Drop change_log rows past the sync retention
+    replica_router.start()  # Replica lag checks, when DATABASE_REPLICA_URL is set
+    if settings.WARM_EXTERNAL_CLIENTS:
+        # APNs/S3/EventBridge clients are lazy; warm them without delaying startup
+        app.state.client_warmup = asyncio.create_task(warm_external_clients())
     yield  # API server is now running
+    await arrival_coalescer.stop()  # Finish queued arrival checks
+    await change_log_pruner.stop()
+    await location_history_maintainer.stop()
+    await location_ingestor.stop()
+    await replica_router.stop()
+    await get_redis_client().close()
+    await loop_monitor.stop()
 
 app = FastAPI(
     title="Puctee API",
@@ -24,12 +57,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Pins users to the primary after their writes (no-op without a replica)
+app.add_middleware(ReadYourWritesMiddleware)
+
+# Sampling profiler, only installed when configured
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency histograms (added last so it also times CORS handling)
+app.add_middleware(MetricsMiddleware)
+
+# Request id for every log record (outermost, so everything below logs with it)
+app.add_middleware(RequestContextMiddleware)
+
 # Register routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(friends.router, prefix="/api/friends", tags=["friends"])
 app.include_router(plans_router, prefix="/api/plans", tags=["plans"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["notifications"])
+app.include_router(home.router, prefix="/api/home", tags=["home"])
+app.include_router(sync.router, prefix="/api/sync", tags=["sync"])
 app.include_router(invite.router, tags=["invite"])
 app.include_router(scheduler.router, prefix="/api")
 
@@ -39,4 +87,14 @@ async def root():
 
 @app.get("/health")
 def health():
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(x_api_key: Optional[str] = Header(None, alias="X-API-Key")):
+    """Prometheus scrape endpoint"""
+    if settings.METRICS_API_KEY and x_api_key != settings.METRICS_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing API key"
+        )
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
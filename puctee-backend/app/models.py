@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Table, JSON, Text
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, DateTime, ForeignKey, Float, Index, Table, JSON, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -90,12 +90,16 @@ class Plan(Base):
     status = Column(String, default="upcoming")  # upcoming, ongoing, completed, cancelled
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, server_default="1")  # Bumped on every write, see If-Match on PUT
 
     participants = relationship("User", secondary=plan_participants, back_populates="plans")
     invites = relationship("PlanInvite", back_populates="plan")
     locations = relationship("Location", back_populates="plan")
     penalties = relationship("Penalty", back_populates="plan")
 
+    # ORM flushes become UPDATE ... WHERE version = :loaded_version
+    __mapper_args__ = {"version_id_col": version}
+
 class PlanInvite(Base):
     __tablename__ = "plan_invites"
 
@@ -143,6 +147,7 @@ class PenaltyApprovalRequest(Base):
     approver_user = relationship("User", foreign_keys=[approver_user_id])
 
 class Location(Base):
+    """Plan destination (one row per plan). Shared GPS points live in location_points."""
     __tablename__ = "locations"
 
     id = Column(Integer, primary_key=True, index=True)
@@ -157,6 +162,39 @@ class Location(Base):
     plan = relationship("Plan", back_populates="locations")
     user = relationship("User", back_populates="locations")
 
+class LocationPoint(Base):
+    """
+    Shared GPS track point. The table is range-partitioned by created_at into
+    daily partitions (see app.services.location_history), so the partition key
+    is part of the primary key and old days are dropped instead of deleted.
+    """
+    __tablename__ = "location_points"
+    __table_args__ = (
+        Index("ix_location_points_plan_id_created_at", "plan_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    name = Column(String, nullable=True)  # Only sent through POST /plans/{plan_id}/locations
+
+class LocationTrackSummary(Base):
+    """Downsampled track of one user in one plan for a day whose partition was dropped"""
+    __tablename__ = "location_track_summaries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    plan_id = Column(Integer, ForeignKey("plans.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    ended_at = Column(DateTime(timezone=True), nullable=False)
+    point_count = Column(Integer, nullable=False)  # Raw points before downsampling
+    path = Column(JSON, nullable=False)  # [[latitude, longitude, epoch_seconds], ...]
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -169,3 +207,22 @@ class Notification(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="notifications")
+
+class ChangeLog(Base):
+    """
+    Per-user change feed behind GET /api/sync. Rows are written by database
+    triggers (see the add_change_log migration), so every write path,
+    including set-based UPDATEs, shows up without application code.
+    """
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_user_id_txid_id", "user_id", "txid", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String, nullable=False)  # plan, plan_invite, notification
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # upsert, delete
+    txid = Column(BigInteger, nullable=False, server_default=func.txid_current())  # Writing transaction, orders the feed
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
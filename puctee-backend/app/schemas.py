@@ -105,6 +105,58 @@ class Location(LocationBase):
     class Config:
         from_attributes = True
         
+class SharedLocation(Location):
+    """A point stored by POST /plans/{plan_id}/locations"""
+    created_at: datetime
+
+class LocationPoint(BaseModel):
+    id: int
+    plan_id: int
+    user_id: int
+    latitude: float
+    longitude: float
+    created_at: datetime
+    name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class LocationTrack(BaseModel):
+    user_id: int
+    point_count: int  # Points before simplification
+    points: Optional[List[List[float]]] = None  # [[latitude, longitude, epoch_seconds], ...]
+    polyline: Optional[str] = None  # Google encoded polyline (precision 5)
+    timestamps: Optional[List[int]] = None  # Epoch seconds, delta-encoded after the first
+
+class LocationTracksResponse(BaseModel):
+    plan_id: int
+    format: str
+    tracks: List[LocationTrack]
+    next_cursor: Optional[str] = None
+
+class LocationIngestResponse(BaseModel):
+    accepted: bool
+    reason: Optional[str] = None  # too_soon, too_close, out_of_range
+    distance: Optional[float] = None  # meters from the last accepted point
+
+class LocationBatchPoint(BaseModel):
+    latitude: float
+    longitude: float
+    recorded_at: Optional[datetime] = None  # When the fix was taken on the device
+
+class LocationBatchRequest(BaseModel):
+    points: List[LocationBatchPoint]  # Ordered oldest first
+
+class LocationBatchResult(BaseModel):
+    index: int
+    accepted: bool
+    reason: Optional[str] = None
+
+class LocationBatchResponse(BaseModel):
+    received: int
+    accepted: int
+    results: List[LocationBatchResult]
+
 class LocationCheck(BaseModel):
     latitude: float
     longitude: float
@@ -138,6 +190,7 @@ class PlanUpdate(PlanBase):
 class Plan(PlanBase):
     id: int
     status: str
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     participants: List[User] = []
@@ -296,3 +349,26 @@ class LocationShareValidationResponse(BaseModel):
     valid: bool
     user_info: Optional[UserInfo] = None
     error: Optional[str] = None
+
+# Home screen
+class HomeResponse(BaseModel):
+    # Sections are None when listed in `unchanged`
+    plans: Optional[List[Plan]] = None
+    plan_invites: Optional[List[PlanInviteResponse]] = None
+    unread_notification_count: Optional[int] = None
+    trust_stats: Optional[UserTrustStatsResponse] = None
+    friend_invites: Optional[List[FriendInvite]] = None
+    validators: Dict[str, str]  # Section name -> ETag
+    unchanged: List[str] = []
+
+# Delta sync
+class SyncResponse(BaseModel):
+    plans: List[Plan] = []
+    deleted_plan_ids: List[int] = []
+    plan_invites: List[PlanInviteResponse] = []
+    deleted_plan_invite_ids: List[int] = []
+    notifications: List[NotificationResponse] = []
+    deleted_notification_ids: List[int] = []
+    next_cursor: str
+    has_more: bool = False
+    reset: bool = False  # No cursor was given: refetch everything, then sync from next_cursor
@@ -0,0 +1,295 @@
+"""
+Batch arrival evaluation at plan start
+
+Instead of waking every participant and waiting for N separate
+POST /plans/{id}/arrival calls, the scheduler evaluates the whole plan at
+once: the latest recent position of every participant is loaded in one query,
+all distances are computed in one vectorized haversine pass, and penalty and
+trust updates are applied with set-based statements.
+
+Participants without a recent position stay unchecked and are woken with a
+silent push so the per-user endpoint can still evaluate them.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import case, false, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.models import LocationPoint, Plan, UserTrustStats, plan_participants
+from app.services.location_ingestion import location_ingestor
+from app.services.plan_cache import plan_cache
+from app.services.push_notification import send_arrival_check_notification
+from app.services.trust_level import apply_arrival_result
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ARRIVAL_RADIUS_KM = 0.1  # Within 100 meters counts as arrived
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+_TRUST_FIELDS = (
+    "total_plans",
+    "late_plans",
+    "on_time_streak",
+    "best_on_time_streak",
+    "last_arrival_status",
+    "trust_level",
+)
+
+
+def haversine_km(lats: Sequence[float], lons: Sequence[float], dest_lat: float, dest_lon: float) -> "np.ndarray":
+    """Distances in kilometers from every (lat, lon) pair to the destination"""
+    # Imported on first use: numpy is only needed once arrivals are evaluated
+    import numpy as np
+
+    lat1, lon1 = np.radians(lats), np.radians(lons)
+    lat2, lon2 = np.radians(dest_lat), np.radians(dest_lon)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def evaluate_positions(
+    lats: Sequence[float],
+    lons: Sequence[float],
+    dest_lat: float,
+    dest_lon: float,
+    radius_km: float = ARRIVAL_RADIUS_KM,
+):
+    """
+    Decide arrival for many positions at once.
+
+    A bounding box around the destination rules out far-away points cheaply;
+    only the points inside it get an exact haversine distance, the rest are
+    reported as infinitely far.
+
+    Returns:
+        (arrived, distances): boolean and float arrays in input order
+    """
+    import numpy as np
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    distances = np.full(lats.shape, np.inf)
+
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlon = dlat / max(np.cos(np.radians(dest_lat)), 1e-6)
+    candidates = (np.abs(lats - dest_lat) <= dlat) & (np.abs(lons - dest_lon) <= dlon)
+    if candidates.any():
+        distances[candidates] = haversine_km(lats[candidates], lons[candidates], dest_lat, dest_lon)
+
+    return distances <= radius_km, distances
+
+
+@dataclass
+class ArrivalEvaluation:
+    plan_id: int
+    arrived: List[int] = field(default_factory=list)
+    late: List[int] = field(default_factory=list)
+    pending: List[int] = field(default_factory=list)  # No recent position, needs a wakeup
+    already_checked: List[int] = field(default_factory=list)
+
+    @property
+    def evaluated(self) -> List[int]:
+        return self.arrived + self.late
+
+
+async def _latest_positions(
+    db: AsyncSession, plan_id: int, user_ids: Sequence[int], since: datetime
+) -> Dict[int, tuple]:
+    result = await db.execute(
+        select(LocationPoint.user_id, LocationPoint.latitude, LocationPoint.longitude)
+        .where(
+            LocationPoint.plan_id == plan_id,
+            LocationPoint.user_id.in_(user_ids),
+            LocationPoint.created_at >= since,
+        )
+        .distinct(LocationPoint.user_id)
+        .order_by(LocationPoint.user_id, LocationPoint.created_at.desc())
+    )
+    return {row.user_id: (row.latitude, row.longitude) for row in result.all()}
+
+
+async def apply_arrival_results(
+    db: AsyncSession,
+    plan_id: int,
+    results: Dict[int, bool],
+    now: datetime,
+) -> Tuple[Set[int], Dict[int, Tuple[float, float]]]:
+    """
+    Write arrival results for many participants of one plan with set-based
+    statements: penalty/arrival status, trust stats and the plan status.
+    Does not commit.
+
+    Rows already checked (e.g. concurrently by another path) are skipped so
+    nobody is counted twice.
+
+    Returns:
+        (updated, trust_levels): user ids that were actually updated, and
+        {user_id: (prev_trust_level, new_trust_level)}
+    """
+    if not results:
+        return set(), {}
+    user_ids = list(results)
+    arrived_ids = [user_id for user_id, ok in results.items() if ok]
+
+    is_arrived_expr = plan_participants.c.user_id.in_(arrived_ids) if arrived_ids else false()
+    result = await db.execute(
+        update(plan_participants)
+        .where(
+            plan_participants.c.plan_id == plan_id,
+            plan_participants.c.user_id.in_(user_ids),
+            plan_participants.c.checked_at.is_(None),
+        )
+        .values(
+            penalty_status=case((is_arrived_expr, "none"), else_="required"),
+            arrival_status=case((is_arrived_expr, "on_time"), else_="late"),
+            checked_at=now,
+        )
+        .returning(plan_participants.c.user_id)
+    )
+    updated = {row.user_id for row in result.all()}
+    if not updated:
+        return updated, {}
+
+    # Trust stats: one SELECT, computed in Python, one bulk UPDATE by primary key
+    result = await db.execute(
+        select(UserTrustStats.id, UserTrustStats.user_id, *[getattr(UserTrustStats, f) for f in _TRUST_FIELDS])
+        .where(UserTrustStats.user_id.in_(list(updated)))
+    )
+    trust_levels = {}
+    rows = []
+    for row in result.all():
+        stats = SimpleNamespace(**{f: getattr(row, f) for f in _TRUST_FIELDS})
+        for counter in ("total_plans", "late_plans", "on_time_streak", "best_on_time_streak"):
+            setattr(stats, counter, getattr(stats, counter) or 0)
+        if stats.trust_level is None:
+            stats.trust_level = 60.0
+        prev_trust_level = stats.trust_level
+        apply_arrival_result(stats, results[row.user_id])
+        trust_levels[row.user_id] = (prev_trust_level, stats.trust_level)
+        rows.append({"id": row.id, **{f: getattr(stats, f) for f in _TRUST_FIELDS}})
+    if rows:
+        await db.execute(update(UserTrustStats), rows)
+
+    # Only write (and bump the version) when the status actually changes;
+    # a plan that someone arrived at stays completed
+    if any(results[user_id] for user_id in updated):
+        conditions = [Plan.status.is_distinct_from("completed")]
+        new_status = "completed"
+    else:
+        conditions = [Plan.status.is_distinct_from("completed"), Plan.status.is_distinct_from("ongoing")]
+        new_status = "ongoing"
+    await db.execute(
+        update(Plan)
+        .where(Plan.id == plan_id, *conditions)
+        .values(status=new_status, version=Plan.version + 1)
+    )
+    return updated, trust_levels
+
+
+async def notify_arrivals(
+    plan: Plan,
+    users: Iterable,
+    arrived: Set[int],
+    trust_levels: Dict[int, Tuple[float, float]],
+) -> None:
+    """Send the arrival result push to every user with a trust level change"""
+    for user in users:
+        if user.id not in trust_levels or not user.push_token:
+            continue
+        prev_trust_level, new_trust_level = trust_levels[user.id]
+        try:
+            await send_arrival_check_notification(
+                plan=plan,
+                device_token=user.push_token,
+                is_arrived=user.id in arrived,
+                prev_trust_level=prev_trust_level,
+                new_trust_level=new_trust_level,
+            )
+        except Exception as e:
+            logger.error(f"Failed to send arrival notification to {user.username}: {str(e)}")
+
+
+async def evaluate_plan_arrivals(
+    plan_id: int,
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    notify: bool = True,
+) -> Optional[ArrivalEvaluation]:
+    """
+    Evaluate every unchecked participant of a plan that has a recent position.
+
+    Returns None if the plan does not exist or has no destination.
+    """
+    now = now or datetime.now(timezone.utc)
+
+    result = await db.execute(
+        select(Plan)
+        .options(selectinload(Plan.locations), selectinload(Plan.participants))
+        .where(Plan.id == plan_id)
+    )
+    plan = result.scalar_one_or_none()
+    if not plan or not plan.locations:
+        return None
+    destination = plan.locations[0]
+    evaluation = ArrivalEvaluation(plan_id=plan_id)
+
+    result = await db.execute(
+        select(plan_participants.c.user_id).where(
+            plan_participants.c.plan_id == plan_id,
+            plan_participants.c.checked_at.is_(None),
+        )
+    )
+    unchecked = [row.user_id for row in result.all()]
+    evaluation.already_checked = [u.id for u in plan.participants if u.id not in set(unchecked)]
+    if not unchecked:
+        return evaluation
+
+    # Points accepted in the last couple of seconds may still be buffered
+    await location_ingestor.flush()
+    since = now - timedelta(seconds=settings.ARRIVAL_POSITION_MAX_AGE_SECONDS)
+    positions = await _latest_positions(db, plan_id, unchecked, since)
+
+    user_ids = [user_id for user_id in unchecked if user_id in positions]
+    evaluation.pending = [user_id for user_id in unchecked if user_id not in positions]
+    if not user_ids:
+        return evaluation
+
+    arrived, distances = evaluate_positions(
+        [positions[user_id][0] for user_id in user_ids],
+        [positions[user_id][1] for user_id in user_ids],
+        destination.latitude,
+        destination.longitude,
+    )
+    arrived_ids = [user_id for user_id, ok in zip(user_ids, arrived) if ok]
+    late_ids = [user_id for user_id, ok in zip(user_ids, arrived) if not ok]
+
+    updated, trust_levels = await apply_arrival_results(
+        db, plan_id, {user_id: bool(ok) for user_id, ok in zip(user_ids, arrived)}, now
+    )
+    await db.commit()
+    await plan_cache.invalidate(plan_id)
+    evaluation.arrived = [user_id for user_id in arrived_ids if user_id in updated]
+    evaluation.late = [user_id for user_id in late_ids if user_id in updated]
+
+    logger.info(
+        f"Evaluated plan {plan_id}: {len(evaluation.arrived)} arrived, "
+        f"{len(evaluation.late)} late, {len(evaluation.pending)} pending"
+    )
+
+    if notify:
+        await notify_arrivals(plan, plan.participants, set(evaluation.arrived), trust_levels)
+
+    return evaluation
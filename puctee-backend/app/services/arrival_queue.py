@@ -0,0 +1,294 @@
+"""
+Arrival check admission control
+
+When the scheduler's silent push fires, every participant's phone posts its
+arrival check within a few seconds. Instead of each request running its own
+transaction against the same plan row, submissions are queued per plan and a
+short-lived worker per plan applies them in small batched transactions
+(see arrival_evaluator.apply_arrival_results). Each caller awaits the result
+computed for its own submission.
+
+A global semaphore caps how many batch transactions run at once so a burst
+cannot exhaust the connection pool, and a queue depth limit rejects new
+submissions (503) instead of letting them pile up.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.logs import reset_log_context
+from app.core.metrics import CounterFunc, GaugeFunc
+from app.db.session import AsyncSessionLocal
+from app.models import Plan, User, plan_participants
+from app.services.arrival_evaluator import (
+    ARRIVAL_RADIUS_KM,
+    apply_arrival_results,
+    haversine_km,
+    notify_arrivals,
+)
+from app.services.plan_cache import plan_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ArrivalQueueFull(Exception):
+    """Raised when the admission queue is at capacity"""
+
+
+class ArrivalQueueStopped(ArrivalQueueFull):
+    """Raised to submissions left pending when their plan's worker stopped (shutdown)"""
+
+
+@dataclass
+class ArrivalOutcome:
+    is_arrived: bool
+    distance: float  # Kilometers
+
+
+@dataclass
+class _Submission:
+    user_id: int
+    latitude: float
+    longitude: float
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class ArrivalCoalescer:
+    def __init__(
+        self,
+        batch_size: int,
+        batch_window_s: float,
+        max_queue_depth: int,
+        max_concurrent_batches: int,
+    ):
+        self.batch_size = batch_size
+        self.batch_window_s = batch_window_s
+        self.max_queue_depth = max_queue_depth
+        self._queues: Dict[int, List[_Submission]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._batch_slots = asyncio.Semaphore(max_concurrent_batches)
+
+        # Metrics (per worker process)
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_submissions = 0
+        self.in_flight_batches = 0
+        self.max_queue_depth_seen = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(
+        self, plan_id: int, user_id: int, latitude: float, longitude: float
+    ) -> Optional[ArrivalOutcome]:
+        """
+        Queue an arrival check and wait for its batch to be applied.
+
+        Returns None if the plan has no destination. Raises ArrivalQueueFull
+        when the queue is at capacity.
+        """
+        depth = self.queue_depth()
+        if depth >= self.max_queue_depth:
+            self.rejected += 1
+            raise ArrivalQueueFull()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(plan_id, []).append(
+            _Submission(user_id, latitude, longitude, future)
+        )
+        self.submitted += 1
+        self.max_queue_depth_seen = max(self.max_queue_depth_seen, depth + 1)
+        if plan_id not in self._workers:
+            self._workers[plan_id] = asyncio.create_task(self._drain(plan_id))
+        return await future
+
+    async def _drain(self, plan_id: int) -> None:
+        # Started by whichever request came first, but works for all of them
+        reset_log_context(plan_id=plan_id)
+        batch: List[_Submission] = []
+        try:
+            while self._queues.get(plan_id):
+                queue = self._queues[plan_id]
+                if len(queue) < self.batch_size:
+                    # Let the rest of the burst for this plan gather
+                    await asyncio.sleep(self.batch_window_s)
+                batch = queue[:self.batch_size]
+                del queue[:self.batch_size]
+
+                async with self._batch_slots:
+                    self.in_flight_batches += 1
+                    try:
+                        notify = await self._apply(plan_id, batch)
+                    except Exception as e:
+                        self.failed += len(batch)
+                        logger.error(f"Arrival batch for plan {plan_id} failed: {str(e)}", exc_info=True)
+                        for submission in batch:
+                            if not submission.future.done():
+                                submission.future.set_exception(e)
+                        notify = None
+                    finally:
+                        self.in_flight_batches -= 1
+
+                # Pushes go out after the connection is back in the pool
+                if notify is not None:
+                    await notify_arrivals(*notify)
+        finally:
+            self._workers.pop(plan_id, None)
+            # Empty unless the worker was cancelled or failed outside a batch:
+            # nothing else would ever answer these callers
+            pending = batch + self._queues.pop(plan_id, [])
+            abandoned = [submission for submission in pending if not submission.future.done()]
+            for submission in abandoned:
+                submission.future.set_exception(ArrivalQueueStopped())
+            if abandoned:
+                self.failed += len(abandoned)
+                logger.warning(f"Arrival worker for plan {plan_id} stopped with {len(abandoned)} checks pending")
+
+    async def _apply(self, plan_id: int, batch: List[_Submission]) -> Optional[Tuple]:
+        now = datetime.now(timezone.utc)
+        started = time.monotonic()
+        for submission in batch:
+            wait_s = started - submission.enqueued_at
+            self.total_wait_s += wait_s
+            self.max_wait_s = max(self.max_wait_s, wait_s)
+        self.batches += 1
+        self.batched_submissions += len(batch)
+
+        # The latest submission per user wins
+        latest: Dict[int, _Submission] = {}
+        for submission in batch:
+            latest[submission.user_id] = submission
+        user_ids = list(latest)
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Plan).options(selectinload(Plan.locations)).where(Plan.id == plan_id)
+            )
+            plan = result.scalar_one_or_none()
+            if not plan or not plan.locations:
+                self._resolve(batch, {})
+                return None
+            destination = plan.locations[0]
+
+            distances = haversine_km(
+                [latest[user_id].latitude for user_id in user_ids],
+                [latest[user_id].longitude for user_id in user_ids],
+                destination.latitude,
+                destination.longitude,
+            )
+            distance_by_user = dict(zip(user_ids, distances.tolist()))
+
+            # Already evaluated (e.g. by the batch evaluator at plan start):
+            # report the stored result without counting the plan twice
+            result = await db.execute(
+                select(plan_participants.c.user_id, plan_participants.c.arrival_status).where(
+                    plan_participants.c.plan_id == plan_id,
+                    plan_participants.c.user_id.in_(user_ids),
+                    plan_participants.c.checked_at.isnot(None),
+                )
+            )
+            stored = {row.user_id: row.arrival_status == "on_time" for row in result.all()}
+            results = {
+                user_id: distance_by_user[user_id] <= ARRIVAL_RADIUS_KM
+                for user_id in user_ids
+                if user_id not in stored
+            }
+
+            updated, trust_levels = await apply_arrival_results(db, plan_id, results, now)
+            await db.commit()
+            if updated:
+                await plan_cache.invalidate(plan_id)
+
+            users = []
+            if trust_levels:
+                result = await db.execute(
+                    select(User).where(User.id.in_(list(trust_levels)))
+                )
+                users = result.scalars().all()
+
+        outcomes = {
+            user_id: ArrivalOutcome(
+                is_arrived=stored.get(user_id, results.get(user_id, False)),
+                distance=distance_by_user[user_id],
+            )
+            for user_id in user_ids
+        }
+        self._resolve(batch, outcomes)
+        arrived = {user_id for user_id in updated if results[user_id]}
+        return plan, users, arrived, trust_levels
+
+    @staticmethod
+    def _resolve(batch: List[_Submission], outcomes: Dict[int, ArrivalOutcome]) -> None:
+        for submission in batch:
+            if not submission.future.done():
+                submission.future.set_result(outcomes.get(submission.user_id))
+
+    async def stop(self) -> None:
+        """Let queued submissions finish before shutdown"""
+        workers = list(self._workers.values())
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "max_queue_depth_seen": self.max_queue_depth_seen,
+            "active_plans": len(self._workers),
+            "in_flight_batches": self.in_flight_batches,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_submissions / self.batches, 2) if self.batches else 0.0,
+            "avg_wait_ms": round(self.total_wait_s / self.batched_submissions * 1000, 2)
+            if self.batched_submissions else 0.0,
+            "max_wait_ms": round(self.max_wait_s * 1000, 2),
+        }
+
+
+# Singleton used by the arrival endpoint and the app lifespan
+arrival_coalescer = ArrivalCoalescer(
+    batch_size=settings.ARRIVAL_BATCH_SIZE,
+    batch_window_s=settings.ARRIVAL_BATCH_WINDOW_SECONDS,
+    max_queue_depth=settings.ARRIVAL_MAX_QUEUE_DEPTH,
+    max_concurrent_batches=settings.ARRIVAL_MAX_CONCURRENT_BATCHES,
+)
+
+GaugeFunc("puctee_arrival_queue_depth", "Arrival checks waiting for a batch", arrival_coalescer.queue_depth)
+GaugeFunc(
+    "puctee_arrival_queue_max_depth_seen", "Highest queue depth since start", lambda: arrival_coalescer.max_queue_depth_seen
+)
+GaugeFunc("puctee_arrival_queue_active_plans", "Plans with a batch worker", lambda: len(arrival_coalescer._workers))
+GaugeFunc(
+    "puctee_arrival_queue_in_flight_batches", "Batches being applied", lambda: arrival_coalescer.in_flight_batches
+)
+GaugeFunc(
+    "puctee_arrival_queue_max_wait_seconds", "Longest wait of a check for its batch since start",
+    lambda: arrival_coalescer.max_wait_s,
+)
+CounterFunc("puctee_arrival_queue_submitted_total", "Arrival checks queued", lambda: arrival_coalescer.submitted)
+CounterFunc(
+    "puctee_arrival_queue_rejected_total", "Arrival checks rejected with a full queue", lambda: arrival_coalescer.rejected
+)
+CounterFunc("puctee_arrival_queue_failed_total", "Arrival checks whose batch failed", lambda: arrival_coalescer.failed)
+CounterFunc("puctee_arrival_queue_batches_total", "Batches applied", lambda: arrival_coalescer.batches)
+CounterFunc(
+    "puctee_arrival_queue_batched_total", "Arrival checks applied in a batch",
+    lambda: arrival_coalescer.batched_submissions,
+)
+CounterFunc(
+    "puctee_arrival_queue_wait_seconds_total", "Time batched checks waited for their batch",
+    lambda: arrival_coalescer.total_wait_s,
+)
@@ -0,0 +1,227 @@
+"""
+Delta sync over the per-user change_log
+
+change_log rows are written by triggers (plans, plan_participants,
+locations, penalties, plan_invites, notifications) and read back by
+GET /api/sync in (txid, id) order.
+
+Ordering by the writing transaction id instead of the row id is what makes
+the cursor safe: only rows from transactions older than the current
+snapshot's xmin are returned, and any transaction still in flight (which
+may hold lower row ids) has a txid >= xmin, so it sorts after the cursor
+once it commits.
+"""
+import asyncio
+import base64
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models import ChangeLog, Notification
+from app.services.plan_read_model import list_invites_by_ids, list_plans_by_ids
+
+logger = logging.getLogger(__name__)
+
+# Sorts after every row id, so a bootstrap cursor skips its whole txid
+_MAX_ID = 2 ** 63 - 1
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the change_log retention window"""
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    txid: int
+    id: int
+    issued_at: int  # Epoch seconds, to detect cursors older than the retention
+
+    def encode(self) -> str:
+        raw = f"{self.txid}:{self.id}:{self.issued_at}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> Optional["SyncCursor"]:
+        """None when the cursor is malformed"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            txid, row_id, issued_at = base64.urlsafe_b64decode(padded).decode().split(":")
+            return cls(int(txid), int(row_id), int(issued_at))
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+
+@dataclass
+class ChangeSet:
+    """Latest operation per entity within one page"""
+    upserts: Dict[str, List[int]] = field(default_factory=dict)
+    deletes: Dict[str, List[int]] = field(default_factory=dict)
+
+
+def collapse(entries: List[Tuple[str, int, str]]) -> ChangeSet:
+    """Reduce (entity, entity_id, op) entries in feed order to the last op per entity"""
+    latest: Dict[Tuple[str, int], str] = {}
+    for entity, entity_id, op in entries:
+        latest.pop((entity, entity_id), None)
+        latest[(entity, entity_id)] = op
+    changes = ChangeSet()
+    for (entity, entity_id), op in latest.items():
+        target = changes.upserts if op == "upsert" else changes.deletes
+        target.setdefault(entity, []).append(entity_id)
+    return changes
+
+
+async def head_cursor(db: AsyncSession, now: datetime) -> SyncCursor:
+    """Cursor that skips everything already committed"""
+    result = await db.execute(select(func.txid_snapshot_xmin(func.txid_current_snapshot())))
+    xmin = result.scalar_one()
+    return SyncCursor(txid=xmin - 1, id=_MAX_ID, issued_at=int(now.timestamp()))
+
+
+async def read_changes(
+    db: AsyncSession, user_id: int, cursor: SyncCursor, limit: int, now: datetime
+) -> Tuple[ChangeSet, SyncCursor, bool]:
+    """
+    One page of the user's change feed after the cursor.
+
+    Returns the collapsed changes, the next cursor and whether more
+    entries are already available.
+    """
+    oldest = now - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    if cursor.issued_at < oldest.timestamp():
+        raise CursorExpired()
+
+    result = await db.execute(
+        select(ChangeLog.txid, ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op)
+        .where(
+            ChangeLog.user_id == user_id,
+            tuple_(ChangeLog.txid, ChangeLog.id) > tuple_(cursor.txid, cursor.id),
+            ChangeLog.txid < func.txid_snapshot_xmin(func.txid_current_snapshot()),
+        )
+        .order_by(ChangeLog.txid, ChangeLog.id)
+        .limit(limit + 1)
+    )
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    issued_at = int(now.timestamp())
+    if rows:
+        next_cursor = SyncCursor(txid=rows[-1].txid, id=rows[-1].id, issued_at=issued_at)
+    else:
+        next_cursor = SyncCursor(txid=cursor.txid, id=cursor.id, issued_at=issued_at)
+    changes = collapse([(row.entity, row.entity_id, row.op) for row in rows])
+    return changes, next_cursor, has_more
+
+
+async def build_sync_payload(
+    db: AsyncSession, user_id: int, cursor: Optional[SyncCursor], limit: int
+) -> dict:
+    """SyncResponse-shaped payload. Without a cursor, returns a bootstrap cursor only."""
+    now = datetime.now(timezone.utc)
+    payload = {
+        "plans": [],
+        "deleted_plan_ids": [],
+        "plan_invites": [],
+        "deleted_plan_invite_ids": [],
+        "notifications": [],
+        "deleted_notification_ids": [],
+        "has_more": False,
+        "reset": cursor is None,
+    }
+    if cursor is None:
+        payload["next_cursor"] = (await head_cursor(db, now)).encode()
+        return payload
+
+    changes, next_cursor, has_more = await read_changes(db, user_id, cursor, limit, now)
+    payload["next_cursor"] = next_cursor.encode()
+    payload["has_more"] = has_more
+
+    # Upserted rows that are gone (or no longer visible to the user) by now
+    # are reported as deletes
+    plan_ids = changes.upserts.get("plan", [])
+    plans = await list_plans_by_ids(db, plan_ids, user_id)
+    found = {plan["id"] for plan in plans}
+    payload["plans"] = plans
+    payload["deleted_plan_ids"] = sorted(
+        set(changes.deletes.get("plan", [])) | (set(plan_ids) - found)
+    )
+
+    invite_ids = changes.upserts.get("plan_invite", [])
+    invites = await list_invites_by_ids(db, user_id, invite_ids)
+    found = {invite["id"] for invite in invites}
+    payload["plan_invites"] = invites
+    payload["deleted_plan_invite_ids"] = sorted(
+        set(changes.deletes.get("plan_invite", [])) | (set(invite_ids) - found)
+    )
+
+    notification_ids = changes.upserts.get("notification", [])
+    notifications = []
+    if notification_ids:
+        result = await db.execute(
+            select(
+                Notification.id,
+                Notification.user_id,
+                Notification.title,
+                Notification.content,
+                Notification.is_read,
+            )
+            .where(Notification.id.in_(notification_ids), Notification.user_id == user_id)
+            .order_by(Notification.id)
+        )
+        notifications = [dict(row._mapping) for row in result.all()]
+    found = {notification["id"] for notification in notifications}
+    payload["notifications"] = notifications
+    payload["deleted_notification_ids"] = sorted(
+        set(changes.deletes.get("notification", [])) | (set(notification_ids) - found)
+    )
+    return payload
+
+
+async def prune_change_log(now: Optional[datetime] = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(ChangeLog).where(ChangeLog.created_at < cutoff))
+        await db.commit()
+    return result.rowcount or 0
+
+
+class ChangeLogPruner:
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                pruned = await prune_change_log()
+                if pruned:
+                    logger.info(f"Pruned {pruned} change_log rows")
+            except Exception as e:
+                logger.error(f"Change log pruning failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+change_log_pruner = ChangeLogPruner(
+    interval_s=settings.CHANGE_LOG_PRUNE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,41 @@
+"""
+Warmup of external clients
+
+APNs (signing key from Secrets Manager), S3 and EventBridge Scheduler
+clients are all created on first use so the app imports and starts without
+network access. warm_external_clients() creates them ahead of time,
+concurrently and off the event loop; failures are only logged, the clients
+then retry on first use.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from app.core import s3
+from app.services.push_notification import get_push_notification_client
+from app.services.scheduler.eventbridge_scheduler import eventbridge_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+async def _timed(name: str, warmup, durations: Dict[str, Optional[float]]) -> None:
+    started = time.perf_counter()
+    try:
+        await warmup
+        durations[name] = round((time.perf_counter() - started) * 1000, 1)
+    except Exception as e:
+        durations[name] = None
+        logger.warning(f"Warmup of {name} client failed: {str(e)}")
+
+
+async def warm_external_clients() -> Dict[str, Optional[float]]:
+    """Milliseconds each client took to initialize (None when it failed)"""
+    durations: Dict[str, Optional[float]] = {}
+    await asyncio.gather(
+        _timed("apns", get_push_notification_client().warmup(), durations),
+        _timed("s3", asyncio.to_thread(s3.get_s3_client), durations),
+        _timed("eventbridge", asyncio.to_thread(lambda: eventbridge_scheduler.scheduler_client), durations),
+    )
+    logger.info(f"External clients warmed up: {durations}")
+    return durations
@@ -0,0 +1,184 @@
+"""
+Location history maintenance
+
+location_points is range-partitioned by created_at into one partition per UTC
+day. A background task started in the app lifespan keeps partitions created
+ahead of time and, once a day falls out of the retention window, compacts its
+points into downsampled rows in location_track_summaries and drops the whole
+partition instead of running DELETEs.
+
+Every step runs under a transaction-scoped advisory lock, which works behind
+pgbouncer in transaction mode and keeps several workers from compacting the
+same day twice.
+"""
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "location_points"
+PARTITION_PREFIX = "location_points_p"
+_PARTITION_RE = re.compile(rf"^{PARTITION_PREFIX}(\d{{8}})$")
+
+# Arbitrary key for pg_try_advisory_xact_lock
+MAINTENANCE_LOCK_KEY = 7_301_028
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> Optional[date]:
+    match = _PARTITION_RE.match(name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+
+def create_partition_sql(day: date) -> str:
+    start = day.isoformat()
+    end = (day + timedelta(days=1)).isoformat()
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(day)} "
+        f"PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+    )
+
+
+# Downsample one partition into one summary row per (plan, user): points are
+# averaged per time bucket and the buckets are stored as a JSON path.
+_COMPACT_SQL = """
+INSERT INTO location_track_summaries
+    (plan_id, user_id, started_at, ended_at, point_count, path)
+SELECT
+    plan_id,
+    user_id,
+    min(first_at),
+    max(last_at),
+    sum(n),
+    json_agg(json_build_array(lat, lon, bucket_epoch) ORDER BY bucket_epoch)
+FROM (
+    SELECT
+        plan_id,
+        user_id,
+        floor(extract(epoch FROM created_at) / :bucket)::bigint * :bucket AS bucket_epoch,
+        round(avg(latitude)::numeric, 6) AS lat,
+        round(avg(longitude)::numeric, 6) AS lon,
+        count(*) AS n,
+        min(created_at) AS first_at,
+        max(created_at) AS last_at
+    FROM {partition}
+    GROUP BY plan_id, user_id, bucket_epoch
+) buckets
+GROUP BY plan_id, user_id
+"""
+
+
+async def _try_lock(db: AsyncSession) -> bool:
+    result = await db.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY}
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(db: AsyncSession) -> List[Tuple[str, date]]:
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": PARENT_TABLE})
+    partitions = []
+    for (name,) in result.all():
+        day = partition_day(name)
+        if day is not None:
+            partitions.append((name, day))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def ensure_partitions(db: AsyncSession, today: date, days_ahead: int) -> None:
+    for offset in range(days_ahead + 1):
+        await db.execute(text(create_partition_sql(today + timedelta(days=offset))))
+
+
+async def compact_partition(db: AsyncSession, name: str, bucket_seconds: int) -> int:
+    """Write downsampled summaries for one partition. Returns the number of summaries."""
+    result = await db.execute(
+        text(_COMPACT_SQL.format(partition=name)), {"bucket": bucket_seconds}
+    )
+    return result.rowcount or 0
+
+
+async def run_maintenance(now: Optional[datetime] = None) -> dict:
+    """Create upcoming partitions, then compact and drop expired ones"""
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    cutoff = today - timedelta(days=settings.LOCATION_RETENTION_DAYS)
+    report = {"dropped": [], "summaries": 0, "skipped": False}
+
+    async with AsyncSessionLocal() as db:
+        async with db.begin():
+            if not await _try_lock(db):
+                report["skipped"] = True
+                return report
+            await ensure_partitions(db, today, settings.LOCATION_PARTITION_PREMAKE_DAYS)
+            expired = [name for name, day in await list_partitions(db) if day < cutoff]
+
+        # One transaction per partition keeps lock time short
+        for name in expired:
+            async with db.begin():
+                if not await _try_lock(db):
+                    report["skipped"] = True
+                    break
+                report["summaries"] += await compact_partition(
+                    db, name, settings.LOCATION_SUMMARY_BUCKET_SECONDS
+                )
+                await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            report["dropped"].append(name)
+
+    if report["dropped"]:
+        logger.info(
+            f"Compacted {report['summaries']} location tracks and dropped partitions: {', '.join(report['dropped'])}"
+        )
+    return report
+
+
+class LocationHistoryMaintainer:
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await run_maintenance()
+            except Exception as e:
+                logger.error(f"Location history maintenance failed: {str(e)}", exc_info=True)
+            await asyncio.sleep(self.interval_s)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+location_history_maintainer = LocationHistoryMaintainer(
+    interval_s=settings.LOCATION_MAINTENANCE_INTERVAL_SECONDS,
+)
@@ -0,0 +1,347 @@
+"""
+Location ingestion stage
+
+Shared GPS points are filtered against each user's last accepted point before
+they reach the location_points table. Points that did not move far enough, or that arrive
+too soon after the previous accepted one, are dropped. Accepted points are
+buffered and written with multi-row INSERTs, either when the buffer fills up
+or periodically from a background task started in the app lifespan. A failed
+INSERT puts the rows back in front of the buffer; after MAX_FLUSH_ATTEMPTS
+failures in a row they are dropped and the user's last accepted point is
+forgotten, so the next point isn't throttled against one that was never stored.
+
+State is kept per worker process, so with several workers each one throttles
+the users it happens to serve.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.metrics import CounterFunc, GaugeFunc
+from app.db.session import AsyncSessionLocal
+from app.models import LocationPoint
+from app.services.geo import calculate_distance
+
+logger = logging.getLogger(__name__)
+
+# Last-accepted state and stats of users idle longer than this are forgotten on the next flush
+STATE_TTL = timedelta(hours=6)
+
+# Device timestamps further ahead than this are rejected (no partition yet)
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+# Consecutive failed INSERTs before buffered rows are given up on
+MAX_FLUSH_ATTEMPTS = 3
+
+
+@dataclass
+class IngestionDecision:
+    accepted: bool
+    reason: Optional[str] = None  # "too_soon", "too_close" or "out_of_range" when dropped
+    distance_m: Optional[float] = None  # Distance from the last accepted point
+
+
+# Every received point ends up in exactly one of these UserIngestionStats fields
+OUTCOMES = ("accepted", "dropped_too_soon", "dropped_too_close", "dropped_out_of_range")
+
+
+@dataclass
+class UserIngestionStats:
+    received: int = 0
+    accepted: int = 0
+    dropped_too_soon: int = 0
+    dropped_too_close: int = 0
+    dropped_out_of_range: int = 0
+    last_seen: Optional[datetime] = None  # For pruning users who stopped sharing
+
+    @property
+    def acceptance_rate(self) -> float:
+        return self.accepted / self.received if self.received else 1.0
+
+
+@dataclass
+class _LastPoint:
+    latitude: float
+    longitude: float
+    at: datetime
+
+
+def _location_row(
+    plan_id: int,
+    user_id: int,
+    latitude: float,
+    longitude: float,
+    at: datetime,
+) -> dict:
+    return {
+        "plan_id": plan_id,
+        "user_id": user_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "created_at": at,
+    }
+
+
+@dataclass
+class LocationIngestor:
+    min_distance_m: float
+    min_interval_s: float
+    batch_size: int
+    flush_interval_s: float
+
+    _last_accepted: Dict[Tuple[int, int], _LastPoint] = field(default_factory=dict)
+    _buffer: List[dict] = field(default_factory=list)
+    _stats: Dict[int, UserIngestionStats] = field(default_factory=dict)
+    _retired: UserIngestionStats = field(default_factory=UserIngestionStats)  # Totals of pruned users
+    _flush_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _flush_task: Optional[asyncio.Task] = None
+    _flush_failures: int = 0
+    rows_written: int = 0
+    rows_failed: int = 0
+
+    def _judge(
+        self,
+        stats: UserIngestionStats,
+        reference: Optional[_LastPoint],
+        latitude: float,
+        longitude: float,
+        at: datetime,
+    ) -> IngestionDecision:
+        """Throttle a point against the accepted point before it, counting the outcome"""
+        stats.received += 1
+        distance_m = None
+        if reference is not None:
+            if (at - reference.at).total_seconds() < self.min_interval_s:
+                stats.dropped_too_soon += 1
+                return IngestionDecision(accepted=False, reason="too_soon")
+
+            distance_m = calculate_distance(
+                reference.latitude, reference.longitude, latitude, longitude
+            ) * 1000
+            if distance_m < self.min_distance_m:
+                stats.dropped_too_close += 1
+                return IngestionDecision(accepted=False, reason="too_close", distance_m=distance_m)
+
+        stats.accepted += 1
+        return IngestionDecision(accepted=True, distance_m=distance_m)
+
+    def evaluate(
+        self,
+        plan_id: int,
+        user_id: int,
+        latitude: float,
+        longitude: float,
+        at: datetime,
+    ) -> IngestionDecision:
+        """
+        Decide whether a point should be stored and record it as the user's
+        last accepted point if so. Does not touch the database.
+        """
+        stats = self._user_stats_for_update(user_id)
+        key = (plan_id, user_id)
+        decision = self._judge(stats, self._last_accepted.get(key), latitude, longitude, at)
+        if decision.accepted:
+            self._last_accepted[key] = _LastPoint(latitude, longitude, at)
+        return decision
+
+    async def submit(
+        self,
+        plan_id: int,
+        user_id: int,
+        latitude: float,
+        longitude: float,
+        at: Optional[datetime] = None,
+    ) -> IngestionDecision:
+        """Filter a point and queue it for the next batched INSERT if accepted"""
+        at = at or datetime.now(timezone.utc)
+        decision = self.evaluate(plan_id, user_id, latitude, longitude, at)
+        if decision.accepted:
+            self._buffer.append(_location_row(plan_id, user_id, latitude, longitude, at))
+            if len(self._buffer) >= self.batch_size:
+                await self.flush()
+        return decision
+
+    def evaluate_batch(
+        self,
+        plan_id: int,
+        user_id: int,
+        points: List[dict],
+    ) -> Tuple[List[IngestionDecision], List[dict]]:
+        """
+        Filter an ordered list of points (dicts with latitude, longitude and
+        optional recorded_at) in one pass. Device timestamps outside the
+        retention window have no partition to land in and are dropped.
+
+        Each point is judged against the latest accepted point recorded before
+        it, from the batch or the live state, so a replay older than the
+        user's last live point is throttled within itself instead of being
+        dropped as too soon.
+
+        Returns the decision for every point and the rows to insert. Unlike
+        submit(), the rows are not buffered so the caller can write them in
+        its own transaction, and the last accepted point only moves once the
+        caller reports them written with record_batch().
+        """
+        now = datetime.now(timezone.utc)
+        oldest = now - timedelta(days=settings.LOCATION_RETENTION_DAYS)
+        stats = self._user_stats_for_update(user_id)
+        live = self._last_accepted.get((plan_id, user_id))
+        batch_last: Optional[_LastPoint] = None
+        decisions: List[IngestionDecision] = []
+        rows: List[dict] = []
+        for point in points:
+            at = point.get("recorded_at") or now
+            if at.tzinfo is None:
+                at = at.replace(tzinfo=timezone.utc)
+            if at < oldest or at > now + MAX_CLOCK_SKEW:
+                stats.received += 1
+                stats.dropped_out_of_range += 1
+                decisions.append(IngestionDecision(accepted=False, reason="out_of_range"))
+                continue
+            earlier = [p for p in (batch_last, live) if p is not None and p.at <= at]
+            reference = max(earlier, key=lambda p: p.at) if earlier else None
+            decision = self._judge(stats, reference, point["latitude"], point["longitude"], at)
+            decisions.append(decision)
+            if decision.accepted:
+                batch_last = _LastPoint(point["latitude"], point["longitude"], at)
+                rows.append(_location_row(
+                    plan_id, user_id, point["latitude"], point["longitude"], at
+                ))
+        return decisions, rows
+
+    def record_batch(self, plan_id: int, user_id: int, rows: List[dict]) -> None:
+        """Advance the last accepted point after evaluate_batch() rows were committed"""
+        if not rows:
+            return
+        newest = max(rows, key=lambda row: row["created_at"])
+        key = (plan_id, user_id)
+        last = self._last_accepted.get(key)
+        if last is None or newest["created_at"] > last.at:
+            self._last_accepted[key] = _LastPoint(newest["latitude"], newest["longitude"], newest["created_at"])
+
+    async def flush(self) -> int:
+        """Write all buffered points in one multi-row INSERT"""
+        async with self._flush_lock:
+            if not self._buffer:
+                self._prune_state()
+                return 0
+            rows, self._buffer = self._buffer, []
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.execute(insert(LocationPoint).values(rows))
+                    await session.commit()
+            except Exception as e:
+                self._flush_failures += 1
+                if self._flush_failures < MAX_FLUSH_ATTEMPTS:
+                    # Retried on the next flush, ahead of newer points
+                    self._buffer = rows + self._buffer
+                    logger.warning(
+                        f"Failed to flush {len(rows)} location points "
+                        f"(attempt {self._flush_failures}/{MAX_FLUSH_ATTEMPTS}): {str(e)}"
+                    )
+                    return 0
+                self._flush_failures = 0
+                self.rows_failed += len(rows)
+                self._forget_lost(rows)
+                logger.error(
+                    f"Dropped {len(rows)} location points after {MAX_FLUSH_ATTEMPTS} failed flushes: {str(e)}",
+                    exc_info=True
+                )
+                return 0
+            self._flush_failures = 0
+            self.rows_written += len(rows)
+            self._prune_state()
+            return len(rows)
+
+    def _forget_lost(self, rows: List[dict]) -> None:
+        """Drop last-accepted state that points at rows which were never written"""
+        for row in rows:
+            key = (row["plan_id"], row["user_id"])
+            last = self._last_accepted.get(key)
+            if last is not None and last.at == row["created_at"]:
+                del self._last_accepted[key]
+
+    def _user_stats_for_update(self, user_id: int) -> UserIngestionStats:
+        stats = self._stats.setdefault(user_id, UserIngestionStats())
+        stats.last_seen = datetime.now(timezone.utc)
+        return stats
+
+    def _prune_state(self) -> None:
+        cutoff = datetime.now(timezone.utc) - STATE_TTL
+        stale = [key for key, point in self._last_accepted.items() if point.at < cutoff]
+        for key in stale:
+            del self._last_accepted[key]
+        idle = [user_id for user_id, stats in self._stats.items() if stats.last_seen < cutoff]
+        for user_id in idle:
+            stats = self._stats.pop(user_id)
+            for name in OUTCOMES + ("received",):
+                setattr(self._retired, name, getattr(self._retired, name) + getattr(stats, name))
+
+    async def _run_periodic_flush(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Periodic location flush failed: {str(e)}", exc_info=True)
+
+    def start(self) -> None:
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._run_periodic_flush())
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+    def user_stats(self, user_id: int) -> UserIngestionStats:
+        return self._stats.get(user_id, UserIngestionStats())
+
+    def outcome_totals(self) -> Dict[str, int]:
+        """Points per outcome across all users, including the pruned ones"""
+        users = [self._retired, *self._stats.values()]
+        return {name: sum(getattr(stats, name) for stats in users) for name in OUTCOMES}
+
+    def metrics(self) -> dict:
+        totals = self.outcome_totals()
+        received = sum(totals.values())
+        return {
+            "users": len(self._stats),
+            "received": received,
+            "accepted": totals["accepted"],
+            "acceptance_rate": round(totals["accepted"] / received, 4) if received else 1.0,
+            "buffered": len(self._buffer),
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+        }
+
+
+# Singleton used by the location endpoints and the app lifespan
+location_ingestor = LocationIngestor(
+    min_distance_m=settings.LOCATION_MIN_DISTANCE_METERS,
+    min_interval_s=settings.LOCATION_MIN_INTERVAL_SECONDS,
+    batch_size=settings.LOCATION_BATCH_SIZE,
+    flush_interval_s=settings.LOCATION_FLUSH_INTERVAL_SECONDS,
+)
+
+CounterFunc(
+    "puctee_location_points_total", "Shared location points by ingestion outcome",
+    lambda: {(name, ): value for name, value in location_ingestor.outcome_totals().items()}, ("outcome",),
+)
+CounterFunc(
+    "puctee_location_rows_total", "Accepted points written to location_points, or dropped after failed flushes",
+    lambda: {("written", ): location_ingestor.rows_written, ("failed", ): location_ingestor.rows_failed},
+    ("outcome",),
+)
+GaugeFunc("puctee_location_buffered", "Accepted points waiting for the next flush", lambda: len(location_ingestor._buffer))
+GaugeFunc("puctee_location_users", "Users with ingestion state", lambda: len(location_ingestor._stats))
@@ -0,0 +1,232 @@
+"""
+Read-through cache of plan detail payloads in Redis
+
+Every participant reads the same plan payload, so it is cached once per
+plan (not per user) together with its ETag and participant ids; the
+participation check runs against the cached ids.
+
+Invalidation bumps a per-plan generation counter and deletes the entry.
+Payloads embed participants' profiles, so profile writes invalidate every
+plan the user takes part in (participant_plan_ids); the entry's ETag is
+built from plan_validator_query, which covers participants' updated_at.
+Entries carry the generation they were loaded under and are ignored once
+it moved, so a load that raced with a write can never resurrect stale
+data. Cold reads are single-flighted: within a process concurrent readers
+share one load, across processes a short Redis lock lets one worker load
+while the others wait for its entry.
+
+Without REDIS_URL (or while Redis is unreachable) reads go straight to
+Postgres.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.etag import versioned_weak_etag
+from app.core.metrics import CounterFunc, GaugeFunc
+from app.core.singleflight import SingleFlight
+from app.db.redis import get_redis_client
+from app.db.session import AsyncSessionLocal
+from app.models import plan_participants
+from app.services.plan_read_model import list_plans_by_ids, plan_validator_query
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLL_INTERVAL_SECONDS = 0.05
+
+
+def _entry_key(plan_id: int) -> str:
+    return f"plan:{plan_id}:detail"
+
+
+def _generation_key(plan_id: int) -> str:
+    return f"plan:{plan_id}:gen"
+
+
+def _lock_key(plan_id: int) -> str:
+    return f"plan:{plan_id}:lock"
+
+
+async def participant_plan_ids(db: AsyncSession, user_id: int) -> List[int]:
+    """Plans whose payload shows the user; read before a delete commits, the rows cascade away"""
+    result = await db.execute(
+        select(plan_participants.c.plan_id).where(plan_participants.c.user_id == user_id)
+    )
+    return list(result.scalars().all())
+
+
+async def load_plan_entry(plan_id: int) -> Optional[dict]:
+    """Cache entry built from Postgres: {"etag", "participant_ids", "plan"}, None if the plan doesn't exist"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(plan_validator_query(plan_id))
+        validator = result.first()
+        if not validator:
+            return None
+        plans = await list_plans_by_ids(db, [plan_id])
+    if not plans:
+        return None
+    plan = jsonable_encoder(plans[0])
+    return {
+        "etag": versioned_weak_etag(validator.version, *validator[1:]),
+        "participant_ids": [participant["id"] for participant in plan["participants"]],
+        "plan": plan,
+    }
+
+
+class PlanCache:
+    def __init__(self, ttl_s: int, lock_timeout_s: float, lock_wait_s: float):
+        self.ttl_s = ttl_s
+        self.lock_timeout_s = lock_timeout_s
+        self.lock_wait_s = lock_wait_s
+        self._loads = SingleFlight("plan_cache")
+
+        # Metrics (per worker process)
+        self.hits = 0
+        self.misses = 0
+        self.db_loads = 0
+        self.lock_waits = 0  # Readers that waited for another process to fill the entry
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.REDIS_URL)
+
+    async def _redis(self):
+        return await get_redis_client().connect()
+
+    async def get_plan(self, plan_id: int) -> Optional[dict]:
+        """Cache entry for the plan, loading it on a miss"""
+        if not self.enabled:
+            return await load_plan_entry(plan_id)
+        try:
+            redis = await self._redis()
+            raw, generation = await redis.mget(_entry_key(plan_id), _generation_key(plan_id))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Plan cache read failed for plan {plan_id}: {str(e)}")
+            return await load_plan_entry(plan_id)
+
+        generation = int(generation or 0)
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry.get("gen") == generation:
+                self.hits += 1
+                return entry
+        self.misses += 1
+
+        # Keyed by generation too: a load started before a write must not be shared after it
+        return await self._loads.do((plan_id, generation), lambda: self._fill(plan_id, generation))
+
+    async def _fill(self, plan_id: int, generation: int) -> Optional[dict]:
+        try:
+            redis = await self._redis()
+            token = uuid.uuid4().hex
+            locked = await redis.set(
+                _lock_key(plan_id), token, nx=True, px=int(self.lock_timeout_s * 1000)
+            )
+            if not locked:
+                self.lock_waits += 1
+                entry = await self._wait_for_entry(redis, plan_id, generation)
+                if entry is not None:
+                    return entry
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Plan cache lock failed for plan {plan_id}: {str(e)}")
+            self.db_loads += 1
+            return await load_plan_entry(plan_id)
+
+        self.db_loads += 1
+        entry = await load_plan_entry(plan_id)
+        try:
+            if entry is not None:
+                entry["gen"] = generation
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.set(_entry_key(plan_id), json.dumps(entry), ex=self.ttl_s)
+                    # Outlives every entry, so an expired counter can't restart at a live generation
+                    pipe.expire(_generation_key(plan_id), self.ttl_s * 2)
+                    await pipe.execute()
+            if locked:
+                # Only release our own lock
+                if await redis.get(_lock_key(plan_id)) == token:
+                    await redis.delete(_lock_key(plan_id))
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Plan cache fill failed for plan {plan_id}: {str(e)}")
+        return entry
+
+    async def _wait_for_entry(self, redis, plan_id: int, generation: int) -> Optional[dict]:
+        """Entry filled by the lock holder, or None if it didn't show up in time"""
+        deadline = time.monotonic() + self.lock_wait_s
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL_SECONDS)
+            raw = await redis.get(_entry_key(plan_id))
+            if raw is not None:
+                entry = json.loads(raw)
+                if entry.get("gen") == generation:
+                    return entry
+        return None
+
+    async def invalidate(self, *plan_ids: int) -> None:
+        """Call after the write that changed the plans has committed"""
+        if not self.enabled or not plan_ids:
+            return
+        self.invalidations += len(plan_ids)
+        try:
+            redis = await self._redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for plan_id in plan_ids:
+                    pipe.incr(_generation_key(plan_id))
+                    pipe.expire(_generation_key(plan_id), self.ttl_s * 2)
+                    pipe.delete(_entry_key(plan_id))
+                await pipe.execute()
+        except Exception as e:
+            # Entries still expire after ttl_s
+            self.errors += 1
+            logger.error(f"Plan cache invalidation failed for plans {list(plan_ids)}: {str(e)}")
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "db_loads": self.db_loads,
+            "coalesced": self._loads.coalesced,  # Readers that joined a load running in this process
+            "lock_waits": self.lock_waits,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+plan_cache = PlanCache(
+    ttl_s=settings.PLAN_CACHE_TTL_SECONDS,
+    lock_timeout_s=settings.PLAN_CACHE_LOCK_TIMEOUT_SECONDS,
+    lock_wait_s=settings.PLAN_CACHE_LOCK_WAIT_SECONDS,
+)
+
+GaugeFunc("puctee_plan_cache_enabled", "1 when REDIS_URL is set", lambda: int(plan_cache.enabled))
+CounterFunc(
+    "puctee_plan_cache_lookups_total", "Plan detail cache lookups by result",
+    lambda: {("hit", ): plan_cache.hits, ("miss", ): plan_cache.misses}, ("result",),
+)
+CounterFunc("puctee_plan_cache_db_loads_total", "Cache misses loaded from the database", lambda: plan_cache.db_loads)
+CounterFunc(
+    "puctee_plan_cache_coalesced_total", "Readers that joined a load running in this process",
+    lambda: plan_cache._loads.coalesced,
+)
+CounterFunc(
+    "puctee_plan_cache_lock_waits_total", "Readers that waited for another process to fill the entry",
+    lambda: plan_cache.lock_waits,
+)
+CounterFunc("puctee_plan_cache_invalidations_total", "Invalidated plan entries", lambda: plan_cache.invalidations)
+CounterFunc("puctee_plan_cache_errors_total", "Failed Redis calls", lambda: plan_cache.errors)
@@ -0,0 +1,282 @@
+"""
+Plan read model for list endpoints
+
+Builds PlanSchema-shaped dicts straight from Postgres instead of loading
+full ORM graphs: each plan row carries its participants, locations,
+penalties and invites as JSON arrays aggregated in correlated subqueries,
+so one list query is one round trip and only the serialized columns are
+ever read (no hashed_password or push_token).
+"""
+from typing import List, Optional, Sequence
+
+from sqlalchemy import JSON, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Location, Penalty, Plan, PlanInvite, User, plan_participants
+
+PLAN_FIELDS = ("id", "title", "start_time", "status", "version", "created_at", "updated_at")
+
+
+def _json_array(columns: dict, order_by, select_from, where):
+    """Correlated subquery returning a JSON array of objects (never NULL)"""
+    # Keys are inlined: untyped bind parameters can't be used with json_build_object
+    obj = func.json_build_object(
+        *[part for key, col in columns.items() for part in (literal_column(f"'{key}'"), col)]
+    )
+    return (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(obj, order_by)),
+            literal_column("'[]'::json"),
+            type_=JSON,
+        ))
+        .select_from(select_from)
+        .where(where)
+        .correlate(Plan)
+        .scalar_subquery()
+    )
+
+
+def plan_columns() -> list:
+    """Columns of a plan row, correlated to Plan, labelled as in PlanSchema"""
+    participants = _json_array(
+        {
+            "id": User.id,
+            "email": User.email,
+            "display_name": User.display_name,
+            "username": User.username,
+            "profile_image_url": User.profile_image_url,
+            "is_active": User.is_active,
+            "created_at": User.created_at,
+            "updated_at": User.updated_at,
+        },
+        User.id,
+        plan_participants.join(User, User.id == plan_participants.c.user_id),
+        plan_participants.c.plan_id == Plan.id,
+    )
+    locations = _json_array(
+        {
+            "id": Location.id,
+            "plan_id": Location.plan_id,
+            "user_id": Location.user_id,
+            "name": Location.name,
+            "latitude": Location.latitude,
+            "longitude": Location.longitude,
+        },
+        Location.id,
+        Location.__table__,
+        Location.plan_id == Plan.id,
+    )
+    penalties = _json_array(
+        {
+            "id": Penalty.id,
+            "plan_id": Penalty.plan_id,
+            "user_id": Penalty.user_id,
+            "content": Penalty.content,
+            "created_at": Penalty.created_at,
+            "updated_at": Penalty.updated_at,
+        },
+        Penalty.id,
+        Penalty.__table__,
+        Penalty.plan_id == Plan.id,
+    )
+    invites = _json_array(
+        {
+            "id": PlanInvite.id,
+            "plan_id": PlanInvite.plan_id,
+            "user_id": PlanInvite.user_id,
+            "status": PlanInvite.status,
+        },
+        PlanInvite.id,
+        PlanInvite.__table__,
+        PlanInvite.plan_id == Plan.id,
+    )
+    return [
+        *[getattr(Plan, field) for field in PLAN_FIELDS],
+        participants.label("participants"),
+        locations.label("locations"),
+        penalties.label("penalties"),
+        invites.label("invites"),
+    ]
+
+
+def _aggregate(value, select_from, where):
+    """Correlated scalar subquery over a plan's child rows"""
+    return select(value).select_from(select_from).where(where).correlate(Plan).scalar_subquery()
+
+
+def _changes(id_col, updated_at, created_at):
+    """
+    Ordered ids and latest write of a set of rows: moves when a row is added,
+    removed or edited (a count or id sum can't tell {3, 7} from {4, 6})
+    """
+    return func.json_build_array(
+        func.json_agg(aggregate_order_by(id_col, id_col)),
+        func.max(func.coalesce(updated_at, created_at)),
+        type_=JSON,
+    )
+
+
+def plan_validator_columns() -> list:
+    """
+    Version and child-row aggregates of a plan row, correlated to Plan.
+    Enough to derive a weak ETag for the plan payload without building it.
+    """
+    participants = _aggregate(
+        _changes(User.id, User.updated_at, User.created_at),
+        plan_participants.join(User, User.id == plan_participants.c.user_id),
+        plan_participants.c.plan_id == Plan.id,
+    )
+    locations = _aggregate(
+        _changes(Location.id, Location.updated_at, Location.created_at),
+        Location.__table__,
+        Location.plan_id == Plan.id,
+    )
+    penalties = _aggregate(
+        _changes(Penalty.id, Penalty.updated_at, Penalty.created_at),
+        Penalty.__table__,
+        Penalty.plan_id == Plan.id,
+    )
+    # Invites have no updated_at; their (id, status) pairs are small enough
+    invites = _aggregate(
+        func.json_agg(
+            aggregate_order_by(func.json_build_array(PlanInvite.id, PlanInvite.status), PlanInvite.id),
+            type_=JSON,
+        ),
+        PlanInvite.__table__,
+        PlanInvite.plan_id == Plan.id,
+    )
+    return [
+        Plan.version,
+        Plan.updated_at,
+        participants.label("participants"),
+        locations.label("locations"),
+        penalties.label("penalties"),
+        invites.label("invites"),
+    ]
+
+
+def plan_validator_query(plan_id: int, user_id: Optional[int] = None):
+    """
+    plan_validator_columns of one plan (restricted to plans the user
+    participates in when user_id is given)
+    """
+    query = select(*plan_validator_columns()).where(Plan.id == plan_id)
+    if user_id is not None:
+        query = query.where(_participating(user_id))
+    return query
+
+
+def _plan_dict(mapping) -> dict:
+    return {
+        **{field: mapping[field] for field in PLAN_FIELDS},
+        "participants": mapping["participants"],
+        "locations": mapping["locations"],
+        "penalties": mapping["penalties"],
+        "invites": mapping["invites"],
+    }
+
+
+def _participating(user_id: int):
+    return Plan.id.in_(
+        select(plan_participants.c.plan_id).where(plan_participants.c.user_id == user_id)
+    )
+
+
+def plans_for_user_query(user_id: int, statuses: Sequence[str], skip: int, limit: int, columns=None):
+    """A page of the user's plans; columns default to the full plan row"""
+    return (
+        select(*(columns or plan_columns()))
+        .where(_participating(user_id), Plan.status.in_(statuses))
+        .order_by(Plan.start_time.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+
+
+def plans_for_user_validator_query(user_id: int, statuses: Sequence[str], skip: int, limit: int):
+    """Validator columns of the page plans_for_user_query returns"""
+    return plans_for_user_query(user_id, statuses, skip, limit, [Plan.id, *plan_validator_columns()])
+
+
+def plans_by_ids_query(plan_ids: Sequence[int], user_id: Optional[int] = None):
+    """Restricted to plans the user still participates in when user_id is given"""
+    query = select(*plan_columns()).where(Plan.id.in_(plan_ids)).order_by(Plan.id)
+    if user_id is not None:
+        query = query.where(_participating(user_id))
+    return query
+
+
+def invites_query(*conditions, columns=None):
+    """Invites with their plan; columns default to the full plan row"""
+    return (
+        select(
+            PlanInvite.id.label("invite_id"),
+            PlanInvite.user_id.label("invite_user_id"),
+            PlanInvite.status.label("invite_status"),
+            *(columns or plan_columns()),
+        )
+        .join(Plan, Plan.id == PlanInvite.plan_id)
+        .where(*conditions)
+        .order_by(PlanInvite.id.desc())
+    )
+
+
+def pending_invites_query(user_id: int, columns=None):
+    return invites_query(
+        PlanInvite.user_id == user_id,
+        PlanInvite.status == "pending",
+        columns=columns,
+    )
+
+
+def pending_invites_validator_query(user_id: int):
+    """Validator columns of the invites pending_invites_query returns"""
+    return pending_invites_query(user_id, [Plan.id, *plan_validator_columns()])
+
+
+async def list_plans_for_user(
+    db: AsyncSession, user_id: int, statuses: Sequence[str], skip: int, limit: int
+) -> List[dict]:
+    result = await db.execute(plans_for_user_query(user_id, statuses, skip, limit))
+    return [_plan_dict(row._mapping) for row in result.all()]
+
+
+async def list_plans_by_ids(
+    db: AsyncSession, plan_ids: Sequence[int], user_id: Optional[int] = None
+) -> List[dict]:
+    if not plan_ids:
+        return []
+    result = await db.execute(plans_by_ids_query(plan_ids, user_id))
+    return [_plan_dict(row._mapping) for row in result.all()]
+
+
+def _invite_dicts(rows) -> List[dict]:
+    """PlanInviteResponse-shaped dicts"""
+    invites = []
+    for row in rows:
+        mapping = row._mapping
+        invites.append({
+            "id": mapping["invite_id"],
+            "plan_id": mapping["id"],
+            "user_id": mapping["invite_user_id"],
+            "status": mapping["invite_status"],
+            "plan": _plan_dict(mapping),
+        })
+    return invites
+
+
+async def list_pending_invites_for_user(db: AsyncSession, user_id: int) -> List[dict]:
+    result = await db.execute(pending_invites_query(user_id))
+    return _invite_dicts(result.all())
+
+
+async def list_invites_by_ids(db: AsyncSession, user_id: int, invite_ids: Sequence[int]) -> List[dict]:
+    """Invites addressed to the user, whatever their status"""
+    if not invite_ids:
+        return []
+    result = await db.execute(invites_query(
+        PlanInvite.id.in_(invite_ids),
+        PlanInvite.user_id == user_id,
+    ))
+    return _invite_dicts(result.all())
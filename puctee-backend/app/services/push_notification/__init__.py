@@ -1,9 +1,18 @@
+import asyncio
+import logging
+from typing import List, Tuple
+
 from app.services.push_notification.notificationClient import notificationClient
 from app.models import Plan
 
-# Create singleton instance
+logger = logging.getLogger(__name__)
+
+# Singleton instance; connects to APNs lazily on the first push
 push_notification_client = notificationClient()
 
+def get_push_notification_client() -> notificationClient:
+    return push_notification_client
+
 # Send friend invite notification
 async def send_friend_invite_notification(device_token: str, sender_username: str, invite_id: int) -> bool:
     """
@@ -52,6 +61,38 @@ async def send_plan_invite_notification(device_token: str, title: str, body: str
         data=data
     )
     
+# Send plan invite notifications to many devices at once
+async def send_plan_invite_notifications(
+    recipients: List[Tuple[int, str]],
+    title: str,
+    body: str,
+    plan_id: int = None
+) -> int:
+    """
+    Send the same plan invite notification to several devices concurrently
+    
+    Args:
+        recipients (List[Tuple[int, str]]): (user ID, device token) pairs
+        title (str): Notification title
+        body (str): Notification body
+        plan_id (int, optional): Plan ID
+        
+    Returns:
+        int: Number of notifications sent successfully
+    """
+    if not recipients:
+        return 0
+    results = await asyncio.gather(
+        *(send_plan_invite_notification(token, title, body, plan_id) for _, token in recipients),
+        return_exceptions=True
+    )
+    for (user_id, _), result in zip(recipients, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to send plan invite notification for plan {plan_id} to user {user_id}: {str(result)}")
+        elif result is not True:
+            logger.warning(f"Failed to send plan invite notification for plan {plan_id} to user {user_id}")
+    return sum(1 for result in results if result is True)
+    
 # Send silent wakeup notification
 async def send_silent_wakeup_arrival_notification(device_token: str, plan_id: int) -> bool:
     """
@@ -73,6 +114,24 @@ async def send_silent_wakeup_arrival_notification(device_token: str, plan_id: in
         }
     )
     
+# Send silent wakeup notifications to a plan's participants
+async def send_silent_wakeup_arrival_notifications(device_tokens: List[str], plan_id: int) -> int:
+    """
+    Send silent wakeup notifications for arrival checking, one device after another
+    
+    Args:
+        device_tokens (List[str]): Device tokens
+        plan_id (int): Plan ID
+        
+    Returns:
+        int: Number of notifications sent successfully
+    """
+    sent = 0
+    for token in device_tokens:
+        if await send_silent_wakeup_arrival_notification(token, plan_id):
+            sent += 1
+    return sent
+    
 # Send arrival check notification
 async def send_arrival_check_notification(
     plan: Plan, 
@@ -136,3 +195,28 @@ async def send_penalty_approval_request_notification(device_token: str, requesti
             "request_id": request_id
         }
     )
+
+# Send penalty approval request notifications to the other participants
+async def send_penalty_approval_request_notifications(
+    device_tokens: List[str],
+    requesting_user_name: str,
+    request_id: int,
+    plan_title: str
+) -> int:
+    """
+    Send penalty approval request notifications, one device after another
+    
+    Args:
+        device_tokens (List[str]): Device tokens
+        requesting_user_name (str): Name of the user requesting approval
+        request_id (int): ID of the penalty approval request
+        plan_title (str): Title of the plan
+        
+    Returns:
+        int: Number of notifications sent successfully
+    """
+    sent = 0
+    for token in device_tokens:
+        if await send_penalty_approval_request_notification(token, requesting_user_name, request_id, plan_title):
+            sent += 1
+    return sent
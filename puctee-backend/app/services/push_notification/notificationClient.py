@@ -1,52 +1,95 @@
+import asyncio
 import os
 import logging
 import ssl
-import boto3
 import tempfile
-from aioapns import APNs, NotificationRequest, PushType
+from urllib.parse import urlsplit
 from app.core.config import settings
+from app.core.metrics import track_dependency
 
 logger = logging.getLogger(__name__)
 
+
+def _use_endpoint(client, endpoint: str) -> None:
+    """Send an aioapns client's pushes to endpoint; aioapns only knows Apple's hosts"""
+    url = urlsplit(endpoint)
+    pool = client.pool
+    pool.protocol_class = type(
+        "APNsEndpointClientProtocol",
+        (pool.protocol_class,),
+        {"APNS_SERVER": url.hostname, "APNS_PORT": url.port or (443 if url.scheme == "https" else 80)},
+    )
+    if url.scheme == "http":
+        pool.ssl_context = None  # HTTP/2 over plain TCP (prior knowledge)
+
 class notificationClient:
+    """
+    APNs client. The signing key is fetched from Secrets Manager on first
+    use (or by warmup()), not at construction, so importing the app stays
+    offline and fast.
+    """
     def __init__(self):
         self.client = None
-        self._initialize_client()
+        self._init_lock = asyncio.Lock()
+
+    async def warmup(self):
+        """Initialize the APNs client if it isn't yet"""
+        async with self._init_lock:
+            if not self.client:
+                try:
+                    # aioapns binds to the running loop when constructed, so only
+                    # the blocking part (Secrets Manager, TLS setup) goes to a thread
+                    key_path, ssl_context = await asyncio.to_thread(self._load_credentials)
+                    self._initialize_client(key_path, ssl_context)
+                except Exception as e:
+                    logger.error(f"Failed to initialize APNs client: {str(e)}", exc_info=True)
+                    raise
+
+    def _load_credentials(self):
+        """Signing key path and TLS context (blocking)"""
+        if settings.APNS_KEY_FILE:
+            key_path = settings.APNS_KEY_FILE
+        else:
+            # boto3 is only needed once a push is actually sent
+            import boto3
 
-    def _initialize_client(self):
-        try:
             # Get authentication key from AWS Secrets Manager
             sm = boto3.client(
                 "secretsmanager",
                 region_name=settings.AWS_REGION
             )
-            resp = sm.get_secret_value(SecretId=settings.APNS_SECRET_ARN)
+            with track_dependency("secretsmanager", "get_secret_value"):
+                resp = sm.get_secret_value(SecretId=settings.APNS_SECRET_ARN)
             key_pem = resp["SecretString"]
-            
+
             # Temporarily write to Lambda's /tmp directory
             with tempfile.NamedTemporaryFile(dir="/tmp", suffix=".p8", delete=False) as tf:
                 tf.write(key_pem.encode())
                 key_path = tf.name
 
-            # SSL context configuration
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-            # Initialize APNs client
-            self.client = APNs(
-                key=key_path,
-                key_id=settings.APNS_AUTH_KEY_ID,
-                team_id=settings.APNS_TEAM_ID,
-                topic=settings.APNS_BUNDLE_ID,
-                use_sandbox=settings.APNS_USE_SANDBOX,
-                ssl_context=ssl_context
-            )
-
-            logger.info("Successfully initialized APNs client")
-        except Exception as e:
-            logger.error(f"Failed to initialize APNs client: {str(e)}", exc_info=True)
-            raise
+        # SSL context configuration
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = ssl.CERT_NONE
+        return key_path, ssl_context
+
+    def _initialize_client(self, key_path: str, ssl_context: ssl.SSLContext):
+        from aioapns import APNs
+
+        # Initialize APNs client
+        self.client = APNs(
+            key=key_path,
+            key_id=settings.APNS_AUTH_KEY_ID,
+            team_id=settings.APNS_TEAM_ID,
+            topic=settings.APNS_BUNDLE_ID,
+            use_sandbox=settings.APNS_USE_SANDBOX,
+            ssl_context=ssl_context
+        )
+        if settings.APNS_ENDPOINT:
+            _use_endpoint(self.client, settings.APNS_ENDPOINT)
+            logger.info(f"APNs client pointed at {settings.APNS_ENDPOINT}")
+
+        logger.info("Successfully initialized APNs client")
 
     async def send_notification(
         self,
@@ -73,12 +116,13 @@ class notificationClient:
         Returns:
             bool: True on successful send, False on failure
         """
+        from aioapns import NotificationRequest, PushType
+
         try:
-            if not self.client:
-                self._initialize_client()
+            await self.warmup()
 
-            logger.info(f"Sending notification to device token: {device_token}")
-            logger.info(f"Notification content - title: {title}, body: {body}")
+            # Per-device logs are DEBUG (sampled); tokens are redacted by the log pipeline
+            logger.debug(f"Sending notification to device token: {device_token}")
 
             # Create notification request
             aps_payload = {
@@ -104,11 +148,11 @@ class notificationClient:
             )
 
             # Send notification
-            logger.info("Sending notification request...")
-            response = await self.client.send_notification(request)
+            with track_dependency("apns", "send_notification"):
+                response = await self.client.send_notification(request)
             
             if response.is_successful:
-                logger.info(f"Successfully sent notification to {device_token}")
+                logger.debug(f"Successfully sent notification to {device_token}")
                 return True
             else:
                 logger.error(f"Failed to send notification: {response.description}")
@@ -137,13 +181,17 @@ class notificationClient:
         Returns:
             bool: True on successful send, False on failure
         """
+        from aioapns import NotificationRequest, PushType
+
         for attempt in range(max_retries + 1):
             try:
                 if not self.client or attempt > 0:
                     logger.info(f"[APNS_RETRY] Initializing APNs client (attempt {attempt + 1}/{max_retries + 1}) for device {device_token}")
-                    self._initialize_client()
+                    if attempt > 0:
+                        self.client = None  # Fresh client for every retry
+                    await self.warmup()
 
-                logger.info(f"[APNS_RETRY] Sending silent notification to device token: {device_token} (attempt {attempt + 1}/{max_retries + 1})")
+                logger.debug(f"[APNS_RETRY] Sending silent notification to device token: {device_token} (attempt {attempt + 1}/{max_retries + 1})")
 
                 # Create silent notification request
                 aps_payload = {
@@ -165,11 +213,11 @@ class notificationClient:
                 )
 
                 # Send notification
-                logger.info(f"[APNS_RETRY] Sending silent notification request (attempt {attempt + 1})...")
-                response = await self.client.send_notification(request)
+                with track_dependency("apns", "send_silent_notification"):
+                    response = await self.client.send_notification(request)
                 
                 if response.is_successful:
-                    logger.info(f"[APNS_RETRY] ✅ Successfully sent silent notification to {device_token} on attempt {attempt + 1}")
+                    logger.debug(f"[APNS_RETRY] ✅ Successfully sent silent notification to {device_token} on attempt {attempt + 1}")
                     return True
                 else:
                     logger.error(f"[APNS_RETRY] ❌ Failed to send silent notification (attempt {attempt + 1}): {response.description}")
@@ -1,11 +1,12 @@
+import asyncio
 import json
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 import uuid
 
-import boto3
 from app.core.config import settings
+from app.core.metrics import track_dependency
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +14,16 @@ SCHEDULE_GROUP = "default"
 
 class EventBridgeSchedulerService:
     def __init__(self):
-        self.scheduler_client = boto3.client('scheduler', region_name=settings.AWS_REGION)
+        self._scheduler_client = None
+
+    @property
+    def scheduler_client(self):
+        """boto3 scheduler client, created on first use"""
+        if self._scheduler_client is None:
+            import boto3
+
+            self._scheduler_client = boto3.client('scheduler', region_name=settings.AWS_REGION)
+        return self._scheduler_client
 
     def _get_schedule_name(self, plan_id: int) -> str:
         return f"puctee-plan-silent-{plan_id}"
@@ -56,20 +66,27 @@ class EventBridgeSchedulerService:
                 },
             }
 
-            resp = self.scheduler_client.create_schedule(
-                Name=schedule_name,
-                GroupName=SCHEDULE_GROUP,
-                ScheduleExpression=schedule_expression,
-                ScheduleExpressionTimezone="UTC",
-                FlexibleTimeWindow={"Mode": "OFF"},
-                Target=target,
-                State="ENABLED",
-                Description=f"Silent notification for plan {plan_id}",
-                ClientToken=str(uuid.uuid4()),
-            )
+            # boto3 is synchronous: keep its calls off the event loop
+            with track_dependency("eventbridge", "create_schedule"):
+                resp = await asyncio.to_thread(
+                    lambda: self.scheduler_client.create_schedule(
+                        Name=schedule_name,
+                        GroupName=SCHEDULE_GROUP,
+                        ScheduleExpression=schedule_expression,
+                        ScheduleExpressionTimezone="UTC",
+                        FlexibleTimeWindow={"Mode": "OFF"},
+                        Target=target,
+                        State="ENABLED",
+                        Description=f"Silent notification for plan {plan_id}",
+                        ClientToken=str(uuid.uuid4()),
+                    )
+                )
             logger.info(f"✅ Created schedule {schedule_name}: {resp.get('ScheduleArn')} at {when_utc.isoformat()}")
 
-            info = self.scheduler_client.get_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
+            with track_dependency("eventbridge", "get_schedule"):
+                info = await asyncio.to_thread(
+                    lambda: self.scheduler_client.get_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
+                )
             logger.info(f"Schedule details - next={info.get('NextInvocationTime')} last={info.get('LastRunTime')}")
 
             return True
@@ -88,7 +105,10 @@ class EventBridgeSchedulerService:
 
     async def _delete_schedule_if_exists(self, schedule_name: str) -> bool:
         try:
-            self.scheduler_client.delete_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
+            with track_dependency("eventbridge", "delete_schedule"):
+                await asyncio.to_thread(
+                    lambda: self.scheduler_client.delete_schedule(Name=schedule_name, GroupName=SCHEDULE_GROUP)
+                )
             logger.info(f"Deleted existing schedule: {schedule_name}")
             return True
         except self.scheduler_client.exceptions.ResourceNotFoundException:
@@ -0,0 +1,135 @@
+"""
+Helpers for compact location history responses:
+Douglas–Peucker track simplification, Google encoded polylines and the
+opaque (created_at, id) cursor used for incremental reads.
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+from math import cos, radians
+from typing import List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_M = 6_371_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _project(points: Sequence[Tuple[float, float]]) -> List[Tuple[float, float]]:
+    """Equirectangular projection to meters around the track's mean latitude"""
+    if not points:
+        return []
+    lat0 = radians(sum(lat for lat, _ in points) / len(points))
+    k = cos(lat0)
+    return [
+        (radians(lon) * EARTH_RADIUS_M * k, radians(lat) * EARTH_RADIUS_M)
+        for lat, lon in points
+    ]
+
+
+def _segment_distance(p, a, b) -> float:
+    (px, py), (ax, ay), (bx, by) = p, a, b
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return ((px - ax) ** 2 + (py - ay) ** 2) ** 0.5
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    cx, cy = ax + t * dx, ay + t * dy
+    return ((px - cx) ** 2 + (py - cy) ** 2) ** 0.5
+
+
+def simplify_indices(points: Sequence[Tuple[float, float]], tolerance_m: float) -> List[int]:
+    """
+    Douglas–Peucker simplification of a (latitude, longitude) track.
+
+    Returns the indices of the points to keep, in order. The first and last
+    points are always kept.
+    """
+    n = len(points)
+    if n <= 2 or tolerance_m <= 0:
+        return list(range(n))
+
+    xy = _project(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        max_dist, index = 0.0, -1
+        for i in range(start + 1, end):
+            dist = _segment_distance(xy[i], xy[start], xy[end])
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index != -1 and max_dist > tolerance_m:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return [i for i, kept in enumerate(keep) if kept]
+
+
+def _encode_value(value: int) -> str:
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(points: Sequence[Tuple[float, float]], precision: int = 5) -> str:
+    """Encode (latitude, longitude) pairs with the Google polyline algorithm"""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        ilat, ilon = round(lat * factor), round(lon * factor)
+        result.append(_encode_value(ilat - prev_lat))
+        result.append(_encode_value(ilon - prev_lon))
+        prev_lat, prev_lon = ilat, ilon
+    return "".join(result)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    factor = 10 ** precision
+    points = []
+    index = lat = lon = 0
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+    return points
+
+
+def delta_encode(values: Sequence[int]) -> List[int]:
+    """First value absolute, the rest as differences from the previous one"""
+    return [v - values[i - 1] if i else v for i, v in enumerate(values)]
+
+
+def encode_cursor(created_at: datetime, point_id: int) -> str:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    raw = f"{micros}:{point_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    """Returns (created_at, id) or None when the cursor is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        micros, point_id = base64.urlsafe_b64decode(padded).decode().split(":")
+        created_at = _EPOCH + timedelta(microseconds=int(micros))
+        point_id = int(point_id)
+    except (ValueError, UnicodeDecodeError, OverflowError, OSError):
+        return None
+    if not 0 <= point_id < 2 ** 63:  # location_points.id is a BIGINT
+        return None
+    return created_at, point_id
@@ -104,4 +104,32 @@ def update_trust_level(trust_stats: UserTrustStats, arrival_status: str) -> str:
     trust_stats.trust_level = new_trust_level
     trust_stats.last_arrival_status = arrival_status
 
-    return explanation 
\ No newline at end of file
+    return explanation 
+
+def apply_arrival_result(trust_stats: UserTrustStats, is_arrived: bool) -> str:
+    """
+    Apply one arrival result to trust statistics (streaks, counters and trust level)
+    
+    Args:
+        trust_stats: User's trust statistics (any object with the same attributes)
+        is_arrived: Whether the user arrived on time
+    
+    Returns:
+        str: Explanation of trust level change
+    """
+    if is_arrived:
+        arrival_status = "on_time"
+        trust_stats.on_time_streak += 1
+        trust_stats.best_on_time_streak = max(
+            trust_stats.best_on_time_streak,
+            trust_stats.on_time_streak
+        )
+    else:
+        arrival_status = "late"
+        trust_stats.late_plans += 1
+        trust_stats.on_time_streak = 0
+
+    # Common statistics update
+    trust_stats.total_plans += 1
+
+    return update_trust_level(trust_stats, arrival_status)
@@ -0,0 +1,314 @@
+"""
+Local APNs stand-in
+
+An HTTP/2 server speaking enough of the APNs provider API
+(POST /3/device/<token>, apns-id, {"reason": ...} error bodies) for aioapns,
+and so notificationClient, to push to it instead of Apple:
+
+    python -m benchmarks.apns_fake --port 2197 --latency-ms 30 --jitter-ms 20 \\
+        --error-rate 0.05 --reasons Unregistered=3,TooManyRequests=1 --write-key /tmp/apns-fake.p8
+    APNS_ENDPOINT=http://127.0.0.1:2197 APNS_KEY_FILE=/tmp/apns-fake.p8 uvicorn app.main:app
+
+Each response is held for latency +/- jitter; a fraction error_rate of them
+fail with a reason drawn from the weighted list, with the status code Apple
+documents for it. Requests without a provider token are rejected the way
+APNs does (403 MissingProviderToken), so a client that fails to sign shows
+up as errors rather than as throughput. Plain HTTP/2 (prior knowledge) by
+default; --tls-cert and --tls-key serve TLS with ALPN h2.
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, DataReceived, RequestReceived, StreamEnded, StreamReset
+from h2.exceptions import ProtocolError
+from h2.settings import SettingCodes
+
+# https://developer.apple.com/documentation/usernotifications/handling-notification-responses-from-apns
+REASON_STATUS = {
+    "BadCollapseId": 400,
+    "BadDeviceToken": 400,
+    "BadExpirationDate": 400,
+    "BadPriority": 400,
+    "BadTopic": 400,
+    "MissingTopic": 400,
+    "PayloadEmpty": 400,
+    "TopicDisallowed": 400,
+    "ExpiredProviderToken": 403,
+    "InvalidProviderToken": 403,
+    "MissingProviderToken": 403,
+    "BadPath": 404,
+    "MethodNotAllowed": 405,
+    "Unregistered": 410,
+    "PayloadTooLarge": 413,
+    "TooManyProviderTokenUpdates": 429,
+    "TooManyRequests": 429,
+    "InternalServerError": 500,
+    "ServiceUnavailable": 503,
+    "Shutdown": 503,
+}
+
+MAX_PAYLOAD_BYTES = 4096
+
+
+def parse_reasons(text: str) -> Dict[str, float]:
+    """"Unregistered=3,TooManyRequests" -> {"Unregistered": 3.0, "TooManyRequests": 1.0}"""
+    reasons = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in REASON_STATUS:
+            raise ValueError(f"Unknown APNs reason {name!r} (expected one of {', '.join(REASON_STATUS)})")
+        reasons[name] = float(weight) if weight else 1.0
+    return reasons
+
+
+@dataclass
+class FakeAPNsConfig:
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.0
+    reasons: Dict[str, float] = field(default_factory=lambda: {"Unregistered": 1.0})
+    max_concurrent_streams: int = 1000
+    seed: Optional[int] = None
+
+
+class FakeAPNsServer:
+    def __init__(
+        self,
+        config: Optional[FakeAPNsConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        self.config = config or FakeAPNsConfig()
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self._rng = random.Random(self.config.seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Stats
+        self.received = 0
+        self.statuses: Counter = Counter()
+        self.reasons: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+
+    @property
+    def endpoint(self) -> str:
+        return f"{'https' if self.ssl_context else 'http'}://{self.host}:{self.port}"
+
+    def decide(self, headers: Dict[str, str], body: bytes) -> Tuple[int, Optional[str]]:
+        """Status and reason (None on success) for one request"""
+        if headers.get(":method") != "POST":
+            reason = "MethodNotAllowed"
+        elif not headers.get(":path", "").startswith("/3/device/"):
+            reason = "BadPath"
+        elif not headers.get("authorization", "").lower().startswith("bearer "):
+            reason = "MissingProviderToken"
+        elif not headers.get("apns-topic"):
+            reason = "MissingTopic"
+        elif not body:
+            reason = "PayloadEmpty"
+        elif len(body) > MAX_PAYLOAD_BYTES:
+            reason = "PayloadTooLarge"
+        elif self.config.error_rate and self._rng.random() < self.config.error_rate:
+            names = list(self.config.reasons)
+            reason = self._rng.choices(names, weights=[self.config.reasons[n] for n in names])[0]
+        else:
+            return 200, None
+        return REASON_STATUS[reason], reason
+
+    def delay_s(self) -> float:
+        jitter = self._rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "received": self.received,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "reasons": dict(self.reasons.most_common()),
+            "max_in_flight": self.max_in_flight,
+        }
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: _APNsServerProtocol(self), self.host, self.port, ssl=self.ssl_context
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> None:
+        """Serve from a loop of its own, so the server's work doesn't queue behind the client's"""
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="apns-fake", daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop_thread(self) -> None:
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+
+class _APNsServerProtocol(asyncio.Protocol):
+    def __init__(self, server: FakeAPNsServer):
+        self.server = server
+        self.conn = H2Connection(H2Configuration(client_side=False, header_encoding="utf-8"))
+        self.transport: Optional[asyncio.Transport] = None
+        self.requests: Dict[int, tuple] = {}  # stream id -> (headers, body)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server.connections += 1
+        self.conn.initiate_connection()
+        self.conn.update_settings({SettingCodes.MAX_CONCURRENT_STREAMS: self.server.config.max_concurrent_streams})
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        try:
+            events = self.conn.receive_data(data)
+        except ProtocolError:
+            self.transport.write(self.conn.data_to_send())
+            self.transport.close()
+            return
+        for event in events:
+            if isinstance(event, RequestReceived):
+                self.requests[event.stream_id] = (dict(event.headers), bytearray())
+            elif isinstance(event, DataReceived):
+                self.requests[event.stream_id][1].extend(event.data)
+                self.conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+            elif isinstance(event, StreamEnded):
+                self._accept(event.stream_id)
+            elif isinstance(event, StreamReset):
+                self.requests.pop(event.stream_id, None)
+            elif isinstance(event, ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    def _accept(self, stream_id: int) -> None:
+        headers, body = self.requests.pop(stream_id)
+        server = self.server
+        server.received += 1
+        server.in_flight += 1
+        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        status, reason = server.decide(headers, bytes(body))
+        apns_id = headers.get("apns-id") or str(uuid.uuid4()).upper()
+        asyncio.get_running_loop().call_later(server.delay_s(), self._respond, stream_id, apns_id, status, reason)
+
+    def _respond(self, stream_id: int, apns_id: str, status: int, reason: Optional[str]) -> None:
+        server = self.server
+        server.in_flight -= 1
+        server.statuses[status] += 1
+        if reason:
+            server.reasons[reason] += 1
+        if self.transport.is_closing():
+            return
+
+        headers = [(":status", str(status)), ("apns-id", apns_id)]
+        if reason is None:
+            self.conn.send_headers(stream_id, headers, end_stream=True)
+        else:
+            error = {"reason": reason}
+            if reason == "Unregistered":
+                error["timestamp"] = int(time.time() * 1000)
+            payload = json.dumps(error).encode()
+            self.conn.send_headers(stream_id, [*headers, ("content-type", "application/json")])
+            self.conn.send_data(stream_id, payload, end_stream=True)
+        self.transport.write(self.conn.data_to_send())
+
+
+def write_signing_key(path: str) -> str:
+    """Write a throwaway ES256 (.p8) key for APNS_KEY_FILE; the fake never checks signatures"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    with open(path, "wb") as f:
+        f.write(pem)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2197)
+    parser.add_argument("--latency-ms", type=float, default=FakeAPNsConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=FakeAPNsConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeAPNsConfig.error_rate)
+    parser.add_argument("--reasons", type=parse_reasons, default="Unregistered", help="weighted, e.g. Unregistered=3,TooManyRequests=1")
+    parser.add_argument("--max-concurrent-streams", type=int, default=FakeAPNsConfig.max_concurrent_streams)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--tls-cert")
+    parser.add_argument("--tls-key")
+    parser.add_argument("--write-key", metavar="PATH", help="also write a throwaway signing key for APNS_KEY_FILE")
+    args = parser.parse_args()
+
+    ssl_context = None
+    if args.tls_cert:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.tls_cert, args.tls_key)
+        ssl_context.set_alpn_protocols(["h2"])
+    if args.write_key:
+        print(f"Signing key: {write_signing_key(args.write_key)}")
+
+    config = FakeAPNsConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        reasons=args.reasons if isinstance(args.reasons, dict) else parse_reasons(args.reasons),
+        max_concurrent_streams=args.max_concurrent_streams,
+        seed=args.seed,
+    )
+    server = FakeAPNsServer(config, args.host, args.port, ssl_context)
+
+    async def serve():
+        await server.start()
+        print(f"Fake APNs listening on {server.endpoint}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+            print(json.dumps(server.stats(), indent=2))
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
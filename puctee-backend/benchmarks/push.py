@@ -0,0 +1,219 @@
+"""
+Push fan-out benchmark against the local APNs stand-in
+
+    python -m benchmarks.push
+    python -m benchmarks.push --flow scheduler --plans 500 --participants 10 --latency-ms 40
+    python -m benchmarks.push --error-rate 0.05 --reasons Unregistered=3,TooManyRequests=1
+    python -m benchmarks.push --endpoint http://127.0.0.1:2197  # a fake already running elsewhere
+
+Sends through the real notificationClient (aioapns, JWT signing, HTTP/2
+connection pool) and the same fan-out helpers the routers use, against
+benchmarks/apns_fake.py started on a thread of its own (or --endpoint):
+
+- scheduler: EventBridge firing the arrival wakeup for --plans plans at once,
+  each waking its participants (send_silent_wakeup_arrival_notifications)
+- penalty: --plans penalty approval requests at once, each notifying the
+  other participants (send_penalty_approval_request_notifications)
+
+Reports pushes per second, per-push latency as the caller sees it (retries
+included) and per-fan-out latency, plus the status codes the fake returned.
+Results go to benchmarks/results/push-<timestamp>.json, compared with the
+previous run.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.apns_fake import FakeAPNsConfig, FakeAPNsServer, parse_reasons, write_signing_key
+from benchmarks.offline import ENV
+from benchmarks.startup import RESULTS_DIR, _git_commit
+from benchmarks.workload import percentile
+
+FLOWS = ("scheduler", "penalty")
+
+
+def _timed(method, latencies: List[float]):
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000)
+    return wrapper
+
+
+async def run_flow(flow: str, plans: int, participants: int, rng: random.Random) -> dict:
+    from app.services import push_notification
+
+    client = push_notification.get_push_notification_client()
+    await client.warmup()  # Key loading and the first connection are not part of the fan-out
+
+    push_ms: List[float] = []
+    fanout_ms: List[float] = []
+    originals = client.send_notification, client.send_silent_notification
+    client.send_notification = _timed(originals[0], push_ms)
+    client.send_silent_notification = _timed(originals[1], push_ms)
+
+    async def fanout(plan_id: int) -> int:
+        tokens = [f"{rng.getrandbits(256):064x}" for _ in range(participants)]
+        started = time.perf_counter()
+        try:
+            if flow == "scheduler":
+                return await push_notification.send_silent_wakeup_arrival_notifications(tokens, plan_id)
+            # The requester isn't notified
+            return await push_notification.send_penalty_approval_request_notifications(
+                tokens[1:], "Load user", plan_id, f"Load plan {plan_id}"
+            )
+        finally:
+            fanout_ms.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    try:
+        sent = sum(await asyncio.gather(*(fanout(plan_id) for plan_id in range(1, plans + 1))))
+    finally:
+        client.send_notification, client.send_silent_notification = originals
+    duration = time.perf_counter() - started
+
+    push_ms.sort()
+    fanout_ms.sort()
+    return {
+        "fanouts": plans,
+        "pushes": len(push_ms),
+        "sent": sent,
+        "failed": len(push_ms) - sent,
+        "duration_s": round(duration, 3),
+        "pushes_per_s": round(len(push_ms) / duration, 1) if duration else None,
+        "push_p50_ms": round(percentile(push_ms, 50), 2),
+        "push_p90_ms": round(percentile(push_ms, 90), 2),
+        "push_p99_ms": round(percentile(push_ms, 99), 2),
+        "push_max_ms": round(push_ms[-1], 2) if push_ms else 0.0,
+        "fanout_p50_ms": round(percentile(fanout_ms, 50), 2),
+        "fanout_p99_ms": round(percentile(fanout_ms, 99), 2),
+    }
+
+
+def latest_result(exclude: Optional[Path] = None) -> Optional[Path]:
+    paths = [Path(p) for p in sorted(glob.glob(str(RESULTS_DIR / "push-*.json")))]
+    paths = [p for p in paths if p != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(current: dict, previous: dict) -> Dict[str, dict]:
+    """Per-flow change of throughput and tail latency"""
+    changes = {}
+    for flow, after in current["flows"].items():
+        before = previous.get("flows", {}).get(flow)
+        if not before:
+            continue
+        changes[flow] = {
+            metric: {
+                "before": before.get(metric),
+                "after": after.get(metric),
+                "change_pct": round((after[metric] - before[metric]) / before[metric] * 100, 1)
+                if before.get(metric) and after.get(metric) is not None else None,
+            }
+            for metric in ("pushes_per_s", "push_p99_ms", "fanout_p99_ms")
+        }
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--flow", action="append", choices=[*FLOWS, "all"], default=None)
+    parser.add_argument("--plans", type=int, default=200, help="fan-outs started at once")
+    parser.add_argument("--participants", type=int, default=8, help="per plan")
+    parser.add_argument("--endpoint", help="use a fake APNs already running there instead of starting one")
+    parser.add_argument("--latency-ms", type=float, default=FakeAPNsConfig.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=FakeAPNsConfig.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=FakeAPNsConfig.error_rate)
+    parser.add_argument("--reasons", type=parse_reasons, default={"Unregistered": 1.0})
+    parser.add_argument("--max-concurrent-streams", type=int, default=FakeAPNsConfig.max_concurrent_streams)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verbose", action="store_true", help="show the app's push logs")
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/push-<timestamp>.json")
+    parser.add_argument("--compare", type=Path, help="defaults to the latest earlier result")
+    args = parser.parse_args()
+    flows = list(FLOWS) if not args.flow or "all" in args.flow else args.flow
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    server = None
+    if args.endpoint:
+        endpoint = args.endpoint
+    else:
+        server = FakeAPNsServer(FakeAPNsConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            reasons=args.reasons,
+            max_concurrent_streams=args.max_concurrent_streams,
+            seed=args.seed,
+        ))
+        server.start_in_thread()
+        endpoint = server.endpoint
+
+    key_dir = tempfile.TemporaryDirectory()
+    # Settings are read when the app is first imported
+    for key, value in ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["APNS_ENDPOINT"] = endpoint
+    os.environ["APNS_KEY_FILE"] = write_signing_key(os.path.join(key_dir.name, "apns.p8"))
+
+    rng = random.Random(args.seed)
+    results = {}
+
+    async def run_all():
+        for flow in flows:
+            statuses_before = dict(server.statuses) if server else {}
+            results[flow] = await run_flow(flow, args.plans, args.participants, rng)
+            if server:
+                results[flow]["apns_statuses"] = {
+                    str(status): count - statuses_before.get(status, 0)
+                    for status, count in sorted(server.statuses.items())
+                    if count - statuses_before.get(status, 0)
+                }
+
+    try:
+        asyncio.run(run_all())
+    finally:
+        if server:
+            server.stop_thread()
+        key_dir.cleanup()
+
+    now = datetime.now(timezone.utc)
+    result = {
+        "benchmark": "push",
+        "recorded_at": now.isoformat(),
+        "commit": _git_commit(),
+        "options": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "verbose")},
+        "server": server.stats() if server else {"endpoint": endpoint},
+        "flows": results,
+    }
+    output = args.output or RESULTS_DIR / f"push-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+    baseline = args.compare or latest_result(exclude=output)
+    if baseline is not None and baseline.exists():
+        result["compared_to"] = str(baseline)
+        result["changes"] = compare(result, json.loads(baseline.read_text()))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, default=str))
+
+    print(f"{'flow':10} {'pushes':>7} {'failed':>7} {'push/s':>9} {'p50':>8} {'p99':>8} {'max':>8} {'fanout p99':>11}")
+    for flow, r in results.items():
+        print(
+            f"{flow:10} {r['pushes']:>7} {r['failed']:>7} {r['pushes_per_s'] or 0:>9} {r['push_p50_ms']:>8} "
+            f"{r['push_p99_ms']:>8} {r['push_max_ms']:>8} {r['fanout_p99_ms']:>11}"
+        )
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
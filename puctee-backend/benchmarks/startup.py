@@ -0,0 +1,225 @@
+"""
+Startup benchmark: import cost, time to first response and baseline RSS
+
+Every run uses a fresh interpreter with the offline stand-ins from
+benchmarks.offline (no AWS, APNs, Redis or .env needed):
+
+- import_ms / startup_ms / first_request_ms: importing app.main, running
+  the lifespan startup, answering GET /health (ASGI called directly)
+- rss_kb: resident memory after the first response
+- imports: per-module cost from `python -X importtime -c "import app.main"`,
+  the slowest modules and the total per top-level package
+
+Results are written as JSON to benchmarks/results/ and compared with the
+previous result found there.
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --warm-clients --compare benchmarks/results/startup-....json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.offline import ENV
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+TIMING_METRICS = ("import_ms", "startup_ms", "first_request_ms", "rss_kb")
+
+# Runs in the child interpreter. Talks ASGI directly so the numbers don't
+# include an HTTP client or server.
+_PROBE = """
+import asyncio, json, resource, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+import benchmarks.offline
+benchmarks.offline.install()
+
+async def get(path):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Peak, in kB on Linux
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        status = await get("/health")
+        answered = time.perf_counter()
+        warmup = getattr(app.state, "client_warmup", None)
+        if warmup is not None:
+            await warmup
+        memory = rss_kb()
+    assert status == 200, status
+    return ready, answered, memory
+
+ready, answered, memory = asyncio.run(main())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "rss_kb": memory,
+}))
+"""
+
+
+def _child_env(warm_clients: bool) -> Dict[str, str]:
+    env = {**os.environ, **ENV}
+    env["WARM_EXTERNAL_CLIENTS"] = "true" if warm_clients else "false"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")]))
+    return env
+
+
+def run_probe(warm_clients: bool) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR, env=_child_env(warm_clients), check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Rows of `-X importtime` output: import time: self [us] | cumulative | module"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def import_profile(top: int) -> dict:
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=_child_env(False), check=True, capture_output=True, text=True
+    ).stderr
+    modules = parse_importtime(stderr)
+    packages: Dict[str, float] = {}
+    for module in modules:
+        package = module["module"].split(".")[0]
+        packages[package] = packages.get(package, 0.0) + module["self_ms"]
+    app_main = next((m for m in modules if m["module"] == "app.main"), None)
+    return {
+        "total_ms": round(app_main["cumulative_ms"], 1) if app_main else None,
+        "module_count": len(modules),
+        "slowest_modules": sorted(modules, key=lambda m: m["self_ms"], reverse=True)[:top],
+        "packages_ms": {
+            name: round(ms, 1)
+            for name, ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(exclude: Optional[Path] = None) -> Optional[Path]:
+    paths = [Path(p) for p in sorted(glob.glob(str(RESULTS_DIR / "startup-*.json")))]
+    paths = [p for p in paths if p != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(current: dict, previous: dict) -> Dict[str, dict]:
+    """Per-metric change of the medians (positive = slower/bigger)"""
+    changes = {}
+    for metric in TIMING_METRICS:
+        before = previous.get("median", {}).get(metric)
+        after = current["median"].get(metric)
+        if before is None or after is None:
+            continue
+        changes[metric] = {
+            "before": before,
+            "after": after,
+            "change_pct": round((after - before) / before * 100, 1) if before else None,
+        }
+    return changes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="modules/packages kept in the import profile")
+    parser.add_argument("--warm-clients", action="store_true", help="warm external clients during startup")
+    parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/startup-<timestamp>.json")
+    parser.add_argument("--compare", type=Path, help="defaults to the latest earlier result")
+    args = parser.parse_args()
+
+    runs = [run_probe(args.warm_clients) for _ in range(args.runs)]
+    now = datetime.now(timezone.utc)
+    result = {
+        "benchmark": "startup",
+        "recorded_at": now.isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "warm_clients": args.warm_clients,
+        "runs": runs,
+        "median": {
+            metric: round(statistics.median(run[metric] for run in runs), 1)
+            for metric in TIMING_METRICS
+        },
+        "imports": import_profile(args.top),
+    }
+
+    output = args.output or RESULTS_DIR / f"startup-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+    baseline = args.compare or latest_result(exclude=output)
+    if baseline is not None and baseline.exists():
+        result["compared_to"] = str(baseline)
+        result["changes"] = compare(result, json.loads(baseline.read_text()))
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    print(json.dumps({key: result[key] for key in ("median", "changes") if key in result}, indent=2))
+    print(f"app.main import (importtime): {result['imports']['total_ms']} ms")
+    for module in result["imports"]["slowest_modules"][:10]:
+        print(f"  {module['self_ms']:8.1f} ms  {module['module']}")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
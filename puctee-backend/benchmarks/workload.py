@@ -0,0 +1,596 @@
+"""
+Synthetic workload: seed Postgres at scale, then drive realistic scenarios
+
+    python -m benchmarks.workload seed --users 5000 --friends 20 --plans 1500
+    python -m benchmarks.workload run --scenario all
+    python -m benchmarks.workload run --scenario arrival_stampede --scenario home_refresh
+    python -m benchmarks.workload reset
+
+Seeding needs a scratch database migrated with `alembic upgrade head`
+(DATABASE_URL). Every seeded row hangs off a `load_` user or a "Load plan",
+so reset only removes what seed created. Runs call the ASGI app directly
+(no server, no HTTP client) with the lifespan running and the offline APNs,
+S3 and EventBridge stand-ins from benchmarks.offline installed; REDIS_URL
+is honoured if set, so the plan cache can be measured on and off.
+
+Scenarios:
+- arrival_stampede: every participant of the plans starting "now" posts
+  an arrival check at the same moment (POST /api/plans/{plan_id}/arrival)
+- friend_search: users type a name one letter at a time
+  (GET /api/users/filter?query=...)
+- home_refresh: users pull the home screen repeatedly, passing back the
+  section validators they already have (GET /api/home?known=...)
+- plan_detail: participants open their plans twice, the second time with
+  If-None-Match (GET /api/plans/{plan_id})
+
+Throughput and latency percentiles per endpoint are printed and written to
+benchmarks/results/workload-<timestamp>.json, compared with the previous run.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from benchmarks.offline import ENV
+from benchmarks.startup import RESULTS_DIR, _git_commit
+
+USER_PREFIX = "load_"
+PLAN_PREFIX = "Load plan"
+CHUNK = 1000
+
+FIRST_NAMES = [
+    "Aiko", "Akira", "Ben", "Chloe", "Daiki", "Emma", "Haruto", "Hana", "Isaac", "Kaito",
+    "Kenta", "Lena", "Liam", "Mai", "Mia", "Noah", "Olivia", "Ren", "Riku", "Sakura",
+    "Sara", "Sora", "Takumi", "Yui", "Yuki", "Yuto", "Zoe", "Marco", "Nina", "Oscar",
+]
+LAST_NAMES = [
+    "Abe", "Brown", "Chen", "Endo", "Fujita", "Garcia", "Hayashi", "Ito", "Kato", "Kim",
+    "Lee", "Mori", "Nakamura", "Ogawa", "Sato", "Smith", "Suzuki", "Tanaka", "Ueda", "Wang",
+]
+# Around Tokyo; plan destinations are scattered in this box
+CENTER = (35.6812, 139.7671)
+SPREAD_DEGREES = 0.2
+
+
+@dataclass
+class WorkloadConfig:
+    users: int = 1000
+    friends: int = 20  # Average friends per user
+    plans: int = 300
+    participants: int = 5  # Per plan, creator included
+    points: int = 20  # Location points per participant
+    notifications: int = 10  # Per user
+    stampede_plans: int = 20  # Plans starting at seed time
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    """Seed rows by index; ids are assigned by the database"""
+    users: List[dict] = field(default_factory=list)
+    friendships: List[Tuple[int, int]] = field(default_factory=list)  # (user index, user index), a < b
+    plans: List[dict] = field(default_factory=list)
+    participants: List[List[int]] = field(default_factory=list)  # Per plan, user indexes, creator first
+
+
+def generate(config: WorkloadConfig, now: datetime) -> Dataset:
+    """Deterministic users, friend graph and plans for a config"""
+    rng = random.Random(config.seed)
+    data = Dataset()
+
+    for i in range(config.users):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        data.users.append({
+            "username": f"{USER_PREFIX}{first.lower()}_{last.lower()}_{i}",
+            "email": f"{USER_PREFIX}{i}@example.com",
+            "display_name": f"{first} {last}",
+            "push_token": f"{i:064x}",
+        })
+
+    # Each user befriends friends/2 others, so the average degree is ~friends
+    edges = set()
+    for a in range(config.users):
+        for _ in range(config.friends // 2):
+            b = rng.randrange(config.users)
+            if a != b:
+                edges.add((min(a, b), max(a, b)))
+    data.friendships = sorted(edges)
+
+    for p in range(config.plans):
+        stampede = p < config.stampede_plans
+        start = now if stampede else now + timedelta(minutes=rng.randint(-14 * 24 * 60, 14 * 24 * 60))
+        data.plans.append({
+            "title": f"{PLAN_PREFIX} {p}",
+            "start_time": start,
+            "status": "upcoming" if start >= now else "completed",
+            "latitude": CENTER[0] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+            "longitude": CENTER[1] + rng.uniform(-SPREAD_DEGREES, SPREAD_DEGREES),
+        })
+        size = min(config.participants, config.users)
+        data.participants.append(rng.sample(range(config.users), size))
+    return data
+
+
+def _chunks(rows: list, size: int = CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+async def seed(config: WorkloadConfig) -> dict:
+    from sqlalchemy import insert, select
+
+    from app.core.auth import get_password_hash
+    from app.db.session import AsyncSessionLocal
+    from app.models import (
+        Location, LocationPoint, Notification, Plan, User, UserTrustStats, plan_participants, user_friends,
+    )
+    from app.services.location_history import ensure_partitions
+
+    now = datetime.now(timezone.utc)
+    data = generate(config, now)
+    rng = random.Random(config.seed + 1)
+    hashed_password = get_password_hash("workload")  # bcrypt once, shared by every user
+
+    async with AsyncSessionLocal() as db:
+        existing = await db.execute(select(User.id).where(User.username.like(f"{USER_PREFIX}%")).limit(1))
+        if existing.first():
+            raise SystemExit("Workload data already present; run `python -m benchmarks.workload reset` first")
+
+        user_ids: List[int] = []
+        for rows in _chunks([{**u, "hashed_password": hashed_password, "is_active": True} for u in data.users]):
+            result = await db.execute(insert(User).returning(User.id, sort_by_parameter_order=True), rows)
+            user_ids.extend(result.scalars().all())
+        for rows in _chunks([{"user_id": uid} for uid in user_ids]):
+            await db.execute(insert(UserTrustStats), rows)
+
+        friend_rows = []
+        for a, b in data.friendships:
+            friend_rows.append({"user_id": user_ids[a], "friend_id": user_ids[b]})
+            friend_rows.append({"user_id": user_ids[b], "friend_id": user_ids[a]})
+        for rows in _chunks(friend_rows):
+            await db.execute(insert(user_friends), rows)
+
+        plan_ids: List[int] = []
+        plan_rows = [{k: p[k] for k in ("title", "start_time", "status")} for p in data.plans]
+        for rows in _chunks(plan_rows):
+            result = await db.execute(insert(Plan).returning(Plan.id, sort_by_parameter_order=True), rows)
+            plan_ids.extend(result.scalars().all())
+
+        participant_rows, location_rows = [], []
+        for plan_id, plan, members in zip(plan_ids, data.plans, data.participants):
+            participant_rows.extend({"plan_id": plan_id, "user_id": user_ids[i]} for i in members)
+            location_rows.append({
+                "plan_id": plan_id, "user_id": user_ids[members[0]], "name": plan["title"],
+                "latitude": plan["latitude"], "longitude": plan["longitude"],
+            })
+        for rows in _chunks(participant_rows):
+            await db.execute(insert(plan_participants), rows)
+        for rows in _chunks(location_rows):
+            await db.execute(insert(Location), rows)
+
+        # Recent tracks converging on each destination
+        await ensure_partitions(db, (now - timedelta(days=1)).date(), 2)
+        point_rows = []
+        for plan_id, plan, members in zip(plan_ids, data.plans, data.participants):
+            for i in members:
+                for step in range(config.points):
+                    remaining = (config.points - step) / config.points
+                    point_rows.append({
+                        "plan_id": plan_id, "user_id": user_ids[i],
+                        "latitude": plan["latitude"] + rng.uniform(-0.02, 0.02) * remaining,
+                        "longitude": plan["longitude"] + rng.uniform(-0.02, 0.02) * remaining,
+                        "created_at": now - timedelta(seconds=15 * (config.points - step)),
+                    })
+        for rows in _chunks(point_rows):
+            await db.execute(insert(LocationPoint), rows)
+
+        notification_rows = [
+            {
+                "user_id": uid, "title": "Plan invitation", "content": f"You were invited to {PLAN_PREFIX} {n}",
+                "type": "plan_invite", "is_read": rng.random() < 0.7,
+            }
+            for uid in user_ids for n in range(config.notifications)
+        ]
+        for rows in _chunks(notification_rows):
+            await db.execute(insert(Notification), rows)
+
+        await db.commit()
+
+    return {
+        "users": len(user_ids),
+        "friendships": len(data.friendships),
+        "plans": len(plan_ids),
+        "participants": len(participant_rows),
+        "location_points": len(point_rows),
+        "notifications": len(notification_rows),
+    }
+
+
+# Children first; change_log rows come from the triggers on the seeded tables
+_RESET_SQL = [
+    "DELETE FROM change_log WHERE user_id = ANY(:user_ids)",
+    "DELETE FROM notifications WHERE user_id = ANY(:user_ids)",
+    "DELETE FROM location_points WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM location_track_summaries WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM locations WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM penalty_approval_requests WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM penalties WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM plan_invites WHERE plan_id = ANY(:plan_ids)",
+    "DELETE FROM plan_participants WHERE plan_id = ANY(:plan_ids) OR user_id = ANY(:user_ids)",
+    "DELETE FROM plans WHERE id = ANY(:plan_ids)",
+    "DELETE FROM user_friends WHERE user_id = ANY(:user_ids) OR friend_id = ANY(:user_ids)",
+    "DELETE FROM friend_invites WHERE sender_id = ANY(:user_ids) OR receiver_id = ANY(:user_ids)",
+    "DELETE FROM user_trust_stats WHERE user_id = ANY(:user_ids)",
+    "DELETE FROM users WHERE id = ANY(:user_ids)",
+]
+
+
+async def reset() -> dict:
+    from sqlalchemy import select, text
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import Plan, User
+
+    async with AsyncSessionLocal() as db:
+        user_ids = (await db.execute(select(User.id).where(User.username.like(f"{USER_PREFIX}%")))).scalars().all()
+        plan_ids = (await db.execute(select(Plan.id).where(Plan.title.like(f"{PLAN_PREFIX} %")))).scalars().all()
+        for statement in _RESET_SQL:
+            await db.execute(text(statement), {"user_ids": list(user_ids), "plan_ids": list(plan_ids)})
+        await db.commit()
+    return {"users": len(user_ids), "plans": len(plan_ids)}
+
+
+@dataclass
+class Population:
+    users: List[Tuple[int, str, str]]  # (id, username, display_name)
+    plans_by_user: Dict[str, List[int]]
+    stampede: List[Tuple[int, float, float, List[str]]]  # (plan_id, latitude, longitude, usernames)
+
+
+async def load_population(stampede_plans: int) -> Population:
+    from sqlalchemy import select
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import Location, Plan, User, plan_participants
+
+    async with AsyncSessionLocal() as db:
+        users = (await db.execute(
+            select(User.id, User.username, User.display_name)
+            .where(User.username.like(f"{USER_PREFIX}%")).order_by(User.id)
+        )).all()
+        memberships = (await db.execute(
+            select(plan_participants.c.plan_id, User.username)
+            .join(User, User.id == plan_participants.c.user_id)
+            .join(Plan, Plan.id == plan_participants.c.plan_id)
+            .where(Plan.title.like(f"{PLAN_PREFIX} %"))
+        )).all()
+        # Seeded in order, so the first plans are the ones starting "now"
+        starting = (await db.execute(
+            select(Plan.id, Location.latitude, Location.longitude)
+            .join(Location, Location.plan_id == Plan.id)
+            .where(Plan.title.like(f"{PLAN_PREFIX} %")).order_by(Plan.id).limit(stampede_plans)
+        )).all()
+
+    if not users:
+        raise SystemExit("No workload data; run `python -m benchmarks.workload seed` first")
+    plans_by_user: Dict[str, List[int]] = {}
+    members_by_plan: Dict[int, List[str]] = {}
+    for plan_id, username in memberships:
+        plans_by_user.setdefault(username, []).append(plan_id)
+        members_by_plan.setdefault(plan_id, []).append(username)
+    return Population(
+        users=[tuple(u) for u in users],
+        plans_by_user=plans_by_user,
+        stampede=[(p.id, p.latitude, p.longitude, members_by_plan.get(p.id, [])) for p in starting],
+    )
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._samples: Dict[str, List[Tuple[float, float, int]]] = {}  # label -> (started, ended, status)
+
+    def record(self, label: str, started: float, ended: float, status: int) -> None:
+        self._samples.setdefault(label, []).append((started, ended, status))
+
+    def report(self) -> Dict[str, dict]:
+        endpoints = {}
+        for label, samples in sorted(self._samples.items()):
+            latencies = sorted((ended - started) * 1000 for started, ended, _ in samples)
+            window = max(ended for _, ended, _ in samples) - min(started for started, _, _ in samples)
+            statuses: Dict[str, int] = {}
+            for _, _, status in samples:
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": sum(1 for _, _, status in samples if status >= 500),
+                "statuses": statuses,
+                "throughput_rps": round(len(samples) / window, 1) if window > 0 else None,
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p90_ms": round(percentile(latencies, 90), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "max_ms": round(latencies[-1], 2),
+            }
+        return endpoints
+
+
+class Client:
+    """Calls the ASGI app in-process and records every request under its label"""
+
+    def __init__(self, app, recorder: Recorder):
+        self.app = app
+        self.recorder = recorder
+        self._tokens: Dict[str, str] = {}
+
+    def _token(self, username: str) -> str:
+        from app.core.auth import create_access_token
+
+        token = self._tokens.get(username)
+        if token is None:
+            token = self._tokens[username] = create_access_token({"sub": username}, timedelta(hours=2))
+        return token
+
+    async def request(
+        self,
+        label: str,
+        method: str,
+        path: str,
+        user: str,
+        query: Optional[list] = None,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[dict] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        payload = json.dumps(body).encode() if body is not None else b""
+        raw_headers = [(b"host", b"workload"), (b"authorization", f"Bearer {self._token(user)}".encode())]
+        raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+        if body is not None:
+            raw_headers.append((b"content-type", b"application/json"))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": urlencode(query or [], doseq=True).encode(), "root_path": "",
+            "headers": raw_headers, "client": ("127.0.0.1", 0), "server": ("workload", 80),
+        }
+        response = {"status": 0, "headers": {}, "body": []}
+        done = asyncio.Event()
+        delivered = False
+
+        async def receive():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+                if not message.get("more_body"):
+                    done.set()
+
+        started = time.perf_counter()
+        await self.app(scope, receive, send)
+        self.recorder.record(label, started, time.perf_counter(), response["status"])
+        return response["status"], response["headers"], b"".join(response["body"])
+
+
+async def arrival_stampede(client: Client, population: Population, options, rng: random.Random) -> None:
+    from sqlalchemy import update
+
+    from app.db.session import AsyncSessionLocal
+    from app.models import Plan, plan_participants
+
+    plan_ids = [plan_id for plan_id, _, _, _ in population.stampede]
+    # Start the plans now and clear previous runs' results so every check is evaluated
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Plan).where(Plan.id.in_(plan_ids)).values(start_time=datetime.now(timezone.utc)))
+        await db.execute(
+            update(plan_participants).where(plan_participants.c.plan_id.in_(plan_ids))
+            .values(arrival_status=None, checked_at=None)
+        )
+        await db.commit()
+
+    checks = []
+    for plan_id, latitude, longitude, usernames in population.stampede:
+        for username in usernames:
+            # Most have arrived (within ~50 m), the rest are still a few km away
+            offset = 0.0004 if rng.random() < options.arrived_ratio else 0.03
+            body = {"latitude": latitude + rng.uniform(-offset, offset), "longitude": longitude + rng.uniform(-offset, offset)}
+            checks.append(client.request(
+                "POST /api/plans/{plan_id}/arrival", "POST", f"/api/plans/{plan_id}/arrival", username, body=body
+            ))
+    await asyncio.gather(*checks)
+
+
+async def friend_search(client: Client, population: Population, options, rng: random.Random) -> None:
+    async def searcher(username: str, target: str):
+        for length in range(1, min(len(target), options.max_query_length) + 1):
+            await client.request(
+                "GET /api/users/filter", "GET", "/api/users/filter", username, query=[("query", target[:length])]
+            )
+            await asyncio.sleep(options.typing_ms / 1000)
+
+    users = rng.sample(population.users, min(options.searchers, len(population.users)))
+    await asyncio.gather(*[
+        searcher(username, rng.choice(population.users)[2]) for _, username, _ in users
+    ])
+
+
+async def home_refresh(client: Client, population: Population, options, rng: random.Random) -> None:
+    async def refresher(username: str):
+        known: List[str] = []
+        for _ in range(options.refreshes):
+            status, _, body = await client.request(
+                "GET /api/home", "GET", "/api/home", username, query=[("known", k) for k in known]
+            )
+            if status == 200:
+                validators = json.loads(body).get("validators") or {}
+                known = [f"{section}:{etag}" for section, etag in validators.items()]
+            await asyncio.sleep(rng.uniform(0, options.think_ms / 1000))
+
+    users = rng.sample(population.users, min(options.refreshers, len(population.users)))
+    await asyncio.gather(*[refresher(username) for _, username, _ in users])
+
+
+async def plan_detail(client: Client, population: Population, options, rng: random.Random) -> None:
+    async def reader(username: str, plan_ids: List[int]):
+        for plan_id in plan_ids:
+            status, headers, _ = await client.request(
+                "GET /api/plans/{plan_id}", "GET", f"/api/plans/{plan_id}", username
+            )
+            if status == 200 and "etag" in headers:
+                await client.request(
+                    "GET /api/plans/{plan_id}", "GET", f"/api/plans/{plan_id}", username,
+                    headers={"If-None-Match": headers["etag"]},
+                )
+
+    readers = [u for u in population.users if u[1] in population.plans_by_user]
+    readers = rng.sample(readers, min(options.readers, len(readers)))
+    await asyncio.gather(*[reader(username, population.plans_by_user[username][:3]) for _, username, _ in readers])
+
+
+SCENARIOS = {
+    "arrival_stampede": arrival_stampede,
+    "friend_search": friend_search,
+    "home_refresh": home_refresh,
+    "plan_detail": plan_detail,
+}
+
+
+def latest_result(exclude: Optional[Path] = None) -> Optional[Path]:
+    paths = [Path(p) for p in sorted(glob.glob(str(RESULTS_DIR / "workload-*.json")))]
+    paths = [p for p in paths if p != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(current: dict, previous: dict) -> Dict[str, dict]:
+    """Per-endpoint change of p50, p99 and throughput (positive = slower/higher)"""
+    changes = {}
+    for scenario, result in current["scenarios"].items():
+        before_endpoints = previous.get("scenarios", {}).get(scenario, {}).get("endpoints", {})
+        for label, after in result["endpoints"].items():
+            before = before_endpoints.get(label)
+            if not before:
+                continue
+            changes[f"{scenario} {label}"] = {
+                metric: {
+                    "before": before.get(metric),
+                    "after": after.get(metric),
+                    "change_pct": round((after[metric] - before[metric]) / before[metric] * 100, 1)
+                    if before.get(metric) and after.get(metric) is not None else None,
+                }
+                for metric in ("p50_ms", "p99_ms", "throughput_rps")
+            }
+    return changes
+
+
+async def run(args) -> dict:
+    from app.main import app
+    import benchmarks.offline
+
+    benchmarks.offline.install()
+    rng = random.Random(args.seed)
+    scenarios = list(SCENARIOS) if "all" in args.scenario else args.scenario
+    results = {}
+    async with app.router.lifespan_context(app):
+        population = await load_population(args.stampede_plans)
+        for name in scenarios:
+            recorder = Recorder()
+            started = time.perf_counter()
+            await SCENARIOS[name](Client(app, recorder), population, args, rng)
+            results[name] = {"duration_s": round(time.perf_counter() - started, 2), "endpoints": recorder.report()}
+    return results
+
+
+def _print_report(scenarios: Dict[str, dict]) -> None:
+    print(f"{'scenario / endpoint':58} {'reqs':>6} {'err':>4} {'rps':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, result in scenarios.items():
+        for label, s in result["endpoints"].items():
+            print(
+                f"{name + ' ' + label:58} {s['requests']:>6} {s['errors']:>4} {s['throughput_rps'] or 0:>8} "
+                f"{s['p50_ms']:>8} {s['p90_ms']:>8} {s['p99_ms']:>8} {s['max_ms']:>8}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="insert synthetic users, friends, plans, tracks and notifications")
+    for name, default in asdict(WorkloadConfig()).items():
+        seed_parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default)
+
+    commands.add_parser("reset", help="delete everything seed created")
+
+    run_parser = commands.add_parser("run", help="drive scenarios against the in-process app")
+    run_parser.add_argument("--scenario", action="append", choices=[*SCENARIOS, "all"], default=None)
+    run_parser.add_argument("--stampede-plans", type=int, default=WorkloadConfig.stampede_plans)
+    run_parser.add_argument("--arrived-ratio", type=float, default=0.8)
+    run_parser.add_argument("--searchers", type=int, default=50)
+    run_parser.add_argument("--typing-ms", type=float, default=120)
+    run_parser.add_argument("--max-query-length", type=int, default=6)
+    run_parser.add_argument("--refreshers", type=int, default=100)
+    run_parser.add_argument("--refreshes", type=int, default=5)
+    run_parser.add_argument("--think-ms", type=float, default=500)
+    run_parser.add_argument("--readers", type=int, default=100)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", type=Path, help="defaults to benchmarks/results/workload-<timestamp>.json")
+    run_parser.add_argument("--compare", type=Path, help="defaults to the latest earlier result")
+    args = parser.parse_args()
+
+    # Real database (and Redis, if set) from the environment; everything else offline
+    for key, value in ENV.items():
+        if key not in ("DATABASE_URL", "REDIS_URL"):
+            os.environ.setdefault(key, value)
+
+    if args.command == "seed":
+        config = WorkloadConfig(**{name: getattr(args, name) for name in asdict(WorkloadConfig())})
+        print(json.dumps(asyncio.run(seed(config)), indent=2))
+        return
+    if args.command == "reset":
+        print(json.dumps(asyncio.run(reset()), indent=2))
+        return
+
+    args.scenario = args.scenario or ["all"]
+    now = datetime.now(timezone.utc)
+    result = {
+        "benchmark": "workload",
+        "recorded_at": now.isoformat(),
+        "commit": _git_commit(),
+        "options": {k: v for k, v in vars(args).items() if k not in ("command", "output", "compare")},
+        "scenarios": asyncio.run(run(args)),
+    }
+    output = args.output or RESULTS_DIR / f"workload-{now.strftime('%Y%m%dT%H%M%SZ')}.json"
+    baseline = args.compare or latest_result(exclude=output)
+    if baseline is not None and baseline.exists():
+        result["compared_to"] = str(baseline)
+        result["changes"] = compare(result, json.loads(baseline.read_text()))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, default=str))
+
+    _print_report(result["scenarios"])
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+pytest_plugins = ["loop_blocking"]
+
 import pytest
 import asyncio
 from typing import AsyncGenerator, Generator
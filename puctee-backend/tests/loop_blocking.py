@@ -0,0 +1,54 @@
+"""
+pytest plugin: fail tests that block the event loop
+
+Every callback an event loop runs during a test (asyncio.run or
+pytest-asyncio) is timed. A test whose callbacks ran longer than the budget
+fails with the stack captured while the loop was blocked.
+
+    pytest --loop-block-budget 0.05
+    @pytest.mark.loop_block_budget(1.0)  # per test, 0 disables
+"""
+import pytest
+
+from app.core.loop_monitor import blocked_callbacks
+
+DEFAULT_BUDGET_SECONDS = 0.2
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--loop-block-budget", type=float, default=None,
+        help="fail tests whose event loop callbacks run longer than this many seconds (0 disables)",
+    )
+    parser.addini("loop_block_budget", "default for --loop-block-budget", default=str(DEFAULT_BUDGET_SECONDS))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "loop_block_budget(seconds): event loop blocking budget for this test")
+
+
+def _budget(item) -> float:
+    marker = item.get_closest_marker("loop_block_budget")
+    if marker is not None:
+        return marker.args[0]
+    option = item.config.getoption("--loop-block-budget")
+    return option if option is not None else float(item.config.getini("loop_block_budget"))
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    budget = _budget(item)
+    if not budget:
+        return (yield)
+
+    timer, blocked = blocked_callbacks(budget)
+    with timer:
+        result = yield
+    if blocked:
+        worst = max(blocked, key=lambda b: b.duration_s)
+        pytest.fail(
+            f"{len(blocked)} event loop callback(s) ran longer than the {budget * 1000:.0f} ms budget\n"
+            f"{worst.describe()}",
+            pytrace=False,
+        )
+    return result
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from aioapns import APNs, NotificationRequest
+
+from app.services.push_notification.notificationClient import _use_endpoint
+from benchmarks.apns_fake import FakeAPNsConfig, FakeAPNsServer, parse_reasons, write_signing_key
+
+TOKEN = "ab" * 32
+
+
+def test_parse_reasons():
+    assert parse_reasons("Unregistered=3,TooManyRequests") == {"Unregistered": 3.0, "TooManyRequests": 1.0}
+    with pytest.raises(ValueError):
+        parse_reasons("NotAReason")
+
+
+async def send_through_fake(config: FakeAPNsConfig, key_path: str, count: int):
+    server = FakeAPNsServer(config)
+    await server.start()
+    try:
+        client = APNs(key=key_path, key_id="KEY", team_id="TEAM", topic="com.example.puctee", use_sandbox=True)
+        _use_endpoint(client, server.endpoint)
+        responses = await asyncio.gather(*(
+            client.send_notification(NotificationRequest(device_token=TOKEN, message={"aps": {"content-available": 1}}))
+            for _ in range(count)
+        ))
+        client.pool.close()
+    finally:
+        await server.stop()
+    return server, responses
+
+
+def test_aioapns_client_talks_to_fake(tmp_path):
+    key_path = write_signing_key(str(tmp_path / "apns.p8"))
+
+    server, responses = asyncio.run(send_through_fake(FakeAPNsConfig(latency_ms=5, jitter_ms=0), key_path, 20))
+
+    assert all(r.is_successful for r in responses)
+    assert server.received == 20
+    assert server.statuses == {200: 20}
+
+
+def test_fake_injects_reason_codes(tmp_path):
+    key_path = write_signing_key(str(tmp_path / "apns.p8"))
+    config = FakeAPNsConfig(latency_ms=0, jitter_ms=0, error_rate=1.0, reasons={"Unregistered": 1.0})
+
+    server, responses = asyncio.run(send_through_fake(config, key_path, 3))
+
+    assert [(r.status, r.description) for r in responses] == [("410", "Unregistered")] * 3
+    assert server.reasons == {"Unregistered": 3}
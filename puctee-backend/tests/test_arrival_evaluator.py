@@ -0,0 +1,31 @@
+import numpy as np
+
+from app.services.arrival_evaluator import evaluate_positions, haversine_km
+from app.services.geo import calculate_distance
+
+DEST = (35.6812, 139.7671)  # Tokyo Station
+
+
+def test_haversine_matches_scalar_version():
+    lats = [35.6895, 35.6586, 34.7025]
+    lons = [139.6917, 139.7454, 135.4959]
+    distances = haversine_km(np.array(lats), np.array(lons), *DEST)
+    for lat, lon, distance in zip(lats, lons, distances):
+        assert abs(distance - calculate_distance(lat, lon, *DEST)) < 1e-6
+
+
+def test_evaluate_positions_radius():
+    # ~50m north, ~150m north, and Osaka
+    lats = [DEST[0] + 0.00045, DEST[0] + 0.00135, 34.7025]
+    lons = [DEST[1], DEST[1], 135.4959]
+    arrived, distances = evaluate_positions(lats, lons, *DEST)
+
+    assert arrived.tolist() == [True, False, False]
+    assert 0.04 < distances[0] < 0.06
+    # Outside the bounding box: never computed
+    assert np.isinf(distances[2])
+
+
+def test_evaluate_positions_empty():
+    arrived, distances = evaluate_positions([], [], *DEST)
+    assert arrived.size == 0 and distances.size == 0
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.services.arrival_queue import ArrivalCoalescer, ArrivalQueueFull, ArrivalQueueStopped
+
+
+def make_coalescer(**overrides) -> ArrivalCoalescer:
+    options = dict(
+        batch_size=50,
+        batch_window_s=0.05,
+        max_queue_depth=1000,
+        max_concurrent_batches=2,
+    )
+    options.update(overrides)
+    return ArrivalCoalescer(**options)
+
+
+def test_submit_rejected_when_queue_full():
+    coalescer = make_coalescer(max_queue_depth=0)
+
+    with pytest.raises(ArrivalQueueFull):
+        asyncio.run(coalescer.submit(1, 1, 35.6812, 139.7671))
+
+    metrics = coalescer.metrics()
+    assert metrics["rejected"] == 1
+    assert metrics["submitted"] == 0
+    assert metrics["queue_depth"] == 0
+
+
+def test_metrics_start_empty():
+    metrics = make_coalescer().metrics()
+    assert metrics["batches"] == 0
+    assert metrics["avg_batch_size"] == 0.0
+    assert metrics["avg_wait_ms"] == 0.0
+
+
+def test_queue_metrics_are_exported_to_metrics():
+    from app.core.metrics import render_metrics
+
+    body = render_metrics()
+
+    assert "# TYPE puctee_arrival_queue_depth gauge" in body
+    assert "# TYPE puctee_arrival_queue_rejected_total counter" in body
+    assert "\npuctee_arrival_queue_wait_seconds_total 0" in body
+
+
+def test_cancelled_worker_releases_waiting_callers(monkeypatch):
+    coalescer = make_coalescer(batch_size=1, batch_window_s=0)
+
+    async def apply_forever(plan_id, batch):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(coalescer, "_apply", apply_forever)
+
+    async def scenario():
+        callers = [asyncio.create_task(coalescer.submit(1, user_id, 35.6812, 139.7671)) for user_id in (1, 2)]
+        await asyncio.sleep(0.01)
+        coalescer._workers[1].cancel()
+        return await asyncio.gather(*callers, return_exceptions=True)
+
+    results = asyncio.run(asyncio.wait_for(scenario(), timeout=1))
+
+    assert [type(r) for r in results] == [ArrivalQueueStopped, ArrivalQueueStopped]
+    assert coalescer.metrics()["queue_depth"] == 0
@@ -0,0 +1,40 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.services.change_feed import CursorExpired, SyncCursor, collapse, read_changes
+
+
+def test_cursor_round_trip():
+    cursor = SyncCursor(txid=123456, id=42, issued_at=1700000000)
+
+    assert SyncCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize("value", ["", "not-a-cursor", "MTI6YWJj"])
+def test_malformed_cursor(value):
+    assert SyncCursor.decode(value) is None
+
+
+def test_expired_cursor_is_rejected_before_querying():
+    now = datetime.now(timezone.utc)
+    issued = now - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS + 1)
+    cursor = SyncCursor(txid=1, id=1, issued_at=int(issued.timestamp()))
+
+    with pytest.raises(CursorExpired):
+        asyncio.run(read_changes(None, 1, cursor, 10, now))
+
+
+def test_collapse_keeps_last_op_per_entity():
+    changes = collapse([
+        ("plan", 1, "upsert"),
+        ("plan", 2, "upsert"),
+        ("plan", 1, "delete"),
+        ("notification", 5, "delete"),
+        ("notification", 5, "upsert"),
+    ])
+
+    assert changes.upserts == {"plan": [2], "notification": [5]}
+    assert changes.deletes == {"plan": [1]}
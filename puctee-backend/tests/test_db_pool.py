@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.metrics import DB_POOL_EVENTS, DB_POOL_PING, GaugeFunc, MetricsRegistry
+from app.db.pool import InstrumentedQueuePool, idle_ping_checkout, instrument_pool, pool_dimensions
+
+
+def test_auto_sizing_splits_pgbouncer_pool_across_workers():
+    assert pool_dimensions(workers=1, pgbouncer_pool_size=15, max_client_conn=200, reserved=5) == (15, 15)
+    assert pool_dimensions(workers=4, pgbouncer_pool_size=15, max_client_conn=200, reserved=5) == (3, 3)
+    # Overflow stops where the workers together would exceed max_client_conn
+    assert pool_dimensions(workers=4, pgbouncer_pool_size=40, max_client_conn=50, reserved=6) == (10, 1)
+    # Never below one connection per worker
+    assert pool_dimensions(workers=32, pgbouncer_pool_size=15, max_client_conn=200, reserved=5) == (1, 1)
+
+
+def test_labelled_gauge_renders_one_series_per_pool():
+    gauge = GaugeFunc(
+        "test_pool_in_use", "Test", lambda: {("replica",): 1, ("primary",): 3}, ("pool",), registry=MetricsRegistry()
+    )
+
+    assert gauge.collect()[2:] == ['test_pool_in_use{pool="primary"} 3', 'test_pool_in_use{pool="replica"} 1']
+
+
+class Record:
+    def __init__(self, checked_in_at=None):
+        self.info = {} if checked_in_at is None else {"checked_in_at": checked_in_at}
+
+
+def test_idle_ping_only_checks_connections_idle_past_the_threshold():
+    pings = []
+    checkout = idle_ping_checkout(lambda connection: pings.append(connection) or True, idle_s=30)
+
+    checkout("new", Record(), None)
+    checkout("busy", Record(time.monotonic() - 1), None)
+    checkout("idle", Record(time.monotonic() - 60), None)
+
+    assert pings == ["idle"]
+
+
+def test_failed_idle_ping_discards_the_connection():
+    checkout = idle_ping_checkout(lambda connection: False, idle_s=30)
+
+    with pytest.raises(exc.DisconnectionError):
+        checkout("idle", Record(time.monotonic() - 60), None)
+
+
+def test_pings_are_timed_and_failures_counted():
+    class Connection:
+        def __init__(self, alive):
+            self.alive = alive
+
+        def ping(self):
+            if not self.alive:
+                raise OSError("connection reset")
+
+    engine = create_async_engine("postgresql+asyncpg://u:p@localhost/test", poolclass=InstrumentedQueuePool)
+    instrument_pool(engine, "test", is_production=False)
+    ping = engine.sync_engine.dialect.do_ping
+    failed_before = DB_POOL_EVENTS.value("test", "ping_failed")
+
+    assert ping(Connection(alive=True)) is True
+    with pytest.raises(OSError):
+        ping(Connection(alive=False))
+
+    assert DB_POOL_PING.snapshot("test", "ok")["count"] == 1
+    assert DB_POOL_PING.snapshot("test", "error")["count"] == 1
+    assert DB_POOL_EVENTS.value("test", "ping_failed") == failed_before + 1
+    assert engine.sync_engine.pool.pool_name == "test"
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from app.db.routing import ReadYourWritesMiddleware, ReplicaRouter, _note_write, note_request_user
+
+
+def fresh_router() -> ReplicaRouter:
+    router = ReplicaRouter(replica_sessions=object(), max_lag_s=2.0, check_interval_s=1.0, shared=False)
+    router.lag_s = 0.1
+    router.checked_at = time.monotonic()
+    return router
+
+
+def test_choose_falls_back_to_primary():
+    router = fresh_router()
+
+    async def scenario():
+        assert await router.choose("alice") == ("replica", "ok")
+        assert await router.choose(None) == ("primary", "unknown_user")
+
+        await router.pin("alice")
+        assert await router.choose("alice") == ("primary", "recent_write")
+        assert await router.choose("bob") == ("replica", "ok")
+
+        router.lag_s = 5.0
+        assert await router.choose("bob") == ("primary", "replica_lag")
+        router.lag_s = 0.1
+        router.checked_at = time.monotonic() - 3 * router.check_interval_s  # Measurement went stale
+        assert await router.choose("bob") == ("primary", "replica_lag")
+
+    asyncio.run(scenario())
+
+    disabled = ReplicaRouter(replica_sessions=None, max_lag_s=2.0, check_interval_s=1.0, shared=False)
+    assert asyncio.run(disabled.choose("alice")) == ("primary", "no_replica")
+
+
+def test_pin_outlasts_the_lag_bound():
+    router = fresh_router()
+
+    assert router.pin_s > router.max_lag_s + router.check_interval_s
+
+
+def call(middleware, method: str, statement: str = None):
+    pinned_at_response = []
+
+    async def app(scope, receive, send):
+        note_request_user("alice")
+        if statement:
+            _note_write(None, None, statement, None, None, False)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            pinned_at_response.append(await middleware.router.is_pinned("alice"))
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    middleware.app = app
+    asyncio.run(middleware({"type": "http", "method": method, "headers": []}, receive, send))
+    return pinned_at_response[0]
+
+
+def test_writes_pin_the_user_before_the_response():
+    assert call(ReadYourWritesMiddleware(None, fresh_router()), "POST") is True
+    assert call(ReadYourWritesMiddleware(None, fresh_router()), "GET", "UPDATE users SET display_name = 'x'") is True
+
+
+def test_reads_do_not_pin():
+    assert call(ReadYourWritesMiddleware(None, fresh_router()), "GET") is False
+    assert call(ReadYourWritesMiddleware(None, fresh_router()), "GET", "SELECT 1") is False
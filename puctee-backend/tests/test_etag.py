@@ -0,0 +1,60 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.etag import (
+    content_etag,
+    etag_matches,
+    parse_if_match,
+    version_conflict,
+    version_etag,
+    versioned_weak_etag,
+    weak_etag,
+)
+
+
+def test_etag_round_trip():
+    assert parse_if_match(version_etag(7)) == 7
+
+
+def test_missing_or_wildcard_if_match():
+    assert parse_if_match(None) is None
+    assert parse_if_match("*") is None
+
+
+def test_malformed_if_match():
+    for value in ('"abc"', '"v3.x"', '"v"'):
+        with pytest.raises(HTTPException) as exc:
+            parse_if_match(value)
+        assert exc.value.status_code == 400
+
+
+def test_version_conflict_is_compact():
+    exc = version_conflict(3)
+    assert exc.status_code == 409
+    assert exc.detail == {"code": "version_conflict", "version": 3}
+    assert exc.headers["ETag"] == '"v3"'
+
+
+def test_content_etag_ignores_key_order():
+    assert content_etag({"a": 1, "b": [1, 2]}) == content_etag({"b": [1, 2], "a": 1})
+    assert content_etag({"a": 1}) != content_etag({"a": 2})
+
+
+def test_weak_etags_fail_if_match():
+    etag = versioned_weak_etag(4, "2026-01-01T00:00:00+00:00", [1, 2])
+    assert etag.startswith('W/"v4.')
+
+    for value in (etag, 'W/"v3.x"', 'W/"v3"'):
+        with pytest.raises(HTTPException) as exc:
+            parse_if_match(value)
+        assert exc.value.status_code == 412
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = weak_etag(1, "2026-01-01")
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag[2:]}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(weak_etag(1, "2026-01-02"), etag)
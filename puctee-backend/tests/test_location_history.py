@@ -0,0 +1,21 @@
+from datetime import date
+
+from app.services.location_history import create_partition_sql, partition_day, partition_name
+
+
+def test_partition_name_round_trip():
+    day = date(2026, 10, 19)
+    name = partition_name(day)
+    assert name == "location_points_p20261019"
+    assert partition_day(name) == day
+
+
+def test_partition_day_ignores_unrelated_tables():
+    assert partition_day("location_points") is None
+    assert partition_day("location_points_default") is None
+
+
+def test_create_partition_sql_covers_one_utc_day():
+    sql = create_partition_sql(date(2026, 12, 31))
+    assert "PARTITION OF location_points" in sql
+    assert "FROM ('2026-12-31 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in sql
@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.services.location_ingestion import LocationIngestor
+
+
+def make_ingestor() -> LocationIngestor:
+    return LocationIngestor(
+        min_distance_m=25.0,
+        min_interval_s=15.0,
+        batch_size=100,
+        flush_interval_s=2.0,
+    )
+
+
+def test_first_point_is_accepted():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+
+    decision = ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+    assert decision.accepted
+    assert decision.distance_m is None
+
+
+def test_point_too_soon_is_dropped():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+
+    # ~1km away but only 5 seconds later
+    decision = ingestor.evaluate(1, 1, 35.6902, 139.7671, now + timedelta(seconds=5))
+    assert not decision.accepted
+    assert decision.reason == "too_soon"
+
+
+def test_point_too_close_is_dropped():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+
+    # ~10m away after a minute
+    decision = ingestor.evaluate(1, 1, 35.68129, 139.7671, now + timedelta(seconds=60))
+    assert not decision.accepted
+    assert decision.reason == "too_close"
+
+
+def test_moved_point_is_accepted_and_counted():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now + timedelta(seconds=1))
+
+    decision = ingestor.evaluate(1, 1, 35.6902, 139.7671, now + timedelta(seconds=60))
+    assert decision.accepted
+    assert 950 < decision.distance_m < 1050
+
+    stats = ingestor.user_stats(1)
+    assert stats.received == 3
+    assert stats.accepted == 2
+    assert stats.dropped_too_soon == 1
+
+
+def test_state_is_tracked_per_plan():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+
+    decision = ingestor.evaluate(2, 1, 35.6812, 139.7671, now)
+    assert decision.accepted
+
+
+def test_evaluate_batch_returns_rows_for_accepted_points():
+    ingestor = make_ingestor()
+    start = datetime.now(timezone.utc)
+    points = [
+        {"latitude": 35.6812, "longitude": 139.7671, "recorded_at": start},
+        {"latitude": 35.6812, "longitude": 139.7671, "recorded_at": start + timedelta(seconds=5)},
+        {"latitude": 35.6902, "longitude": 139.7671, "recorded_at": start + timedelta(seconds=60)},
+    ]
+
+    decisions, rows = ingestor.evaluate_batch(1, 1, points)
+    assert [d.accepted for d in decisions] == [True, False, True]
+    assert len(rows) == 2
+    assert rows[1]["created_at"] == start + timedelta(seconds=60)
+
+
+def test_failed_flush_requeues_then_forgets_lost_points(monkeypatch):
+    from app.services import location_ingestion
+
+    class FailingSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, statement):
+            raise ConnectionError("database down")
+
+    monkeypatch.setattr(location_ingestion, "AsyncSessionLocal", FailingSession)
+    ingestor = make_ingestor()
+
+    async def scenario():
+        await ingestor.submit(1, 1, 35.6812, 139.7671)
+        for _ in range(location_ingestion.MAX_FLUSH_ATTEMPTS - 1):
+            await ingestor.flush()
+            assert len(ingestor._buffer) == 1
+        await ingestor.flush()
+
+    asyncio.run(scenario())
+
+    assert ingestor._buffer == []
+    assert ingestor.rows_failed == 1
+    # The lost point no longer throttles the next one
+    assert ingestor.evaluate(1, 1, 35.6812, 139.7671, datetime.now(timezone.utc)).accepted
+
+
+def test_offline_replay_older_than_live_point_is_kept():
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+    start = now - timedelta(minutes=30)
+    points = [
+        {"latitude": 35.6602, "longitude": 139.7671, "recorded_at": start},
+        {"latitude": 35.6602, "longitude": 139.7671, "recorded_at": start + timedelta(seconds=5)},
+        {"latitude": 35.6702, "longitude": 139.7671, "recorded_at": start + timedelta(minutes=1)},
+    ]
+
+    decisions, rows = ingestor.evaluate_batch(1, 1, points)
+    assert [d.reason for d in decisions] == [None, "too_soon", None]
+    assert len(rows) == 2
+
+
+def test_batch_state_moves_only_when_recorded():
+    ingestor = make_ingestor()
+    start = datetime.now(timezone.utc) - timedelta(minutes=5)
+    points = [{"latitude": 35.6812, "longitude": 139.7671, "recorded_at": start}]
+
+    decisions, rows = ingestor.evaluate_batch(1, 1, points)
+    # Not committed: a retry of the same upload is accepted again
+    assert ingestor.evaluate_batch(1, 1, points)[0][0].accepted
+
+    ingestor.record_batch(1, 1, rows)
+    assert ingestor.evaluate_batch(1, 1, points)[0][0].reason == "too_soon"
+
+
+def test_stats_of_idle_users_are_pruned():
+    from app.services.location_ingestion import STATE_TTL
+
+    ingestor = make_ingestor()
+    now = datetime.now(timezone.utc)
+    ingestor.evaluate(1, 1, 35.6812, 139.7671, now)
+    ingestor.evaluate(1, 2, 35.6812, 139.7671, now)
+    ingestor._stats[1].last_seen = now - STATE_TTL - timedelta(minutes=1)
+
+    ingestor._prune_state()
+
+    assert list(ingestor._stats) == [2]
+    assert ingestor.metrics()["received"] == 2
+    assert ingestor.outcome_totals()["accepted"] == 2
+
+
+def test_ingestion_counters_are_exported_to_metrics():
+    from app.core.metrics import render_metrics
+
+    body = render_metrics()
+
+    assert "# TYPE puctee_location_points_total counter" in body
+    assert 'puctee_location_points_total{outcome="dropped_too_close"}' in body
+    assert 'puctee_location_rows_total{outcome="failed"}' in body
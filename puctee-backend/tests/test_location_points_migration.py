@@ -0,0 +1,66 @@
+import importlib.util
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+MIGRATION = (
+    Path(__file__).resolve().parent.parent
+    / "alembic" / "versions" / "5b7e2c9d1a34_split_location_points_into_partitioned_table.py"
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("split_location_points", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def destinations(rows):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE locations (id INTEGER PRIMARY KEY, plan_id INTEGER, user_id INTEGER, "
+            "name VARCHAR, latitude FLOAT, longitude FLOAT, created_at TIMESTAMP)"
+        ))
+        conn.execute(
+            text(
+                "INSERT INTO locations (id, plan_id, user_id, name, latitude, longitude, created_at) "
+                "VALUES (:id, :plan_id, 1, :name, 35.0, 139.0, :created_at)"
+            ),
+            [dict(zip(("id", "plan_id", "name", "created_at"), row)) for row in rows],
+        )
+        return sorted(row[0] for row in conn.execute(text(load_migration().DESTINATIONS_SQL)))
+
+
+def test_destination_is_the_earliest_named_row_of_each_plan():
+    rows = [
+        # Plan 1: destination from create.py, then shared points
+        (1, 1, "Shibuya", "2026-10-01 09:00:00"),
+        (2, 1, None, "2026-10-01 09:30:00"),
+        (3, 1, "Current location", "2026-10-01 09:31:00"),
+        # Plan 2: destination edited by update.py long after the plan was
+        # created (earlier rows were replaced), then points shared before and
+        # after later edits of the plan's other fields
+        (10, 2, "Ebisu", "2026-10-05 18:00:00"),
+        (11, 2, None, "2026-10-05 18:00:30"),
+        (12, 2, "Current location", "2026-10-06 08:00:00"),
+        (13, 2, None, "2026-10-06 08:01:00"),
+        # Plan 3: no named rows at all
+        (20, 3, None, "2026-10-02 10:00:00"),
+        (21, 3, None, "2026-10-02 09:00:00"),
+        # Not attached to a plan
+        (30, None, "Home", "2026-09-01 00:00:00"),
+    ]
+
+    assert destinations(rows) == [1, 10, 20]
+
+
+def test_later_named_row_wins_over_earlier_unnamed_points():
+    rows = [
+        (1, 1, None, "2026-10-01 09:00:00"),
+        (2, 1, "Shinjuku", "2026-10-01 09:05:00"),
+        (3, 1, "Current location", "2026-10-01 09:10:00"),
+    ]
+
+    assert destinations(rows) == [2]
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_monitor import LoopBlockMonitor, blocked_callbacks
+
+
+def blocking_call():
+    time.sleep(0.15)
+
+
+@pytest.mark.loop_block_budget(0)
+def test_blocked_callback_is_reported_with_its_stack():
+    timer, blocked = blocked_callbacks(0.05)
+
+    async def handler():
+        await asyncio.sleep(0)
+        blocking_call()
+
+    with timer:
+        asyncio.run(handler())
+
+    assert len(blocked) == 1
+    assert blocked[0].duration_s >= 0.15
+    assert "handler" in blocked[0].task
+    assert "blocking_call" in blocked[0].stack
+
+
+def test_short_callbacks_are_not_reported():
+    timer, blocked = blocked_callbacks(0.05)
+
+    async def handler():
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+
+    with timer:
+        asyncio.run(handler())
+
+    assert blocked == []
+
+
+@pytest.mark.loop_block_budget(0)
+def test_monitor_counts_blocks_and_restores_the_loop():
+    monitor = LoopBlockMonitor(threshold_s=0.05, lag_interval_s=0.01)
+    original_run = asyncio.events.Handle._run
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.02)
+        blocking_call()
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+
+    assert monitor.metrics()["blocked"] == 1
+    assert asyncio.events.Handle._run is original_run
+
+
+def test_monitor_under_uvloop_only_measures_lag(caplog):
+    uvloop = pytest.importorskip("uvloop")
+    monitor = LoopBlockMonitor(threshold_s=0.05, lag_interval_s=0.01)
+    original_run = asyncio.events.Handle._run
+
+    async def scenario():
+        monitor.start()
+        assert asyncio.events.Handle._run is original_run
+        await asyncio.sleep(0.02)
+        metrics = monitor.metrics()
+        await monitor.stop()
+        return metrics
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        metrics = runner.run(scenario())
+
+    assert metrics["running"] is True
+    assert metrics["detecting_blocks"] is False
+    assert "--loop asyncio" in caplog.text
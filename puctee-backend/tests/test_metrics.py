@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import (
+    DEPENDENCY_DURATION,
+    HTTP_REQUEST_DURATION,
+    Histogram,
+    MetricsMiddleware,
+    MetricsRegistry,
+    track_dependency,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0), registry=MetricsRegistry())
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/plans/{plan_id}")
+
+    lines = histogram.collect()
+
+    assert 'test_seconds_bucket{route="/plans/{plan_id}",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/plans/{plan_id}",le="1"} 3' in lines
+    assert 'test_seconds_bucket{route="/plans/{plan_id}",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/plans/{plan_id}"} 4' in lines
+
+
+def test_track_dependency_labels_errors():
+    before = DEPENDENCY_DURATION.snapshot("test", "call", "error")["count"]
+    with pytest.raises(RuntimeError):
+        with track_dependency("test", "call"):
+            raise RuntimeError("down")
+
+    assert DEPENDENCY_DURATION.snapshot("test", "call", "error")["count"] == before + 1
+
+
+def test_middleware_labels_by_route_template():
+    class Route:
+        path = "/api/plans/{plan_id}"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        await send({"type": "http.response.start", "status": 304, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/api/plans/42"}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+
+    assert HTTP_REQUEST_DURATION.snapshot("GET", "/api/plans/{plan_id}", "304")["count"] == 1
@@ -0,0 +1,125 @@
+import asyncio
+
+from app.core.config import settings
+from app.services import plan_cache as plan_cache_module
+from app.services.plan_cache import PlanCache
+
+
+class InMemoryRedis:
+    """Just the commands PlanCache uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+    async def expire(self, key, seconds):
+        pass
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self)
+
+
+class _Pipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        for name, args, kwargs in self.calls:
+            await getattr(self.redis, name)(*args, **kwargs)
+
+
+def make_cache(monkeypatch, redis):
+    monkeypatch.setattr(settings, "REDIS_URL", "redis://test")
+    cache = PlanCache(ttl_s=60, lock_timeout_s=1.0, lock_wait_s=0.2)
+
+    async def connect():
+        return redis
+
+    monkeypatch.setattr(cache, "_redis", connect)
+    return cache
+
+
+def test_concurrent_misses_share_one_load(monkeypatch):
+    loads = []
+
+    async def load(plan_id):
+        loads.append(plan_id)
+        await asyncio.sleep(0.01)
+        return {"etag": 'W/"v1.x"', "participant_ids": [1], "plan": {"id": plan_id}}
+
+    monkeypatch.setattr(plan_cache_module, "load_plan_entry", load)
+    cache = make_cache(monkeypatch, InMemoryRedis())
+
+    async def scenario():
+        entries = await asyncio.gather(*[cache.get_plan(7) for _ in range(10)])
+        again = await cache.get_plan(7)
+        return entries, again
+
+    entries, again = asyncio.run(scenario())
+
+    assert loads == [7]
+    assert all(entry["plan"] == {"id": 7} for entry in entries)
+    assert again["plan"] == {"id": 7}
+    assert cache.metrics()["coalesced"] == 9
+    assert cache.metrics()["hits"] == 1
+
+
+def test_invalidation_outdates_cached_entry(monkeypatch):
+    titles = iter(["before", "after"])
+
+    async def load(plan_id):
+        return {"etag": "e", "participant_ids": [1], "plan": {"title": next(titles)}}
+
+    monkeypatch.setattr(plan_cache_module, "load_plan_entry", load)
+    redis = InMemoryRedis()
+    cache = make_cache(monkeypatch, redis)
+
+    async def scenario():
+        first = await cache.get_plan(3)
+        # A fill that raced with the write: entry survives, generation moved
+        stale = redis.data["plan:3:detail"]
+        await cache.invalidate(3)
+        redis.data["plan:3:detail"] = stale
+        second = await cache.get_plan(3)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first["plan"]["title"] == "before"
+    assert second["plan"]["title"] == "after"
+
+
+def test_cache_counters_are_exported_to_metrics():
+    from app.core.metrics import render_metrics
+
+    body = render_metrics()
+
+    assert 'puctee_plan_cache_lookups_total{result="hit"}' in body
+    assert "# TYPE puctee_plan_cache_errors_total counter" in body
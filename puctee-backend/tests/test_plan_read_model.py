@@ -0,0 +1,56 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.plan_read_model import (
+    pending_invites_query,
+    pending_invites_validator_query,
+    plan_validator_query,
+    plans_for_user_query,
+    plans_for_user_validator_query,
+)
+
+
+def compile_sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_plan_list_is_one_query_without_private_columns():
+    sql = compile_sql(plans_for_user_query(1, ["upcoming"], 0, 20))
+
+    assert sql.count("json_agg") == 4
+    assert "hashed_password" not in sql
+    assert "push_token" not in sql
+
+
+def test_invite_subquery_is_not_correlated_to_outer_invites():
+    sql = compile_sql(pending_invites_query(1))
+
+    # The plan's own invites come from a separate FROM inside the subquery
+    assert "FROM plan_invites \nWHERE plan_invites.plan_id = plans.id" in sql
+    assert "FROM plan_invites JOIN plans ON plans.id = plan_invites.plan_id" in sql
+
+
+def test_plan_validator_reads_no_payload_columns():
+    sql = compile_sql(plan_validator_query(2, user_id=1))
+
+    assert "json_build_object" not in sql
+    assert "users.email" not in sql
+    assert "locations.name" not in sql
+
+
+def test_plan_validator_lists_child_ids_instead_of_summing_them():
+    sql = compile_sql(plan_validator_query(2, user_id=1))
+
+    assert "sum(" not in sql
+    assert "json_agg(users.id ORDER BY users.id)" in sql
+
+
+def test_home_validators_read_the_same_rows_without_payload_columns():
+    plans = compile_sql(plans_for_user_validator_query(1, ["upcoming"], 20, 10))
+    invites = compile_sql(pending_invites_validator_query(1))
+
+    for sql in (plans, invites):
+        assert "json_build_object" not in sql
+        assert "users.email" not in sql
+    assert "ORDER BY plans.start_time DESC" in plans
+    assert "LIMIT" in plans and "OFFSET" in plans
+    assert "plan_invites.status = " in invites
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from app.core.profiler import ProfilingMiddleware, write_profile
+
+
+async def fake_query():
+    await asyncio.sleep(0.05)
+
+
+def render():
+    time.sleep(0.03)
+
+
+def run_request(middleware, headers):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/plans/list", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+async def endpoint(scope, receive, send):
+    await fake_query()
+    render()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def test_header_triggered_profile_includes_awaited_and_running_frames(tmp_path):
+    middleware = ProfilingMiddleware(endpoint, api_key="admin", sample_rate=0, output_dir=str(tmp_path), interval_ms=2)
+
+    sent = run_request(middleware, [(b"x-profile-key", b"admin")])
+
+    profile_id = dict(sent[0]["headers"])[b"x-profile-id"].decode()
+    [path] = tmp_path.glob("*.folded")
+    assert path.name.startswith(profile_id)
+    collapsed = path.read_text()
+    assert "fake_query;" in collapsed  # Suspended in asyncio.sleep
+    assert "endpoint;test_profiler:render" in collapsed  # Running on the loop thread
+    assert "ProfilingMiddleware" not in collapsed
+
+
+def test_wrong_key_is_not_profiled(tmp_path):
+    middleware = ProfilingMiddleware(endpoint, api_key="admin", sample_rate=0, output_dir=str(tmp_path))
+
+    sent = run_request(middleware, [(b"x-profile-key", b"guess")])
+
+    assert b"x-profile-id" not in dict(sent[0]["headers"])
+    assert list(tmp_path.glob("*.folded")) == []
+
+
+def test_output_directory_is_bounded(tmp_path):
+    for index in range(5):
+        write_profile(tmp_path, f"{index}.folded", "a;b 1\n", max_files=3)
+
+    assert sorted(p.name for p in tmp_path.glob("*.folded")) == ["2.folded", "3.folded", "4.folded"]
@@ -0,0 +1,23 @@
+import asyncio
+import logging
+
+from app.services import push_notification
+
+
+def test_plan_invite_failures_are_logged_per_user(monkeypatch, caplog):
+    async def send(token, title, body, plan_id):
+        if token == "raises":
+            raise ConnectionError("APNs unreachable")
+        return token == "ok"
+
+    monkeypatch.setattr(push_notification, "send_plan_invite_notification", send)
+
+    with caplog.at_level(logging.WARNING, logger=push_notification.__name__):
+        sent = asyncio.run(push_notification.send_plan_invite_notifications(
+            [(1, "ok"), (2, "rejected"), (3, "raises")], "Invite", "Join", plan_id=9
+        ))
+
+    assert sent == 1
+    assert "plan 9 to user 2" in caplog.text
+    assert "plan 9 to user 3: APNs unreachable" in caplog.text
+    assert "user 1" not in caplog.text
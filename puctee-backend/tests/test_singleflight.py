@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from app.core.metrics import render_metrics
+from app.core.singleflight import SingleFlight, get_single_flight, single_flight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def query():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return ["row"]
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do(("plan", 1), query) for _ in range(5)])
+
+    results = asyncio.run(scenario())
+
+    assert results == [["row"]] * 5
+    assert len(runs) == 1
+    assert flight.metrics()["coalesced"] == 4
+    assert flight.metrics()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+
+    async def query():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(*[flight.do("key", query) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.metrics()["executions"] == 1
+
+
+def test_waiter_reruns_when_leader_is_cancelled():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def query():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return len(runs)
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("key", query))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("key", query))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_decorator_keys_by_arguments():
+    calls = []
+
+    @single_flight("test.decorated", key=lambda db, plan_id: plan_id)
+    async def load(db, plan_id):
+        calls.append(plan_id)
+        await asyncio.sleep(0.01)
+        return plan_id
+
+    async def scenario():
+        return await asyncio.gather(load("a", 1), load("b", 1), load("c", 2))
+
+    assert asyncio.run(scenario()) == [1, 1, 2]
+    assert sorted(calls) == [1, 2]
+
+
+def test_groups_are_exported_to_metrics():
+    get_single_flight("tests.metrics")
+
+    body = render_metrics()
+
+    assert 'puctee_singleflight_coalesced_total{group="tests.metrics"} 0' in body
+    assert 'puctee_singleflight_in_flight{group="tests.metrics"} 0' in body
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import compare, parse_importtime
+
+
+def test_parse_importtime():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   app.core.config",
+        "import time:      1500 |       1620 | app.main",
+        "some other warning",
+    ])
+
+    modules = parse_importtime(stderr)
+
+    assert modules == [
+        {"module": "app.core.config", "self_ms": 0.12, "cumulative_ms": 0.12},
+        {"module": "app.main", "self_ms": 1.5, "cumulative_ms": 1.62},
+    ]
+
+
+def test_compare_reports_relative_change():
+    previous = {"median": {"import_ms": 200.0, "rss_kb": 1000.0}}
+    current = {"median": {"import_ms": 150.0, "rss_kb": 1000.0, "first_request_ms": 5.0}}
+
+    changes = compare(current, previous)
+
+    assert changes["import_ms"]["change_pct"] == -25.0
+    assert changes["rss_kb"]["change_pct"] == 0.0
+    assert "first_request_ms" not in changes
+
+
+def test_app_import_leaves_heavy_modules_unloaded():
+    code = "import sys, app.main; print(sorted(m for m in ('numpy', 'boto3', 'botocore', 'aioapns') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=os.environ, check=True)
+
+    assert result.stdout.strip() == "[]"
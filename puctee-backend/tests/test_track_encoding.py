@@ -0,0 +1,43 @@
+import base64
+from datetime import datetime, timezone
+
+from app.services.track_encoding import (
+    decode_cursor,
+    decode_polyline,
+    delta_encode,
+    encode_cursor,
+    encode_polyline,
+    simplify_indices,
+)
+
+
+def test_encode_polyline_matches_reference():
+    # Example from Google's encoded polyline documentation
+    points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+    encoded = encode_polyline(points)
+    assert encoded == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+    assert decode_polyline(encoded) == points
+
+
+def test_simplify_straight_lines_keeps_corners_only():
+    north = [(35.0 + i * 0.0001, 139.0) for i in range(100)]
+    east = [(35.01, 139.0 + i * 0.0001) for i in range(100)]
+    assert simplify_indices(north + east, tolerance_m=5) == [0, 100, 199]
+
+
+def test_simplify_without_tolerance_keeps_everything():
+    points = [(35.0, 139.0), (35.1, 139.1), (35.2, 139.0)]
+    assert simplify_indices(points, tolerance_m=0) == [0, 1, 2]
+
+
+def test_delta_encode():
+    assert delta_encode([100, 105, 111]) == [100, 5, 6]
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 10, 19, 1, 2, 3, 456789, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    assert decode_cursor("not a cursor!") is None
+    # Past datetime's range or BIGINT's: rejected rather than failing later
+    assert decode_cursor(base64.urlsafe_b64encode(b"99999999999999999999:1").decode()) is None
+    assert decode_cursor(base64.urlsafe_b64encode(f"0:{2 ** 64}".encode()).decode()) is None
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from benchmarks.workload import Recorder, WorkloadConfig, generate, percentile
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def test_generate_is_deterministic_and_consistent():
+    config = WorkloadConfig(users=50, friends=6, plans=10, participants=4, stampede_plans=3)
+
+    data = generate(config, NOW)
+
+    assert data == generate(config, NOW)
+    assert len(data.users) == 50
+    assert len({u["username"] for u in data.users}) == 50
+    assert all(a < b < 50 for a, b in data.friendships)
+    assert all(len(set(members)) == 4 for members in data.participants)
+    assert [p["start_time"] for p in data.plans[:3]] == [NOW] * 3
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_recorder_report():
+    recorder = Recorder()
+    recorder.record("GET /api/home", 0.0, 0.010, 200)
+    recorder.record("GET /api/home", 0.5, 0.520, 200)
+    recorder.record("GET /api/home", 1.0, 1.030, 503)
+
+    report = recorder.report()["GET /api/home"]
+
+    assert report["requests"] == 3
+    assert report["errors"] == 1
+    assert report["statuses"] == {"200": 2, "503": 1}
+    assert report["p50_ms"] == 20.0
+    assert report["max_ms"] == 30.0
+    assert report["throughput_rps"] == round(3 / 1.03, 1)